@@ -1,4 +1,3 @@
-import random
 import sys
 sys.path.append("..")  #so other modules can be found in parent dir
 from Player import *
@@ -53,9 +52,9 @@ class AIPlayer(Player):
                 move = None
                 while move == None:
                     #Choose any x location
-                    x = random.randint(0, 9)
+                    x = self.random.randint(0, 9)
                     #Choose any y location on your side of the board
-                    y = random.randint(0, 3)
+                    y = self.random.randint(0, 3)
                     #Set the move if this space is empty
                     if currentState.board[x][y].constr == None and (x, y) not in moves:
                         move = (x, y)
@@ -70,9 +69,9 @@ class AIPlayer(Player):
                 move = None
                 while move == None:
                     #Choose any x location
-                    x = random.randint(0, 9)
+                    x = self.random.randint(0, 9)
                     #Choose any y location on enemy side of the board
-                    y = random.randint(6, 9)
+                    y = self.random.randint(6, 9)
                     #Set the move if this space is empty
                     if currentState.board[x][y].constr == None and (x, y) not in moves:
                         move = (x, y)
@@ -94,12 +93,12 @@ class AIPlayer(Player):
     ##
     def getMove(self, currentState):
         moves = listAllLegalMoves(currentState)
-        selectedMove = moves[random.randint(0,len(moves) - 1)];
+        selectedMove = moves[self.random.randint(0,len(moves) - 1)];
 
         #don't do a build move if there are already 3+ ants
         numAnts = len(currentState.inventories[currentState.whoseTurn].ants)
         while (selectedMove.moveType == BUILD and numAnts >= 3):
-            selectedMove = moves[random.randint(0,len(moves) - 1)];
+            selectedMove = moves[self.random.randint(0,len(moves) - 1)];
             
         return selectedMove
     
@@ -114,4 +113,4 @@ class AIPlayer(Player):
     ##
     def getAttack(self, currentState, attackingAnt, enemyLocations):
         #Attack a random enemy.
-        return enemyLocations[random.randint(0, len(enemyLocations) - 1)]
+        return enemyLocations[self.random.randint(0, len(enemyLocations) - 1)]
@@ -1,5 +1,4 @@
   # -*- coding: latin-1 -*-
-import random
 import sys
 sys.path.append("..")  #so other modules can be found in parent dir
 from Player import *
@@ -59,9 +58,9 @@ class AIPlayer(Player):
                 move = None
                 while move == None:
                     #Choose any x location
-                    x = random.randint(0, 9)
+                    x = self.random.randint(0, 9)
                     #Choose any y location on enemy side of the board
-                    y = random.randint(6, 9)
+                    y = self.random.randint(6, 9)
                     #Set the move if this space is empty
                     if currentState.board[x][y].constr == None and (x, y) not in moves:
                         move = (x, y)
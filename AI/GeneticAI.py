@@ -1,6 +1,6 @@
-import random
 import sys
 import time
+import multiprocessing
 
 sys.path.append("..")  # so other modules can be found in parent dir
 from Player import *
@@ -68,11 +68,11 @@ class AIPlayer(Player):
             # grass and hills
             for x in range(0, 10):
                 for y in range(0, 4):
-                    gene.append([(x, y), random.randint(0, self.max / 2)])
+                    gene.append([(x, y), self.random.randint(0, self.max / 2)])
             # food
             for x in range(0, 10):
                 for y in range(6, 10):
-                    gene.append([(x, y), random.randint(0, self.max / 2)])
+                    gene.append([(x, y), self.random.randint(0, self.max / 2)])
             # add gene with respective highscore to the gene pool
             self.pool.append([gene, 0])
             gene = []
@@ -94,17 +94,17 @@ class AIPlayer(Player):
         father = dad[0]
 
         delimiter = len(mother) / 2  # 40
-        ourSplit = random.randint(0, delimiter)
-        theirSplit = random.randint(delimiter, len(mother))
+        ourSplit = self.random.randint(0, delimiter)
+        theirSplit = self.random.randint(delimiter, len(mother))
 
         gene1 = mother[:ourSplit] + father[ourSplit: delimiter] + mother[delimiter:theirSplit] + father[theirSplit:]
         gene2 = father[:ourSplit] + mother[ourSplit: delimiter] + father[delimiter: theirSplit] + mother[theirSplit:]
         children = [[gene1, 0], [gene2, 0]]
         for child in children:
-            mutate = random.uniform(0, 1)
+            mutate = self.random.uniform(0, 1)
             if mutate > 0.8:
-                index = random.randint(0, len(child[0]) - 1)
-                newval = random.randint(0, self.max / 2)
+                index = self.random.randint(0, len(child[0]) - 1)
+                newval = self.random.randint(0, self.max / 2)
                 child[0][index][1] = newval  # value change -- [gene -- [(point,value),...], score]
         return children
 
@@ -123,19 +123,19 @@ class AIPlayer(Player):
 
         nextGen = []
         for i in range(0, len(self.pool) / 2):
-            m = random.randint(0, len(self.pool) - 1)
+            m = self.random.randint(0, len(self.pool) - 1)
             mother = self.pool[m]
-            f = random.randint(0, len(self.pool) - 1)
+            f = self.random.randint(0, len(self.pool) - 1)
             father = self.pool[f]
 
             # save the fittest
-            fit = random.uniform(0, 1)
+            fit = self.random.uniform(0, 1)
             if fit > 0.5:
-                m = random.randint(0, len(top) - 1)
+                m = self.random.randint(0, len(top) - 1)
                 mother = top[m]
-            fit = random.uniform(0, 1)
+            fit = self.random.uniform(0, 1)
             if fit > 0.5:
-                f = random.randint(0, len(top) - 1)
+                f = self.random.randint(0, len(top) - 1)
                 father = top[f]
 
             for child in self.mateGenes(mother, father):
@@ -143,6 +143,70 @@ class AIPlayer(Player):
 
         return nextGen
 
+    ##
+    # evaluatePopulation
+    # plays numGamesPerGene games for every gene in the pool at once, spread
+    # over worker processes that each run a HeadlessGame, then replaces the pool
+    # with the next generation from generateNextGenes.  This does the same work
+    # as popSize * numGamesPerGene calls to registerWin, without waiting for the
+    # games one after another.
+    #
+    # Parameters:
+    #   opponentNames - authors of the AIs to play against, taken in turn (string[])
+    #   processes - number of worker processes, or None for one per core
+    #
+    # Return: the average score of each gene of the evaluated generation, in pool order
+    ##
+    def evaluatePopulation(self, opponentNames, processes=None):
+        # make sure the opponents exist before starting any workers
+        from HeadlessGame import HeadlessGame
+        if self.author in opponentNames or \
+           not HeadlessGame().selectAIs([self.author] + list(opponentNames)):
+            raise ValueError("invalid opponents: " + str(opponentNames))
+
+        # one task per game: (gene index, game number, gene, opponent, genetic plays first)
+        tasks = []
+        for index in range(0, len(self.pool)):
+            for gameNum in range(0, self.numGamesPerGene):
+                opponent = opponentNames[gameNum % len(opponentNames)]
+                tasks.append((index, gameNum, self.pool[index][0], opponent, gameNum % 2 == 0))
+
+        if processes is None or processes <= 0:
+            processes = multiprocessing.cpu_count()
+        scores = [[] for gene in self.pool]
+        states = [None] * len(self.pool)
+        workers = multiprocessing.Pool(processes, initGeneWorker, (self.author, opponentNames))
+        try:
+            for index, gameNum, score, state in workers.imap_unordered(playGeneGame, tasks):
+                scores[index].append(score)
+                if gameNum == 0:
+                    states[index] = state
+            workers.close()
+        except:
+            workers.terminate()
+            raise
+        finally:
+            workers.join()
+
+        # average the scores and set them for the genes
+        for index in range(0, len(self.pool)):
+            self.pool[index][1] = float(sum(scores[index])) / float(len(scores[index]))
+        averages = [gene[1] for gene in self.pool]
+
+        # print the fittest gene's layout, as registerWin does for each generation
+        genFittest = sorted(self.pool, key=lambda x: x[1], reverse=True)[0]
+        fittestState = states[self.pool.index(genFittest)]
+        if fittestState is not None:
+            self.asciiPrintState(fittestState)
+        print("score = " + str(genFittest[1]))
+
+        # reset stuff
+        self.poolIndex = 0
+        self.poolStates = []
+        self.currgenescores = []
+        self.pool = self.generateNextGenes()
+        return averages
+
     ##
     # getPlacement
     #
@@ -191,12 +255,12 @@ class AIPlayer(Player):
             self.poolStates.append(currentState)
 
         moves = listAllLegalMoves(currentState)
-        selectedMove = moves[random.randint(0, len(moves) - 1)];
+        selectedMove = moves[self.random.randint(0, len(moves) - 1)];
 
         # don't do a build move if there are already 3+ ants
         numAnts = len(currentState.inventories[currentState.whoseTurn].ants)
         while (selectedMove.moveType == BUILD and numAnts >= 3):
-            selectedMove = moves[random.randint(0, len(moves) - 1)];
+            selectedMove = moves[self.random.randint(0, len(moves) - 1)];
 
         return selectedMove
 
@@ -213,7 +277,7 @@ class AIPlayer(Player):
     ##
     def getAttack(self, currentState, attackingAnt, enemyLocations):
         # Attack a random enemy.
-        return enemyLocations[random.randint(0, len(enemyLocations) - 1)]
+        return enemyLocations[self.random.randint(0, len(enemyLocations) - 1)]
 
     ##
     # registerWin
@@ -305,3 +369,60 @@ class AIPlayer(Player):
         f.write(" food: " + str(p1Food) + "/" + str(p2Food) + "\n")
 
         f.close()
+
+
+# the HeadlessGame owned by each worker process of evaluatePopulation
+geneWorkerGame = None
+
+##
+# initGeneWorker
+# process pool initializer for evaluatePopulation.  Gives each worker its own
+# HeadlessGame with the genetic AI and its opponents loaded.
+#
+# Parameters:
+#   author - the genetic AI's author name
+#   opponentNames - authors of the AIs to play against
+##
+def initGeneWorker(author, opponentNames):
+    from HeadlessGame import HeadlessGame
+    global geneWorkerGame
+    geneWorkerGame = HeadlessGame()
+    geneWorkerGame.selectAIs([author] + list(opponentNames))
+    geneWorkerGame.submitClickedCallback()
+
+##
+# playGeneGame
+# plays one evaluation game of evaluatePopulation in a worker process.  The
+# worker's genetic AI is given a pool holding just the gene to test, and
+# enough games per gene that registerWin only records the game's score.
+#
+# Parameters:
+#   task - (gene index, game number, gene, opponent author, genetic plays first)
+#
+# Return: (gene index, game number, score, state seen at the first move)
+##
+def playGeneGame(task):
+    index, gameNum, gene, opponentName, geneticFirst = task
+    genetic = None
+    opponent = None
+    for player in geneWorkerGame.players:
+        if isinstance(player[0], AIPlayer) and genetic is None:
+            genetic = player[0]
+        elif player[0].author == opponentName:
+            opponent = player[0]
+
+    genetic.pool = [[gene, 0]]
+    genetic.poolIndex = 0
+    genetic.poolStates = []
+    genetic.currgenescores = []
+    genetic.numGamesPerGene = sys.maxint
+
+    if geneticFirst:
+        geneWorkerGame.playGame(genetic, opponent)
+    else:
+        geneWorkerGame.playGame(opponent, genetic)
+
+    state = None
+    if len(genetic.poolStates) > 0:
+        state = genetic.poolStates[0]
+    return (index, gameNum, genetic.currgenescores[-1], state)
@@ -2,7 +2,14 @@ import random
 from Constants import *
 from Ant import *
 from Construction import *
+from Building import Building
 from Move import *
+from Terrain import getTerrain
+from Zobrist import antKey, constrKey, foodKey, turnKey
+from RulesEngine import stampMoves
+from LRUCache import LRUCache
+from FrozenMove import freezeMove
+from Bitboard import getBitboards, NEIGHBOURS, NEIGHBOUR_CELLS, cellCoords
 
 #
 # AIPlayerUtils.py
@@ -13,9 +20,24 @@ from Move import *
 # Important Note:  All the methods in this file that take a GameState object
 # will not attempt to access the 'board' member of the at object.  This makes
 # these routines safe for a GameState that has been generated via the
-# GameState.fastclone method.
+# GameState.fastclone method.  For the same reason they also accept a
+# CompactState (see CompactState.py) wherever a GameState is expected.
 #
 
+#the most legal move lists remembered by listAllLegalMoves at once
+LEGAL_MOVE_CACHE_SIZE = 1024
+
+#the most food any build costs; having more lists the same build moves
+MAX_BUILD_COST = max([UNIT_STATS[antType][COST] for antType in (WORKER, DRONE, SOLDIER, R_SOLDIER)] +
+                     [CONSTR_STATS[TUNNEL][BUILD_COST]])
+
+#the legal move lists listed so far, keyed by getMoveListKey (see
+#listAllLegalMoves); its hits and misses show how often it pays off
+legalMoveCache = LRUCache(LEGAL_MOVE_CACHE_SIZE)
+
+#the same lists as FrozenMoves (see listAllFrozenMoves)
+frozenMoveCache = LRUCache(LEGAL_MOVE_CACHE_SIZE)
+
 ##
 # legalCoord
 #
@@ -103,6 +125,45 @@ def getConstrList(currentState,
     return result
         
 
+##
+# getCoordIndex
+#
+# builds (or returns the already built) lookup tables from coordinates to the
+# ant and the construct found there.  The tables are kept on the state and
+# are thrown away by GameState.invalidateCaches whenever an ant or construct
+# is added, removed or moved.  Like getAntAt/getConstrAt, the first match in
+# inventory order wins if two objects share a cell.
+#
+# Parameters:
+#    state  - a valid GameState object
+#
+# Return:  an (ants by coords, constrs by coords) tuple of dicts, or None if
+#   the inventories hold coordinates that can't be used as dict keys
+def getCoordIndex(state):
+    index = getattr(state, 'coordIndex', None)
+    if index is not None:
+        return index
+
+    antsByCoords = {}
+    constrsByCoords = {}
+    try:
+        for inv in state.inventories:
+            for ant in inv.ants:
+                antsByCoords.setdefault(ant.coords, ant)
+            for constr in inv.constrs:
+                constrsByCoords.setdefault(constr.coords, constr)
+    except TypeError:
+        #unhashable (e.g., list) coordinates; fall back to searching
+        return None
+    index = (antsByCoords, constrsByCoords)
+
+    #cache the index on the state if it will take it
+    try:
+        state.coordIndex = index
+    except AttributeError:
+        pass
+    return index
+
 ##
 # getConstrAt
 #
@@ -114,6 +175,13 @@ def getConstrList(currentState,
 #
 # Return:  the construct at the coordinate or None if there is none
 def getConstrAt(state, coords):
+    index = getCoordIndex(state)
+    if index is not None:
+        try:
+            return index[1].get(coords)
+        except TypeError:
+            pass  #unhashable coords can't match a tuple; search as before
+
     #get a list of all constructs
     allConstrs = getConstrList(state)
 
@@ -135,6 +203,13 @@ def getConstrAt(state, coords):
 #
 # Return:  the ant at the coordinate or None if there is none
 def getAntAt(state, coords):
+    index = getCoordIndex(state)
+    if index is not None:
+        try:
+            return index[0].get(coords)
+        except TypeError:
+            pass  #unhashable coords can't match a tuple; search as before
+
     #get a list of all constructs
     allAnts = getAntList(state)
 
@@ -189,23 +264,48 @@ def listAdjacent(coord):
 #    coords       - where the ant is
 #    movement     - movement points the ant has
 #
+# The cells are picked out of getReachableAdjacentMask's bitboard, in the
+# order of listAdjacent.
+#
 # Return:  a list of coords (tuples)   
 def listReachableAdjacent(state, coords, movement):
-    #build a list of all adjacent cells
-    oneStep = listAdjacent(coords)
+    mask = getReachableAdjacentMask(state, coords, movement)
+    if (mask == 0):
+        return []
+    return [cellCoords(cell) for cell in NEIGHBOUR_CELLS[coords[0] * BOARD_LENGTH + coords[1]]
+            if mask >> cell & 1]
 
-    #winnow the list based upon cell contents and cost to reach
-    candMoves = []
-    for cell in oneStep:
-        ant = getAntAt(state, cell)
-        constr = getConstrAt(state, cell)
-        moveCost = 1  #default cost
-        if (constr != None):
-            moveCost = CONSTR_STATS[constr.type][MOVE_COST]
-        if (ant == None) and (moveCost <= movement):
-            candMoves.append(cell)
+##
+# getAdjacentMask
+#
+# the bitboard form of listAdjacent (see Bitboard.py)
+#
+# Parameters:
+#     coord    - a tuple containing a valid x,y coordinate
+#
+# Return: the set of legal cells that are adjacent to the given space (int),
+#   which is empty for an illegal coord
+def getAdjacentMask(coord):
+    if (not legalCoord(coord)):
+        return 0
+    return NEIGHBOURS[coord[0] * BOARD_LENGTH + coord[1]]
 
-    return candMoves
+##
+# getReachableAdjacentMask
+#
+# the bitboard form of listReachableAdjacent: the adjacent cells that have no
+# ant on them and don't cost more than the ant's movement points.
+#
+# Parameters:
+#    state        - a GameState object 
+#    coords       - where the ant is
+#    movement     - movement points the ant has
+#
+# Return:  the set of cells (int)
+def getReachableAdjacentMask(state, coords, movement):
+    if (not legalCoord(coords)):
+        return 0
+    return getBitboards(state).reachableAdjacent(coords, movement)
 
 ##
 # listAllMovementPaths              <!-- RECURSIVE -->
@@ -260,6 +360,92 @@ def listAllMovementPaths(currentState, coords, movement):
     return validMoves
 
 
+##
+# iterCanonicalPaths
+#
+# generates one path for each cell a single ant could move to from a given
+# position.  The destinations are the same as those of listAllMovementPaths,
+# but instead of every distinct path to every destination only the cheapest
+# path found to each one is produced (and the zero-step path once, last).
+# The cells are explored in order of movement cost so no recursion is needed.
+# Like listAllMovementPaths, queen ant movement restrictions are not taken
+# into account.
+#
+# Paths are yielded as soon as they are known, so callers that only need a
+# few can stop early.
+#
+# Parameters:
+#    currentState - current game state
+#    coords       - where the ant is
+#    movement     - movement points ant has remaining
+#
+# Yields: lists of coords (tuples) that are acceptable for a Move object
+def iterCanonicalPaths(currentState, coords, movement):
+    #base case: ant can't move any further
+    if (movement <= 0): return
+
+    #look cells up in the coordinate index directly when there is one
+    index = getCoordIndex(currentState)
+    if index != None:
+        antAt = index[0].get
+        constrAt = index[1].get
+    else:
+        antAt = lambda cell: getAntAt(currentState, cell)
+        constrAt = lambda cell: getConstrAt(currentState, cell)
+
+    #cheapest known cost and path to each cell seen so far
+    bestCost = { coords : 0 }
+    bestPath = { coords : [coords] }
+    #cells waiting to be expanded, bucketed by the cost to reach them
+    buckets = [[] for i in xrange(0, movement + 1)]
+    buckets[0].append(coords)
+
+    for spent in xrange(0, movement + 1):
+        for cell in buckets[spent]:
+            #skip cells that were reached more cheaply after being queued
+            if (bestCost[cell] != spent): continue
+            path = bestPath[cell]
+
+            #see which adjacent cells can be reached from this one
+            x = cell[0]
+            y = cell[1]
+            for newCell in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (0 <= newCell[0] < BOARD_LENGTH and 0 <= newCell[1] < BOARD_LENGTH): continue
+                if (antAt(newCell) != None): continue
+                constr = constrAt(newCell)
+                cost = spent + 1   #default
+                if constr != None:
+                    cost = spent + CONSTR_STATS[constr.type][MOVE_COST]
+                if (cost > movement): continue
+                if (cost < bestCost.get(newCell, cost + 1)):
+                    bestCost[newCell] = cost
+                    bestPath[newCell] = path + [newCell]
+                    buckets[cost].append(newCell)
+
+            #the paths extending this one have been built, so it is safe to
+            #hand it out now
+            if (cell != coords):
+                yield path
+
+    #the zero-step move (used to activate attack on adjacent foe)
+    yield [coords]
+
+##
+# listAllCanonicalPaths
+#
+# the list form of iterCanonicalPaths: one legal path for each destination a
+# single ant could reach from a given position.
+#
+# Parameters:
+#    currentState - current game state
+#    coords       - where the ant is
+#    movement     - movement points ant has remaining
+#
+# Return: a list of lists of coords (tuples)
+def listAllCanonicalPaths(currentState, coords, movement):
+    return list(iterCanonicalPaths(currentState, coords, movement))
+
+
 ##
 # stepsToReach
 #
@@ -277,41 +463,9 @@ def stepsToReach(currentState, src, dst):
     if (not legalCoord(src)): return -1
     if (not legalCoord(dst)): return -1
 
-    #a dictionary of already visted cells and the corresponding cost to reach
-    visited = { src : 0 }
-    #a list of to be processed cells
-    queue = [ src ]
-
-    #this loops processes cells in the queue until it is empty
-    while(len(queue) > 0):
-        cell = queue.pop(0)
-
-        #if this cell is our destination we are done
-        if (cell == dst):
-            return visited[cell]
-
-        #calc distance to all cells adj to this one assuming we reach them
-        #from this one
-        nextSteps = listAdjacent(cell)
-        for newCell in nextSteps:
-            constrAtDest = getConstrAt(currentState, newCell)
-            cost = 1  #default
-            if constrAtDest != None:
-                cost = CONSTR_STATS[constrAtDest.type][MOVE_COST]
-            dist = visited[cell] + cost
-
-            #if the new distance is best so far, update the visited dict
-            if (visited.has_key(newCell)):
-                if (dist < visited[newCell]):
-                    visited[newCell] = dist
-            #if we've never seen this cell before also update dict and
-            #enqueue this new cell to be processed at a future loop iteration
-            else:
-                visited[newCell] = dist
-                queue.append(newCell)
-
-    #we should never reach this point
-    return -1
+    #the distances are kept in a table shared by every state with the same
+    #layout of grass and other constructs (see Terrain.py)
+    return getTerrain(currentState).stepsToReach(src, dst)
 
 ##
 # approxDist
@@ -342,6 +496,7 @@ def approxDist(sourceCoords, targetCoords):
 # Return the required path
 #
 def createPathToward(currentState, sourceCoords, targetCoords, movement):
+    terrain = getTerrain(currentState)
     distToTarget = approxDist(sourceCoords, targetCoords)
     path = [sourceCoords]
     curr = sourceCoords
@@ -354,10 +509,7 @@ def createPathToward(currentState, sourceCoords, targetCoords, movement):
             if (approxDist(coord, targetCoords) < distToTarget):
 
                 #how much movement does it cost to get there?
-                constr = getConstrAt(currentState, coord)
-                moveCost = 1  #default cost
-                if (constr != None):
-                    moveCost = CONSTR_STATS[constr.type][MOVE_COST]
+                moveCost = terrain.getMoveCost(coord)
                 #if I have enough movement left then add it to the path
                 if (moveCost <= movement):
                     #add the step to the path
@@ -402,24 +554,13 @@ def listAllBuildMoves(currentState):
                 
     #for each worker ant that is a legal position, you could build
     #a tunnel
+    boards = getBitboards(currentState)
     for ant in myInv.ants:
         if (ant.type != WORKER): continue   #only workers can build tunnels
         if (ant.hasMoved): continue         #this worker has already moved
         if (getConstrAt(currentState, ant.coords) == None):
-            #see if there is adj food
-            inTheClear = True   #assume ok to build until proven otherwise
-            for coord in listAdjacent(ant.coords):
-                if (not legalCoord((coord[0],coord[1]))):
-                    continue
-
-                #is there food here?
-                constrHere = getConstrAt(currentState, coord)
-                if (constrHere != None) and (constrHere.type == FOOD):
-                    inTheClear = False
-                    break
-
-            #if no food was found then building a tunnel is valid
-            if inTheClear:
+            #building a tunnel is valid if there is no adj food
+            if not (legalCoord(ant.coords) and boards.isFoodAdjacent(ant.coords)):
                 result.append(Move(BUILD, [ant.coords], TUNNEL))
 
     return result
@@ -451,11 +592,18 @@ def isPathOkForQueen(path):
 #
 # Parameters:
 #   currentState - the current state
+#   canonical - if True, only list one path to each destination (see
+#               iterCanonicalPaths) instead of every distinct path
 #
 # Returns:  a list of Move objects
-def listAllMovementMoves(currentState):
+def listAllMovementMoves(currentState, canonical = False):
     result = []
 
+    #pick the path generator
+    listPaths = listAllMovementPaths
+    if canonical:
+        listPaths = listAllCanonicalPaths
+
     #first get all MOVE_ANT moves for each ant in the inventory
     myInv = getCurrPlayerInventory(currentState)
     for ant in myInv.ants:
@@ -463,9 +611,9 @@ def listAllMovementMoves(currentState):
         if (ant.hasMoved): continue
 
         #create a Move object for each valid movement path
-        allPaths = listAllMovementPaths(currentState,
-                                        ant.coords,
-                                        UNIT_STATS[ant.type][MOVEMENT])
+        allPaths = listPaths(currentState,
+                             ant.coords,
+                             UNIT_STATS[ant.type][MOVEMENT])
 
         #remove moves that take the queen out of her territory
         if (ant.type == QUEEN):
@@ -490,14 +638,93 @@ def listAllMovementMoves(currentState):
 #
 # Parameters:
 #   currentState - the current state
+#   canonical - if True, only list one MOVE_ANT move to each destination
+#               of each ant (see iterCanonicalPaths)
+#
+# The lists are remembered (see getMoveListKey), so the Move objects in them
+# are shared by every position with the same moves and must not be changed.
+# The list itself is the caller's own.
 #
 # Returns:  a list of Move objects
-def listAllLegalMoves(currentState):
-    result = []
-    result.extend(listAllMovementMoves(currentState))
-    result.extend(listAllBuildMoves(currentState))
-    result.append(Move(END, None, None))
-    return result
+def listAllLegalMoves(currentState, canonical = False):
+    key = getMoveListKey(currentState, canonical)
+    moves = None
+    if key is not None:
+        moves = legalMoveCache.get(key)
+    if moves is None:
+        moves = []
+        moves.extend(listAllMovementMoves(currentState, canonical))
+        moves.extend(listAllBuildMoves(currentState))
+        moves.append(Move(END, None, None))
+        if key is not None:
+            legalMoveCache.put(key, moves)
+
+    #moves listed for a state the game handed out may skip its checks
+    if getattr(currentState, 'moveToken', None) != None:
+        stampMoves(currentState, moves)
+    return list(moves)
+
+##
+# listAllFrozenMoves
+#
+# the same moves as listAllLegalMoves, as FrozenMoves (see FrozenMove.py).
+# These can be used as dict keys and read like Moves by getNextState and
+# the like, and the lists are remembered the same way, so for a position
+# whose moves were listed before nothing at all is made.  They are not
+# stamped, so one chosen by an AI must be turned back into a Move from
+# listAllLegalMoves for the game to skip its checks.
+#
+# Parameters:
+#   currentState - the current state
+#   canonical - as for listAllLegalMoves
+#
+# Returns:  a tuple of FrozenMove objects, which may be shared
+def listAllFrozenMoves(currentState, canonical = False):
+    key = getMoveListKey(currentState, canonical)
+    moves = None
+    if key is not None:
+        moves = frozenMoveCache.get(key)
+    if moves is None:
+        moves = []
+        moves.extend(listAllMovementMoves(currentState, canonical))
+        moves.extend(listAllBuildMoves(currentState))
+        moves.append(Move(END, None, None))
+        #the generators only make moves that can be coded
+        moves = tuple([freezeMove(move, False) for move in moves])
+        if key is not None:
+            frozenMoveCache.put(key, moves)
+    return moves
+
+##
+# getMoveListKey
+#
+# the key listAllLegalMoves remembers a state's moves by.  It holds only what
+# the move generators look at: the current player's ants (where, what, and
+# whether they have moved), where everyone else's ants are, every
+# construction, the current player's anthill and as much of their food as
+# any build costs.
+#
+# Parameters:
+#   currentState - the current state
+#   canonical - as for listAllLegalMoves
+#
+# Returns: the key (tuple), or None for a state whose coordinates can't be
+#   used in one
+def getMoveListKey(currentState, canonical):
+    myInv = getCurrPlayerInventory(currentState)
+    myAnts = tuple([(ant.coords, ant.type, ant.hasMoved) for ant in myInv.ants])
+    otherAnts = tuple([ant.coords for inv in currentState.inventories if inv is not myInv
+                                  for ant in inv.ants])
+    constrs = tuple([(constr.coords, constr.type) for inv in currentState.inventories
+                                                  for constr in inv.constrs])
+    key = (canonical, myAnts, otherAnts, constrs, myInv.getAnthill().coords,
+           min(myInv.foodCount, MAX_BUILD_COST))
+    try:
+        hash(key)
+    except TypeError:
+        #e.g., list coordinates
+        return None
+    return key
 
 
 
@@ -569,11 +796,135 @@ def getEnemyInv(self, currentState):
 # Return: A clone of what the state would look like if the move was made
 ##
 def getNextState(currentState, move):
-    # variables I will need
     myGameState = currentState.fastclone()
+    #a hashed state passes its hash on to be updated (see Zobrist.py)
+    myGameState.zobrist = getattr(currentState, 'zobrist', None)
+    applyNextState(myGameState, move, None)
+    return myGameState
+
+##
+# getNextStateAdversarial
+#
+# Description: This is the same as getNextState (above) except that it properly
+# updates the hasMoved property on ants and the END move is processed correctly.
+#
+# Parameters:
+#   currentState - A clone of the current state (GameState)
+#   move - The move that the agent would take (Move)
+#
+# Return: A clone of what the state would look like if the move was made
+##
+def getNextStateAdversarial(currentState, move):
+    nextState = currentState.fastclone()
+    #a hashed state passes its hash on to be updated (see Zobrist.py)
+    nextState.zobrist = getattr(currentState, 'zobrist', None)
+    applyNextStateAdversarial(nextState, move, None)
+    return nextState
+
+#Kinds of entries in a makeMove undo record
+UNDO_ATTR = 0     #(UNDO_ATTR, object, attribute name, old value)
+UNDO_APPEND = 1   #(UNDO_APPEND, list)
+UNDO_REMOVE = 2   #(UNDO_REMOVE, list, index, removed item)
+
+##
+# makeMove
+#
+# Description: Applies a move to the given state *in place*, exactly as
+# getNextStateAdversarial would, and returns a record of every change made.
+# Passing that record to unmakeMove restores the state.  This lets a tree
+# search walk deep lines on a single state instead of allocating a full clone
+# for every node.
+#
+# As with getNextState, only the inventories are modified, so the state should
+# be one produced by GameState.fastclone (its board, if any, is not updated).
+#
+# Parameters:
+#   currentState - the state to modify (GameState)
+#   move - The move that the agent would take (Move)
+#
+# Return: the undo record for unmakeMove (list)
+##
+def makeMove(currentState, move):
+    #the hash (if any) is updated along with the state, so remember it first
+    undoLog = [(UNDO_ATTR, currentState, 'zobrist', getattr(currentState, 'zobrist', None))]
+    applyNextStateAdversarial(currentState, move, undoLog)
+    return undoLog
+
+##
+# unmakeMove
+#
+# Description: Reverts the changes recorded by makeMove.  Moves must be
+# unmade in the reverse of the order they were made.
+#
+# Parameters:
+#   currentState - the state that was passed to makeMove (GameState)
+#   undoLog - the record returned by makeMove (list)
+##
+def unmakeMove(currentState, undoLog):
+    if len(undoLog) > 0:
+        currentState.invalidateCaches()
+    for entry in reversed(undoLog):
+        if entry[0] == UNDO_ATTR:
+            setattr(entry[1], entry[2], entry[3])
+        elif entry[0] == UNDO_APPEND:
+            entry[1].pop()
+        else: #UNDO_REMOVE
+            entry[1].insert(entry[2], entry[3])
+
+##
+# setLogged
+#
+# sets an attribute, first recording its old value in the undo log (if any)
+# (helper for applyNextState)
+def setLogged(obj, name, value, undoLog):
+    if undoLog is not None:
+        undoLog.append((UNDO_ATTR, obj, name, getattr(obj, name)))
+    setattr(obj, name, value)
+
+##
+# appendLogged
+#
+# appends to a list, recording the append in the undo log (if any)
+# (helper for applyNextState)
+def appendLogged(lst, item, undoLog):
+    if undoLog is not None:
+        undoLog.append((UNDO_APPEND, lst))
+    lst.append(item)
+
+##
+# removeLogged
+#
+# removes an item from a list, recording where it was in the undo log (if any)
+# (helper for applyNextState)
+def removeLogged(lst, item, undoLog):
+    index = lst.index(item)
+    if undoLog is not None:
+        undoLog.append((UNDO_REMOVE, lst, index, item))
+    del lst[index]
+
+##
+# applyNextState
+#
+# Description: modifies the given state in place to reflect a move, following
+# the rules described for getNextState.  If the state has a Zobrist hash it is
+# updated to match (each changed object is XORed out before it changes and
+# back in afterwards).
+#
+# Parameters:
+#   myGameState - the state to modify (GameState)
+#   move - The move that the agent would take (Move)
+#   undoLog - a list to record changes in for unmakeMove, or None
+##
+def applyNextState(myGameState, move, undoLog):
+    # variables I will need
     myInv = getCurrPlayerInventory(myGameState)
     me = myGameState.whoseTurn
     myAnts = myInv.ants
+    hashed = getattr(myGameState, 'zobrist', None) != None
+
+    # my food count may change below; it is hashed back in at the end
+    if hashed:
+        myGameState.zobrist ^= foodKey(myInv.player, myInv.foodCount)
 
     # If enemy ant is on my anthill or tunnel update capture health
     myTunnels = myInv.getTunnels()
@@ -583,33 +934,47 @@ def getNextState(currentState, move):
         if ant is not None:
             opponentsAnts = myGameState.inventories[not me].ants
             if ant in opponentsAnts:
-                myTunnel.captureHealth -= 1
+                if hashed:
+                    myGameState.zobrist ^= constrKey(myTunnel, myInv.player)
+                setLogged(myTunnel, 'captureHealth', myTunnel.captureHealth - 1, undoLog)
+                if hashed:
+                    myGameState.zobrist ^= constrKey(myTunnel, myInv.player)
     if getAntAt(myGameState, myAntHill.coords) is not None:
         ant = getAntAt(myGameState, myAntHill.coords)
         opponentsAnts = myGameState.inventories[not me].ants
         if ant in opponentsAnts:
-            myAntHill.captureHealth -= 1
+            if hashed:
+                myGameState.zobrist ^= constrKey(myAntHill, myInv.player)
+            setLogged(myAntHill, 'captureHealth', myAntHill.captureHealth - 1, undoLog)
+            if hashed:
+                myGameState.zobrist ^= constrKey(myAntHill, myInv.player)
 
     # If an ant is built update list of ants
     antTypes = [WORKER, DRONE, SOLDIER, R_SOLDIER]
     if move.moveType == BUILD:
         if move.buildType in antTypes:
             ant = Ant(myInv.getAnthill().coords, move.buildType, me)
-            myInv.ants.append(ant)
+            appendLogged(myInv.ants, ant, undoLog)
+            myGameState.invalidateCaches()
+            if hashed:
+                myGameState.zobrist ^= antKey(ant)
             # Update food count depending on ant built
             if move.buildType == WORKER:
-                myInv.foodCount -= 1
+                setLogged(myInv, 'foodCount', myInv.foodCount - 1, undoLog)
             elif move.buildType == DRONE or move.buildType == R_SOLDIER:
-                myInv.foodCount -= 2
+                setLogged(myInv, 'foodCount', myInv.foodCount - 2, undoLog)
             elif move.buildType == SOLDIER:
-                myInv.foodCount -= 3
+                setLogged(myInv, 'foodCount', myInv.foodCount - 3, undoLog)
 
     # If a building is built update list of buildings and the update food count
     if move.moveType == BUILD:
         if move.buildType == TUNNEL:
-            building = Construction(move.coordList[0], move.buildType)
-            myInv.constrs.append(building)
-            myInv.foodCount -= 3
+            building = Building(move.coordList[0], TUNNEL, me)
+            appendLogged(myInv.constrs, building, undoLog)
+            myGameState.invalidateCaches()
+            if hashed:
+                myGameState.zobrist ^= constrKey(building, myInv.player)
+            setLogged(myInv, 'foodCount', myInv.foodCount - 3, undoLog)
 
     # If an ant is moved update their coordinates and has moved
     if move.moveType == MOVE_ANT:
@@ -617,69 +982,91 @@ def getNextState(currentState, move):
         startingCoord = move.coordList[0]
         for ant in myAnts:
             if ant.coords == startingCoord:
-                ant.coords = newCoord
-                ant.hasMoved = False
+                if hashed:
+                    myGameState.zobrist ^= antKey(ant)
+                setLogged(ant, 'coords', newCoord, undoLog)
+                myGameState.invalidateCaches()
+                setLogged(ant, 'hasMoved', False, undoLog)
                 # If an ant is carrying food and ends on the anthill or tunnel drop the food
                 if ant.carrying and ant.coords == myInv.getAnthill().coords:
-                    myInv.foodCount += 1
-                    ant.carrying = False
+                    setLogged(myInv, 'foodCount', myInv.foodCount + 1, undoLog)
+                    setLogged(ant, 'carrying', False, undoLog)
                 for tunnels in myTunnels:
                     if ant.carrying and (ant.coords == tunnels.coords):
-                        myInv.foodCount += 1
-                        ant.carrying = False
+                        setLogged(myInv, 'foodCount', myInv.foodCount + 1, undoLog)
+                        setLogged(ant, 'carrying', False, undoLog)
                 # If an ant doesn't have food and ends on the food grab food
                 if not ant.carrying:
                     foods = getConstrList(myGameState, None, (FOOD,))
                     for food in foods:
                         if food.coords == ant.coords:
-                            ant.carrying = True
+                            setLogged(ant, 'carrying', True, undoLog)
+                if hashed:
+                    myGameState.zobrist ^= antKey(ant)
                 # If my ant is close to an enemy ant attack it
                 adjacentTiles = listAdjacent(ant.coords)
                 for adj in adjacentTiles:
                     if getAntAt(myGameState, adj) is not None:  # If ant is adjacent my ant
                         closeAnt = getAntAt(myGameState, adj)
                         if closeAnt.player != me:  # if the ant is not me
-                            closeAnt.health = closeAnt.health - UNIT_STATS[ant.type][ATTACK]  # attack
+                            if hashed:
+                                myGameState.zobrist ^= antKey(closeAnt)
+                            setLogged(closeAnt, 'health', closeAnt.health - UNIT_STATS[ant.type][ATTACK], undoLog)  # attack
                             # If an enemy is attacked and looses all its health remove it from the other players
                             # inventory
                             if closeAnt.health <= 0:
                                 enemyAnts = myGameState.inventories[not me].ants
                                 for enemy in enemyAnts:
                                     if closeAnt.coords == enemy.coords:
-                                        myGameState.inventories[not me].ants.remove(enemy)
+                                        removeLogged(enemyAnts, enemy, undoLog)
+                                myGameState.invalidateCaches()
+                            elif hashed:
+                                myGameState.zobrist ^= antKey(closeAnt)
                             # If attacked an ant already don't attack any more
                             break
-    return myGameState
+
+    if hashed:
+        myGameState.zobrist ^= foodKey(myInv.player, myInv.foodCount)
 
 ##
-# getNextStateAdversarial
+# applyNextStateAdversarial
 #
-# Description: This is the same as getNextState (above) except that it properly
-# updates the hasMoved property on ants and the END move is processed correctly.
+# Description: modifies the given state in place to reflect a move, following
+# the rules described for getNextStateAdversarial.
 #
 # Parameters:
-#   currentState - A clone of the current state (GameState)
+#   nextState - the state to modify (GameState)
 #   move - The move that the agent would take (Move)
-#
-# Return: A clone of what the state would look like if the move was made
+#   undoLog - a list to record changes in for unmakeMove, or None
 ##
-def getNextStateAdversarial(currentState, move):
+def applyNextStateAdversarial(nextState, move, undoLog):
     # variables I will need
-    nextState = getNextState(currentState, move)
+    whoseTurn = nextState.whoseTurn
+    applyNextState(nextState, move, undoLog)
     myInv = getCurrPlayerInventory(nextState)
     myAnts = myInv.ants
+    hashed = getattr(nextState, 'zobrist', None) != None
 
     # If an ant is moved update their coordinates and has moved
     if move.moveType == MOVE_ANT:
         startingCoord = move.coordList[0]
         for ant in myAnts:
             if ant.coords == startingCoord:
-                ant.hasMoved = True
+                if hashed:
+                    nextState.zobrist ^= antKey(ant)
+                setLogged(ant, 'hasMoved', True, undoLog)
+                if hashed:
+                    nextState.zobrist ^= antKey(ant)
     elif move.moveType == END:
         for ant in myAnts:
-            ant.hasMoved = False
-        nextState.whoseTurn = 1 - currentState.whoseTurn;
-    return nextState
+            if hashed:
+                nextState.zobrist ^= antKey(ant)
+            setLogged(ant, 'hasMoved', False, undoLog)
+            if hashed:
+                nextState.zobrist ^= antKey(ant)
+        setLogged(nextState, 'whoseTurn', 1 - whoseTurn, undoLog)
+        if hashed:
+            nextState.zobrist ^= turnKey(whoseTurn) ^ turnKey(1 - whoseTurn)
 
     
 ##
@@ -0,0 +1,388 @@
+import sys, time, gc, json, platform
+from Constants import *
+from GameState import GameState
+from AIPlayerUtils import *
+from HeadlessGame import HeadlessGame
+import RulesEngine
+import AIPlayerUtils
+from FrozenMove import freezeMove
+from Bitboard import Bitboards
+
+##
+# Benchmark.py
+#
+# Timing harness for the engine's hot paths.  Positions are sampled from
+# seeded headless games so that every run measures the same work.  Each
+# benchmark reports calls per second and the allocations each call leaves
+# behind, and the results can be saved as a JSON baseline to compare later
+# runs against.
+#
+# Usage:  python Benchmark.py [-time <seconds>] [-save <file>] [-compare <file>]
+#   -time     seconds to spend on each benchmark (default 1)
+#   -save     write the results to a baseline file
+#   -compare  report each result against a saved baseline
+##
+
+#the master seed of the games the positions are sampled from
+BENCH_SEED = 421
+#how many positions to sample
+BENCH_POSITIONS = 40
+#seconds to spend timing each benchmark
+BENCH_TIME = 1.0
+#a benchmark this much slower than its baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+##
+# samplePositions
+#
+# Description: plays seeded headless games and collects the states handed to
+# the AIs' getMove calls.
+#
+# Parameters:
+#   numPositions - how many positions to collect (int)
+#   seed - the master seed of the games (int)
+#   aiNames - the authors of the two AIs to play
+#
+# Return: a list of GameStates (with boards) in the order they were seen
+##
+def samplePositions(numPositions, seed = BENCH_SEED, aiNames = ("Random", "Booger")):
+    game = HeadlessGame()
+    game.masterSeed = seed
+    game.selectAIs(aiNames)
+    game.submitClickedCallback()
+    players = [entry[0] for entry in game.players]
+
+    positions = []
+    #record the state seen by each player before handing it on
+    for player in players:
+        def recordingGetMove(currentState, getMove = player.getMove):
+            positions.append(currentState)
+            return getMove(currentState)
+        player.getMove = recordingGetMove
+
+    gameNum = 0
+    while len(positions) < numPositions:
+        game.playGame(players[gameNum % 2], players[(gameNum + 1) % 2])
+        gameNum += 1
+
+    #play phase positions only, spread evenly over everything that was seen
+    stride = max(1, len(positions) / numPositions)
+    return positions[::stride][:numPositions]
+
+##
+# countNodesClone
+#
+# Description: depth-limited walk of the game tree that allocates a new state
+# per node with getNextStateAdversarial.
+#
+# Return: the number of nodes visited (int)
+##
+def countNodesClone(state, depth):
+    if depth == 0:
+        return 1
+    nodes = 1
+    for move in listAllLegalMoves(state):
+        nodes += countNodesClone(getNextStateAdversarial(state, move), depth - 1)
+    return nodes
+
+##
+# countNodesMakeMove
+#
+# Description: the same walk as countNodesClone, but on a single state using
+# makeMove/unmakeMove.
+#
+# Return: the number of nodes visited (int)
+##
+def countNodesMakeMove(state, depth):
+    if depth == 0:
+        return 1
+    nodes = 1
+    for move in listAllLegalMoves(state):
+        undoLog = makeMove(state, move)
+        nodes += countNodesMakeMove(state, depth - 1)
+        unmakeMove(state, undoLog)
+    return nodes
+
+##
+# timeCalls
+#
+# Description: calls a function on each set of arguments in turn, over and
+# over, until the time is up
+#
+# Parameters:
+#   func - the function to time
+#   inputs - the arguments of each call (tuple[])
+#   minTime - seconds to keep calling for (float)
+#
+# Return: calls per second (float)
+##
+def timeCalls(func, inputs, minTime = BENCH_TIME):
+    calls = 0
+    start = time.time()
+    while True:
+        for args in inputs:
+            func(*args)
+        calls += len(inputs)
+        elapsed = time.time() - start
+        if elapsed >= minTime:
+            return calls / elapsed
+
+##
+# countAllocations
+#
+# Description: calls a function once on each set of arguments, keeping the
+# results, and counts the objects the calls left allocated.  Only objects the
+# garbage collector tracks (lists, dicts, class instances, ...) are counted,
+# and temporaries freed before a call returns cancel out, so this is the
+# allocation each call hands back to its caller (or leaks).
+#
+# Parameters:
+#   func - the function to measure
+#   inputs - the arguments of each call (tuple[])
+#
+# Return: objects allocated per call (float)
+##
+def countAllocations(func, inputs):
+    gc.collect()
+    wasEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        results = []
+        before = gc.get_count()[0]
+        for args in inputs:
+            results.append(func(*args))
+        after = gc.get_count()[0]
+    finally:
+        if wasEnabled:
+            gc.enable()
+    return float(after - before) / len(inputs)
+
+##
+# uncached
+#
+# Description: wraps a function so that the legal move lists remembered by
+# AIPlayerUtils are forgotten before every call.  The suite calls each
+# benchmark on the same few positions again and again, so otherwise anything
+# that lists moves would only ever be timed on cache hits.
+#
+# Parameters:
+#   func - the function to wrap
+#
+# Return: the wrapped function
+##
+def uncached(func):
+    def call(*args):
+        AIPlayerUtils.legalMoveCache.clear()
+        AIPlayerUtils.frozenMoveCache.clear()
+        return func(*args)
+    return call
+
+##
+# flipped
+#
+# Description: a flipBoard call for benchmarking.  Flipping twice restores the
+# state, so the same copies can be flipped again and again.
+##
+def flipped(state):
+    state.flipBoard()
+    return state
+
+##
+# buildSuite
+#
+# Description: lists the benchmarks and the arguments each one is called with
+#
+# Parameters:
+#   positions - the sampled states (GameState[])
+#
+# Return: a list of (name, function, inputs) tuples
+##
+def buildSuite(positions):
+    states = [(position,) for position in positions]
+
+    #every ant of the player to move, and the way to the enemy anthill
+    antPaths = []
+    antSteps = []
+    for position in positions:
+        enemyHill = getConstrList(position, 1 - position.whoseTurn, (ANTHILL,))[0].coords
+        for ant in getAntList(position, position.whoseTurn):
+            movement = UNIT_STATS[ant.type][MOVEMENT]
+            antPaths.append((position, ant.coords, movement))
+            antSteps.append((position, ant.coords, enemyHill))
+
+    #a spread of the legal moves from each position
+    stateMoves = []
+    for position in positions:
+        moves = listAllLegalMoves(position)
+        for move in moves[::max(1, len(moves) / 5)]:
+            stateMoves.append((position, move))
+
+    #the engine's own check runs on its state, so point it at each position
+    game = HeadlessGame()
+    def validate(state, move):
+        game.state = state
+        return game.isValidMove(move)
+
+    #games from the same seeded start as the sampled positions
+    gameRunner = HeadlessGame()
+    gameRunner.masterSeed = BENCH_SEED
+    gameRunner.selectAIs(("Random", "Booger"))
+    gameRunner.submitClickedCallback()
+    players = [entry[0] for entry in gameRunner.players]
+    def playGame():
+        gameRunner.gameNumber = 0
+        return gameRunner.playGame(players[0], players[1])
+
+    return [
+        ("GameState.clone", GameState.clone, states),
+        ("GameState.fastclone", GameState.fastclone, states),
+        ("GameState.flipBoard", flipped, [(position.clone(),) for position in positions]),
+        ("listAllLegalMoves", uncached(listAllLegalMoves), states),
+        ("listAllLegalMoves.cached", listAllLegalMoves, states),
+        ("listAllFrozenMoves", uncached(listAllFrozenMoves), states),
+        ("listAllFrozenMoves.cached", listAllFrozenMoves, states),
+        ("freezeMove", freezeMove, [(move,) for position, move in stateMoves]),
+        ("listAllMovementPaths", listAllMovementPaths, antPaths),
+        ("Bitboards", Bitboards, states),
+        ("stepsToReach", stepsToReach, antSteps),
+        ("getNextState", getNextState, stateMoves),
+        ("getNextStateAdversarial", getNextStateAdversarial, stateMoves),
+        ("Game.isValidMove", validate, stateMoves),
+        ("RulesEngine.nextState", RulesEngine.nextState, stateMoves),
+        ("HeadlessGame.playGame", uncached(playGame), [()]),
+        ("treeWalk.fastclone", uncached(countNodesClone), [(position, 2) for position in positions[::4]]),
+        ("treeWalk.makeMove", uncached(countNodesMakeMove), [(position.fastclone(), 2) for position in positions[::4]]),
+    ]
+
+##
+# runSuite
+#
+# Description: times every benchmark and counts its allocations
+#
+# Parameters:
+#   positions - the sampled states (GameState[])
+#   minTime - seconds to spend timing each benchmark (float)
+#
+# Return: a dict of {name: {"opsPerSec": float, "allocsPerOp": float}}
+##
+def runSuite(positions, minTime = BENCH_TIME):
+    results = {}
+    for name, func, inputs in buildSuite(positions):
+        #warm up the states' caches (and the move caches, for the benchmarks
+        #that keep them) so that counting and timing see the same calls
+        for args in inputs:
+            func(*args)
+        allocs = countAllocations(func, inputs)
+        results[name] = {"opsPerSec": timeCalls(func, inputs, minTime), "allocsPerOp": allocs}
+    return results
+
+##
+# printResults
+#
+# Description: prints the results, and how each compares to a baseline.  A
+# benchmark is marked SLOWER if it lost more than REGRESSION_THRESHOLD of its
+# speed, and MORE ALLOCS if its calls leave more objects allocated.
+#
+# Parameters:
+#   results - what runSuite returned
+#   baseline - the results of an earlier run, or None
+##
+def printResults(results, baseline = None):
+    print "%-26s %14s %12s %10s" % ("Benchmark", "ops/s", "allocs/op", "vs. base")
+    for name in sorted(results.keys()):
+        result = results[name]
+        change = ""
+        if baseline != None and name in baseline:
+            ratio = result["opsPerSec"] / baseline[name]["opsPerSec"]
+            change = "%+.1f%%" % ((ratio - 1) * 100)
+            if ratio < 1 - REGRESSION_THRESHOLD:
+                change += " SLOWER"
+            #the allocation counts don't vary from run to run, so any growth counts
+            if result["allocsPerOp"] > baseline[name]["allocsPerOp"] + 0.5:
+                change += " MORE ALLOCS"
+        print "%-26s %14.1f %12.1f %10s" % (name, result["opsPerSec"], result["allocsPerOp"], change)
+
+##
+# saveBaseline
+#
+# Description: writes results to a baseline file as JSON
+#
+# Parameters:
+#   path - the file to write (string)
+#   results - what runSuite returned
+##
+def saveBaseline(path, results):
+    baseline = {
+        "seed": BENCH_SEED,
+        "positions": BENCH_POSITIONS,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results}
+    f = open(path, "w")
+    try:
+        json.dump(baseline, f, indent = 2, sort_keys = True)
+    finally:
+        f.close()
+
+##
+# loadBaseline
+#
+# Description: reads the results saved by saveBaseline
+#
+# Parameters:
+#   path - the file to read (string)
+#
+# Return: the results, as runSuite returned them
+##
+def loadBaseline(path):
+    f = open(path)
+    try:
+        return json.load(f)["results"]
+    finally:
+        f.close()
+
+##
+# main
+#
+# Description: runs the suite from the command line (see the usage above)
+#
+# Parameters:
+#   argv - the command line (string[])
+#
+# Return: the exit status (int)
+##
+def main(argv):
+    minTime = BENCH_TIME
+    savePath = None
+    comparePath = None
+    index = 1
+    while index < len(argv):
+        arg = argv[index].lower()
+        if index + 1 >= len(argv) or arg not in ("-time", "-save", "-compare"):
+            print "Usage: python Benchmark.py [-time <seconds>] [-save <file>] [-compare <file>]"
+            return 1
+        if arg == "-time":
+            try:
+                minTime = float(argv[index + 1])
+            except ValueError:
+                print "ERROR: Please enter a number after -time "
+                return 1
+        elif arg == "-save":
+            savePath = argv[index + 1]
+        else:
+            comparePath = argv[index + 1]
+        index += 2
+
+    baseline = None
+    if comparePath != None:
+        baseline = loadBaseline(comparePath)
+
+    results = runSuite(samplePositions(BENCH_POSITIONS), minTime)
+    printResults(results, baseline)
+    if savePath != None:
+        saveBaseline(savePath, results)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,327 @@
+from Constants import *
+from Construction import CONSTR_STATS
+from Ant import UNIT_STATS
+
+##
+# Bitboard.py
+#
+# Sets of board cells packed into ints ("bitboards").  Bit
+# x * BOARD_LENGTH + y stands for the cell (x, y), the same cell index as
+# Terrain.py uses, so the 10x10 board fits in 100 bits and a union,
+# intersection or difference of two sets of cells is a single |, & or & ~.
+#
+# getBitboards builds the sets for a state (where the ants are, and where
+# each type of construction is) from its inventories.  Like the coordinate
+# index of AIPlayerUtils.getCoordIndex they are cached on the state and
+# dropped by GameState.invalidateCaches, so they work for board-less
+# (fastclone'd) GameStates and CompactStates too.
+#
+# Territories are given as the player sees the board (see
+# RulesEngine.isInHomeTerritory).
+##
+
+#the number of cells on the board
+NUM_CELLS = BOARD_LENGTH * BOARD_LENGTH
+
+#every cell on the board
+ALL_CELLS = (1 << NUM_CELLS) - 1
+
+##
+# cellIndex
+#
+# Description: the bit that stands for a cell
+#
+# Parameters:
+#   coords - a legal coordinate ((int, int))
+#
+# Return: the cell index (int)
+##
+def cellIndex(coords):
+    return coords[0] * BOARD_LENGTH + coords[1]
+
+##
+# cellCoords
+#
+# Description: the cell a bit stands for
+#
+# Parameters:
+#   cell - a cell index (int)
+#
+# Return: the coordinate ((int, int))
+##
+def cellCoords(cell):
+    return (cell / BOARD_LENGTH, cell % BOARD_LENGTH)
+
+##
+# rowsMask
+#
+# Description: the cells whose y coordinate is in a range
+#
+# Parameters:
+#   first - the first y coordinate (int)
+#   stop - the y coordinate to stop before (int)
+#
+# Return: the set of cells (int)
+##
+def rowsMask(first, stop):
+    mask = 0
+    for x in xrange(0, BOARD_LENGTH):
+        for y in xrange(first, stop):
+            mask |= 1 << (x * BOARD_LENGTH + y)
+    return mask
+
+#the player's own side of the board, where setup placements go
+HOME_TERRITORY = rowsMask(0, BOARD_LENGTH / 2 - 1)
+#the enemy's side of the board
+ENEMY_TERRITORY = rowsMask(BOARD_LENGTH / 2 + 1, BOARD_LENGTH)
+#the two rows in between, which the queen may not enter
+#(see AIPlayerUtils.isPathOkForQueen)
+MIDDLE_ROWS = ALL_CELLS & ~HOME_TERRITORY & ~ENEMY_TERRITORY
+
+#the cells that have a neighbour at y + 1, and those that have one at y - 1
+NOT_LAST_ROW = ALL_CELLS & ~rowsMask(BOARD_LENGTH - 1, BOARD_LENGTH)
+NOT_FIRST_ROW = ALL_CELLS & ~rowsMask(0, 1)
+
+##
+# listNeighbourCells
+#
+# Description: the cells next to a cell, in the order of
+# AIPlayerUtils.listAdjacent
+#
+# Parameters:
+#   cell - a cell index (int)
+#
+# Return: the neighbouring cell indexes (int[])
+##
+def listNeighbourCells(cell):
+    x, y = cellCoords(cell)
+    result = []
+    for newX, newY in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+        if 0 <= newX < BOARD_LENGTH and 0 <= newY < BOARD_LENGTH:
+            result.append(newX * BOARD_LENGTH + newY)
+    return result
+
+#the neighbours of each cell, by cell index, as lists and as sets
+NEIGHBOUR_CELLS = [listNeighbourCells(cell) for cell in xrange(0, NUM_CELLS)]
+NEIGHBOURS = [sum([1 << newCell for newCell in cells]) for cells in NEIGHBOUR_CELLS]
+
+#the cells within each attack range of each cell, keyed by (cell, range);
+#filled in by rangeMask as they are needed
+rangeMasks = {}
+
+##
+# spread
+#
+# Description: every cell next to a cell of a set
+#
+# Parameters:
+#   mask - the set of cells (int)
+#
+# Return: the set of their neighbours (int)
+##
+def spread(mask):
+    return (((mask >> BOARD_LENGTH) | (mask << BOARD_LENGTH)) & ALL_CELLS) \
+           | ((mask & NOT_LAST_ROW) << 1) | ((mask & NOT_FIRST_ROW) >> 1)
+
+##
+# rangeMask
+#
+# Description: the cells an ant can attack from a cell, as in
+# RulesEngine.isValidAttack
+#
+# Parameters:
+#   cell - the attacker's cell index (int)
+#   attackRange - the attacker's range (int)
+#
+# Return: the set of cells (int)
+##
+def rangeMask(cell, attackRange):
+    mask = rangeMasks.get((cell, attackRange))
+    if mask == None:
+        x, y = cellCoords(cell)
+        mask = 0
+        for other in xrange(0, NUM_CELLS):
+            otherX, otherY = cellCoords(other)
+            if other != cell and attackRange ** 2 >= (x - otherX) ** 2 + (y - otherY) ** 2:
+                mask |= 1 << other
+        rangeMasks[(cell, attackRange)] = mask
+    return mask
+
+##
+# iterCells
+#
+# Description: the cells of a set, lowest index first
+#
+# Parameters:
+#   mask - the set of cells (int)
+#
+# Yields: the cell indexes (int)
+##
+def iterCells(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+##
+# listCoords
+#
+# Description: the cells of a set as coordinates, lowest index first
+#
+# Parameters:
+#   mask - the set of cells (int)
+#
+# Return: the coordinates ((int, int)[])
+##
+def listCoords(mask):
+    return [cellCoords(cell) for cell in iterCells(mask)]
+
+##
+# countCells
+#
+# Description: the number of cells in a set
+#
+# Parameters:
+#   mask - the set of cells (int)
+#
+# Return: the count (int)
+##
+def countCells(mask):
+    return bin(mask).count("1")
+
+##
+#Bitboards
+#Description: Where everything is in one state, as sets of cells.  If two
+#   constructions share a cell, the first in inventory order counts, as with
+#   AIPlayerUtils.getConstrAt.  Coordinates off the board are left out.
+#
+#Variables:
+#   ants - the cells of each inventory's ants, by inventory index (int[])
+#   occupied - the cells with an ant on them (int)
+#   constrs - the cells with a construction on them (int)
+#   constrTypes - the cells of each type of construction, by type ({int: int})
+#   grass, food, tunnels, anthills - the cells of each type of construction (int)
+#   blocked - the cells an ant can't step onto, by its movement points;
+#             filled in by getBlocked as they are needed ({int: int})
+##
+class Bitboards(object):
+
+    ##
+    #__init__
+    #Description: Builds the bitboards of a state
+    #
+    #Parameters:
+    #   state - a GameState, a fastclone'd GameState or a CompactState
+    ##
+    def __init__(self, state):
+        self.ants = []
+        self.occupied = 0
+        self.constrs = 0
+        self.constrTypes = dict([(constrType, 0) for constrType in (ANTHILL, TUNNEL, GRASS, FOOD)])
+        for inv in state.inventories:
+            antCells = 0
+            for ant in inv.ants:
+                x, y = ant.coords
+                if 0 <= x < BOARD_LENGTH and 0 <= y < BOARD_LENGTH:
+                    antCells |= 1 << (x * BOARD_LENGTH + y)
+            self.ants.append(antCells)
+            self.occupied |= antCells
+            for constr in inv.constrs:
+                x, y = constr.coords
+                if 0 <= x < BOARD_LENGTH and 0 <= y < BOARD_LENGTH:
+                    bit = 1 << (x * BOARD_LENGTH + y)
+                    if not self.constrs & bit:
+                        self.constrs |= bit
+                        self.constrTypes[constr.type] = self.constrTypes.get(constr.type, 0) | bit
+        self.grass = self.constrTypes[GRASS]
+        self.food = self.constrTypes[FOOD]
+        self.tunnels = self.constrTypes[TUNNEL]
+        self.anthills = self.constrTypes[ANTHILL]
+        self.blocked = {}
+
+    ##
+    #getBlocked
+    #Description: the cells an ant can't step onto: those with an ant on
+    #   them and those that cost more than its movement points
+    #
+    #Parameters:
+    #   movement - the ant's movement points (int)
+    #
+    #Return: the set of cells (int)
+    ##
+    def getBlocked(self, movement):
+        blocked = self.blocked.get(movement)
+        if blocked == None:
+            if movement < 1:
+                blocked = ALL_CELLS
+            else:
+                blocked = self.occupied
+                for constrType, cells in self.constrTypes.iteritems():
+                    if CONSTR_STATS[constrType][MOVE_COST] > movement:
+                        blocked |= cells
+            self.blocked[movement] = blocked
+        return blocked
+
+    ##
+    #reachableAdjacent
+    #Description: the cells next to a cell that an ant can step onto, as
+    #   listed by AIPlayerUtils.listReachableAdjacent
+    #
+    #Parameters:
+    #   coords - where the ant is (a legal coordinate)
+    #   movement - the ant's movement points (int)
+    #
+    #Return: the set of cells (int)
+    ##
+    def reachableAdjacent(self, coords, movement):
+        return NEIGHBOURS[coords[0] * BOARD_LENGTH + coords[1]] & ~self.getBlocked(movement)
+
+    ##
+    #attackTargets
+    #Description: the cells of the enemies an ant can attack from where it
+    #   stands, as allowed by RulesEngine.isValidAttack
+    #
+    #Parameters:
+    #   ant - the attacking ant, standing on a legal coordinate (Ant)
+    #
+    #Return: the set of cells (int)
+    ##
+    def attackTargets(self, ant):
+        enemies = self.occupied & ~self.ants[ant.player]
+        return enemies & rangeMask(cellIndex(ant.coords), UNIT_STATS[ant.type][RANGE])
+
+    ##
+    #isFoodAdjacent
+    #Description: whether there is food next to a cell, which rules out
+    #   building a tunnel there (see AIPlayerUtils.listAllBuildMoves)
+    #
+    #Parameters:
+    #   coords - the cell (a legal coordinate)
+    #
+    #Return: True if there is and False otherwise
+    ##
+    def isFoodAdjacent(self, coords):
+        return (NEIGHBOURS[coords[0] * BOARD_LENGTH + coords[1]] & self.food) != 0
+
+##
+# getBitboards
+#
+# Description: the Bitboards of a state, cached on the state if it will
+# take them (GameState.invalidateCaches drops them)
+#
+# Parameters:
+#   state - a GameState, a fastclone'd GameState or a CompactState
+#
+# Return: the bitboards (Bitboards)
+##
+def getBitboards(state):
+    boards = getattr(state, 'bitboards', None)
+    if boards != None:
+        return boards
+
+    boards = Bitboards(state)
+    try:
+        state.bitboards = boards
+    except AttributeError:
+        pass
+    return boards
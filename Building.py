@@ -28,4 +28,6 @@ class Building(Construction):
         self.captureHealth = CONSTR_STATS[inputType][CAP_HEALTH]
     
     def clone(self):
-        return Building(self.coords, self.type, self.player)
+        rtnBuilding = Building(self.coords, self.type, self.player)
+        rtnBuilding.captureHealth = self.captureHealth
+        return rtnBuilding
@@ -0,0 +1,233 @@
+from array import array
+from Constants import *
+from Ant import Ant
+from Construction import Construction
+from Building import Building
+from Inventory import Inventory
+from Location import Location
+from GameState import GameState
+
+#Layout of the header at the front of every encoding
+PHASE_INDEX = 0
+TURN_INDEX = 1
+FOOD_INDEX = 2        #two entries: PLAYER_ONE, PLAYER_TWO
+NUM_ANTS_INDEX = 4    #two entries: PLAYER_ONE, PLAYER_TWO
+NUM_CONSTRS_INDEX = 6 #three entries: PLAYER_ONE, PLAYER_TWO, NEUTRAL
+HEADER_SIZE = 9
+
+#Each ant is stored as (x, y, type, health, flags)
+ANT_SIZE = 5
+HAS_MOVED_FLAG = 1
+CARRYING_FLAG = 2
+
+#Each construction is stored as (x, y, type, owner, captureHealth)
+CONSTR_SIZE = 5
+#captureHealth stored for a plain Construction (grass, food)
+NO_CAPTURE_HEALTH = -128
+
+##
+#CompactState
+#Description: A flat, array-backed encoding of a GameState.  Only the
+#   inventories, food counts, phase and turn are kept (the board can be rebuilt
+#   from the inventories), so a CompactState is a few hundred bytes and
+#   cloning one is a single array copy.
+#
+#   A CompactState can be handed to the AIPlayerUtils helpers in place of a
+#   board-less GameState: it has phase, whoseTurn, a None board, read-only
+#   inventories, and a fastclone() that returns a mutable GameState.
+#
+#Variables:
+#   data - the encoded state (array of signed bytes)
+##
+class CompactState(object):
+    __slots__ = ('data', 'decoded', 'coordIndex', 'terrain', 'bitboards', 'zobrist')
+
+    ##
+    #__init__
+    #Description: Encodes a GameState
+    #
+    #Parameters:
+    #   state - the state to encode (GameState).  Pass None to create an empty
+    #           CompactState whose data is filled in by the caller.
+    ##
+    def __init__(self, state):
+        self.decoded = None
+        self.coordIndex = None
+        self.terrain = None
+        self.bitboards = None
+        self.zobrist = None
+        if state == None:
+            self.data = None
+            return
+
+        inventories = state.inventories
+        data = array('b', [0] * HEADER_SIZE)
+        data[PHASE_INDEX] = state.phase
+        data[TURN_INDEX] = state.whoseTurn
+        data[FOOD_INDEX + PLAYER_ONE] = inventories[PLAYER_ONE].foodCount
+        data[FOOD_INDEX + PLAYER_TWO] = inventories[PLAYER_TWO].foodCount
+        #ants (the neutral inventory never has any)
+        for playerId in (PLAYER_ONE, PLAYER_TWO):
+            ants = inventories[playerId].ants
+            data[NUM_ANTS_INDEX + playerId] = len(ants)
+            for ant in ants:
+                flags = 0
+                if ant.hasMoved:
+                    flags |= HAS_MOVED_FLAG
+                if ant.carrying:
+                    flags |= CARRYING_FLAG
+                data.extend((ant.coords[0], ant.coords[1], ant.type, ant.health, flags))
+        #constructions
+        for playerId in (PLAYER_ONE, PLAYER_TWO, NEUTRAL):
+            constrs = inventories[playerId].constrs
+            data[NUM_CONSTRS_INDEX + playerId] = len(constrs)
+            for constr in constrs:
+                if type(constr) is Building:
+                    data.extend((constr.coords[0], constr.coords[1], constr.type, constr.player, constr.captureHealth))
+                else:
+                    data.extend((constr.coords[0], constr.coords[1], constr.type, NEUTRAL, NO_CAPTURE_HEALTH))
+        self.data = data
+
+    ##
+    #phase
+    #Description: The current phase of the game (int)
+    ##
+    @property
+    def phase(self):
+        return self.data[PHASE_INDEX]
+
+    ##
+    #whoseTurn
+    #Description: The ID of the Player whose turn it currently is (int)
+    ##
+    @property
+    def whoseTurn(self):
+        return self.data[TURN_INDEX]
+
+    ##
+    #board
+    #Description: Like a fastclone'd GameState, a CompactState has no board.
+    ##
+    @property
+    def board(self):
+        return None
+
+    ##
+    #inventories
+    #Description: The decoded inventories.  They are decoded on first use and
+    #   shared by every later call, so they must be treated as read-only.  Use
+    #   fastclone() or toGameState() to get a state that may be modified.
+    ##
+    @property
+    def inventories(self):
+        if self.decoded == None:
+            self.decoded = self.toGameState(False)
+        return self.decoded.inventories
+
+    ##
+    #getFoodCount
+    #Description: reads a player's food count without decoding the state
+    #
+    #Parameters:
+    #   playerId - PLAYER_ONE or PLAYER_TWO (int)
+    #
+    #Return: the amount of food the player has (int)
+    ##
+    def getFoodCount(self, playerId):
+        return self.data[FOOD_INDEX + playerId]
+
+    ##
+    #clone
+    #Description: Returns a copy of itself.  This is a single array copy.
+    #
+    #Return: The CompactState identical to the original
+    ##
+    def clone(self):
+        copy = CompactState(None)
+        copy.data = self.data[:]
+        return copy
+
+    ##
+    #fastclone
+    #Description: Decodes into a new board-less GameState, matching what
+    #   GameState.fastclone returns so that getNextState and friends work.
+    #
+    #Return: a GameState with its board set to None
+    ##
+    def fastclone(self):
+        return self.toGameState(False)
+
+    ##
+    #toGameState
+    #Description: Decodes back into a GameState.
+    #
+    #Parameters:
+    #   withBoard - if True the board is rebuilt from the inventories, otherwise
+    #               it is None as with GameState.fastclone (boolean)
+    #
+    #Return: a new GameState equivalent to the one that was encoded
+    ##
+    def toGameState(self, withBoard = True):
+        data = self.data
+        index = HEADER_SIZE
+
+        antLists = []
+        for playerId in (PLAYER_ONE, PLAYER_TWO):
+            ants = []
+            for i in xrange(0, data[NUM_ANTS_INDEX + playerId]):
+                ant = Ant((data[index], data[index + 1]), data[index + 2], playerId)
+                ant.health = data[index + 3]
+                ant.hasMoved = (data[index + 4] & HAS_MOVED_FLAG) != 0
+                ant.carrying = (data[index + 4] & CARRYING_FLAG) != 0
+                ants.append(ant)
+                index += ANT_SIZE
+            antLists.append(ants)
+
+        constrLists = []
+        for playerId in (PLAYER_ONE, PLAYER_TWO, NEUTRAL):
+            constrs = []
+            for i in xrange(0, data[NUM_CONSTRS_INDEX + playerId]):
+                coords = (data[index], data[index + 1])
+                if data[index + 4] == NO_CAPTURE_HEALTH:
+                    constr = Construction(coords, data[index + 2])
+                else:
+                    constr = Building(coords, data[index + 2], data[index + 3])
+                    constr.captureHealth = data[index + 4]
+                constrs.append(constr)
+                index += CONSTR_SIZE
+            constrLists.append(constrs)
+
+        inventories = [Inventory(PLAYER_ONE, antLists[PLAYER_ONE], constrLists[PLAYER_ONE], data[FOOD_INDEX + PLAYER_ONE]),
+                       Inventory(PLAYER_TWO, antLists[PLAYER_TWO], constrLists[PLAYER_TWO], data[FOOD_INDEX + PLAYER_TWO]),
+                       Inventory(NEUTRAL, [], constrLists[NEUTRAL], 0)]
+
+        board = None
+        if withBoard:
+            board = [[Location((col, row)) for row in xrange(0, BOARD_LENGTH)] for col in xrange(0, BOARD_LENGTH)]
+            for inv in inventories:
+                for constr in inv.constrs:
+                    board[constr.coords[0]][constr.coords[1]].constr = constr
+                for ant in inv.ants:
+                    board[ant.coords[0]][ant.coords[1]].ant = ant
+
+        return GameState(board, inventories, data[PHASE_INDEX], data[TURN_INDEX])
+
+    def __eq__(self, other):
+        return type(other) is CompactState and self.data == other.data
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.data.tostring())
+
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, data):
+        self.data = data
+        self.decoded = None
+        self.coordIndex = None
+        self.terrain = None
+        self.bitboards = None
+        self.zobrist = None
@@ -65,6 +65,7 @@ ACTIVE = 1
 INVALID_PLACEMENT = 0
 INVALID_MOVE = 1
 INVALID_ATTACK = 2
+TIMED_OUT = 3
 
 #Max time (seconds) an AI is allowed to make a move
 AI_MOVE_TIMEOUT = 30
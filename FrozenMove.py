@@ -0,0 +1,245 @@
+from Constants import *
+from Move import Move
+
+##
+# FrozenMove.py
+#
+# An immutable, hashable form of Move that packs the whole move into one int,
+# for use as a dict key (e.g. by the move ordering heuristics of Search.py)
+# and wherever moves are kept for a long time.  There is only ever one
+# FrozenMove for each move (see internMove), so they can be compared with
+# "is" and cost nothing to keep.  A FrozenMove has the same moveType,
+# coordList and buildType as a Move (coordList is a tuple), so the
+# AIPlayerUtils functions that read a move accept either; the game itself
+# only takes Moves (see toMove).
+#
+# The code, from the lowest bits up:
+#   2 bits - the moveType (MOVE_ANT, BUILD or END)
+#   4 bits - the buildType - ANTHILL + 1, or 0 for no buildType
+#   7 bits for each coord of the path in turn - x * BOARD_LENGTH + y + 1
+# A coord is never coded as 0, so the path ends at the first 7 zero bits.
+##
+
+#added to a buildType to code it
+BUILD_TYPE_OFFSET = 1 - ANTHILL
+#where the path starts in a code
+PATH_SHIFT = 6
+#the bits and mask of one coord
+CELL_BITS = 7
+CELL_MASK = (1 << CELL_BITS) - 1
+
+#every FrozenMove made so far, by code.  There are only so many moves on a
+#board, so the table stays small.
+internTable = {}
+
+##
+#FrozenMove
+#Description: One move, which can't be changed.  Use internMove or
+#   freezeMove to get one rather than the constructor.
+#
+#Variables:
+#   code - the move packed into an int (see above) (int)
+#   moveType - the type of move (MOVE_ANT, BUILD or END)
+#   coordList - the path or build location ((int, int) tuple, or None)
+#   buildType - the type of ant or construction built, or None (int)
+##
+class FrozenMove(object):
+    __slots__ = ('code', 'moveType', 'coordList', 'buildType')
+
+    ##
+    #__init__
+    #Description: Creates a FrozenMove (see internMove)
+    #
+    #Parameters:
+    #   code - the move's code (int)
+    ##
+    def __init__(self, code):
+        moveType, coordList, buildType = decodeMove(code)
+        object.__setattr__(self, 'code', code)
+        object.__setattr__(self, 'moveType', moveType)
+        object.__setattr__(self, 'coordList', coordList)
+        object.__setattr__(self, 'buildType', buildType)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("a FrozenMove can't be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("a FrozenMove can't be changed")
+
+    def __eq__(self, other):
+        return type(other) is FrozenMove and other.code == self.code
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.code)
+
+    ##
+    #__reduce__
+    #Description: a FrozenMove is pickled as its code, and interned again
+    #   when it is unpickled
+    ##
+    def __reduce__(self):
+        return (internCode, (self.code,))
+
+    def __str__(self):
+        return "<Frozen" + str(self.toMove())[1:]
+
+    ##
+    #toMove
+    #Description: the same move as a (new, changeable) Move
+    #
+    #Return: the Move (Move)
+    ##
+    def toMove(self):
+        coordList = self.coordList
+        if coordList != None:
+            coordList = list(coordList)
+        return Move(self.moveType, coordList, self.buildType)
+
+    ##
+    #flipped
+    #Description: the same move as the other player sees the board (see
+    #   GameState.coordLookup)
+    #
+    #Return: the flipped move (FrozenMove)
+    ##
+    def flipped(self):
+        if self.coordList == None:
+            return self
+        last = BOARD_LENGTH - 1
+        return internMove(self.moveType, [(last - x, last - y) for x, y in self.coordList],
+                          self.buildType, False)
+
+##
+# encodeMove
+#
+# Description: packs a move into an int
+#
+# Parameters:
+#   moveType - MOVE_ANT, BUILD or END (int)
+#   coordList - the path or build location, or None ((int, int)[])
+#   buildType - the type built, or None (int)
+#   check - whether to check that the move can be coded; moves straight from
+#           the move generators (see AIPlayerUtils.listAllFrozenMoves) always
+#           can, and are coded about three times faster without it (boolean)
+#
+# Return: the code (int)
+#
+# Raises: ValueError if the move can't be coded (only when checking)
+##
+def encodeMove(moveType, coordList, buildType, check = True):
+    if check:
+        checkMove(moveType, coordList, buildType)
+    path = 0
+    if coordList is not None:
+        for x, y in reversed(coordList):
+            path = (path << CELL_BITS) | (x * BOARD_LENGTH + y + 1)
+    if buildType is None:
+        return (path << PATH_SHIFT) | moveType
+    return (path << PATH_SHIFT) | ((buildType + BUILD_TYPE_OFFSET) << 2) | moveType
+
+##
+# checkMove
+#
+# Description: checks that encodeMove can code a move
+#
+# Parameters:
+#   moveType, coordList, buildType - as for encodeMove
+#
+# Raises: ValueError if it can't
+##
+def checkMove(moveType, coordList, buildType):
+    if moveType not in (MOVE_ANT, BUILD, END):
+        raise ValueError("not a move type: " + str(moveType))
+    if buildType != None and (type(buildType) is not int or not ANTHILL <= buildType <= R_SOLDIER):
+        raise ValueError("not a build type: " + str(buildType))
+    if coordList != None:
+        for coord in coordList:
+            try:
+                x, y = coord
+            except (TypeError, ValueError):
+                raise ValueError("not a board coord: " + str(coord))
+            if type(x) is not int or type(y) is not int or not (0 <= x < BOARD_LENGTH and 0 <= y < BOARD_LENGTH):
+                raise ValueError("not a board coord: " + str(coord))
+
+##
+# decodeMove
+#
+# Description: unpacks a move coded by encodeMove
+#
+# Parameters:
+#   code - the code (int)
+#
+# Return: a (moveType, coordList tuple or None, buildType) tuple
+##
+def decodeMove(code):
+    moveType = code & 3
+    buildCode = (code >> 2) & 15
+    buildType = None
+    if buildCode != 0:
+        buildType = buildCode - BUILD_TYPE_OFFSET
+
+    path = code >> PATH_SHIFT
+    coordList = None
+    if path != 0:
+        coords = []
+        while path != 0:
+            cell = (path & CELL_MASK) - 1
+            coords.append((cell / BOARD_LENGTH, cell % BOARD_LENGTH))
+            path >>= CELL_BITS
+        coordList = tuple(coords)
+    return (moveType, coordList, buildType)
+
+##
+# internCode
+#
+# Description: the FrozenMove with the given code
+#
+# Parameters:
+#   code - the code (int)
+#
+# Return: the one FrozenMove for that code (FrozenMove)
+##
+def internCode(code):
+    move = internTable.get(code)
+    if move is None:
+        move = internTable[code] = FrozenMove(code)
+    return move
+
+##
+# internMove
+#
+# Description: the FrozenMove for a move given by its parts
+#
+# Parameters:
+#   moveType - MOVE_ANT, BUILD or END (int)
+#   coordList - the path or build location, or None ((int, int)[])
+#   buildType - the type built, or None (int)
+#   check - as for encodeMove (boolean)
+#
+# Return: the one FrozenMove for that move (FrozenMove)
+#
+# Raises: ValueError if the move can't be coded (only when checking)
+##
+def internMove(moveType, coordList, buildType, check = True):
+    return internCode(encodeMove(moveType, coordList, buildType, check))
+
+##
+# freezeMove
+#
+# Description: the FrozenMove for a Move
+#
+# Parameters:
+#   move - the move (Move or FrozenMove)
+#   check - as for encodeMove (boolean)
+#
+# Return: the one FrozenMove for that move (FrozenMove)
+#
+# Raises: ValueError if the move can't be coded (only when checking)
+##
+def freezeMove(move, check = True):
+    if type(move) is FrozenMove:
+        return move
+    return internCode(encodeMove(move.moveType, move.coordList, move.buildType, check))
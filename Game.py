@@ -1,6 +1,11 @@
 import os, re, sys, math, multiprocessing, time, random
 import HumanPlayer
-from UserInterface import *
+import RulesEngine
+try:
+    from UserInterface import UserInterface
+except ImportError:
+    #pygame is missing; only headless games (see HeadlessGame.py) can be run
+    UserInterface = None
 from Construction import *
 from Constants import *
 from GameState import *
@@ -9,6 +14,11 @@ from Building import *
 from Location import *
 from Ant import *
 from Move import *
+from FrozenMove import FrozenMove
+from RemotePlayer import AITimeoutError
+from Instrumentation import Profiler, NullProfiler
+from GameRecord import GameRecordWriter
+from Seeding import deriveSeed, newSeed
 
 ##
 #Game
@@ -21,13 +31,18 @@ class Game(object):
     #__init__
     #Description: Initializes the game's attributes and UI.
     #
+    #Parameters:
+    #   ui - the user interface to drive.  A pygame UserInterface is created
+    #        when none is given. (UserInterface or NullUserInterface)
     ##
-    def __init__(self):
+    def __init__(self, ui = None):
         #Initialize the game variables
         self.players = []
         self.initGame()
         #Initializes the UI variables
-        self.ui = UserInterface((865,695))
+        if ui == None:
+            ui = UserInterface((865,695))
+        self.ui = ui
         self.initUI()
         #Initializes tournament mode variables
         self.playerScores = [] # [[author,wins,losses], ...]
@@ -36,6 +51,22 @@ class Game(object):
         #debug mode allows initial setup in human vs. AI to be automated
         self.debugMode = False
         self.randomSetup = False
+        #timing of the calls made for each AI (see Instrumentation.py)
+        self.profiler = NullProfiler()
+        self.profileJSONPath = None
+        #if set, every game is recorded to a file in this directory (see GameRecord.py)
+        self.recordDir = None
+        self.recorder = None
+        self.gamesRecorded = 0
+        #if set, every game's seed is derived from this and the game's number
+        #(see seedGame), so that a tournament can be played again exactly
+        self.masterSeed = None
+        self.gameNumber = 0
+        self.gameSeed = None
+        self.random = random.Random()
+        #if set, moves listed by listAllLegalMoves for the state a player was
+        #given are made without checking them again (see RulesEngine.stampMoves)
+        self.trustLegalMoves = False
         
     ##
     #processCommandLine
@@ -45,8 +76,10 @@ class Game(object):
     # "debug" arguments are supported. In this format:
     #           python Game.py debug [<myAIName>] [random]
     # "-t" or tournament arguments are suported in this format:
-    #           python Game.py -t <AIName1> <AIName2> [-n <number of games>]
+    #           python Game.py -t <AIName1> <AIName2> [-n <number of games> [-json <file>]]
     #       The number of games defaults to 10 if no -n argument is specified.
+    #       The time spent on each AI's calls is printed when the tournament
+    #       ends, and also written to the given file as JSON with -json.
     ##
     def processCommandLine(self):
         #process command line arguments
@@ -118,6 +151,11 @@ class Game(object):
                         print "     FORMAT: -n 1000"
                         return
 
+                # get the file to export the call timings to if specified
+                if (len(sys.argv) > 7) and (sys.argv[6].lower() == "-json"):
+                    self.profileJSONPath = sys.argv[7]
+                self.profiler = Profiler()
+
                 # now that we have the AI's check the check boxes
                 for index in aiNameIndices:
                     self.checkBoxClickedCallback(index)
@@ -143,7 +181,7 @@ class Game(object):
         while True:
             #Determine current chosen game mode. Enter different execution paths
             #based on the mode, which must be chosen by clicking a button.
-            self.ui.drawBoard(self.state, self.mode)
+            self.refreshBoard()
             
             if not self.errorNotify:
                 if self.mode == None:
@@ -172,17 +210,16 @@ class Game(object):
         constrsToPlace += [Building(None, ANTHILL, PLAYER_ONE)]
         constrsToPlace += [Building(None, TUNNEL, PLAYER_ONE)]
         constrsToPlace += [Construction(None, GRASS) for i in xrange(0,9)]
-    
+
+        self.seedGame()
+        self.startRecord()
         while not self.gameOver:
             if self.state.phase == MENU_PHASE:
                 #if we are in menu phase at this point, a reset was requested so break
                 break
             else:
-                #create a copy of the state to share with the player
-                theState = self.state.clone()
-                #if the player is player two, flip the board
-                if theState.whoseTurn == PLAYER_TWO:
-                    theState.flipBoard()
+                #get the copy of the state to share with the player
+                theState = self.getPlayerView()
 
             if self.state.phase == SETUP_PHASE_1 or self.state.phase == SETUP_PHASE_2:
                 currentPlayer = self.currentPlayers[self.state.whoseTurn]
@@ -201,29 +238,33 @@ class Game(object):
                 #do auto-random setup for human player if required
                 if (self.randomSetup) and (type(currentPlayer) is HumanPlayer.HumanPlayer):
                     if (constrsToPlace[0].type != FOOD):
-                        coord = (random.randint(0,9), random.randint(0,3))
+                        coord = (self.random.randint(0,9), self.random.randint(0,3))
                         if (self.state.board[coord[0]][coord[1]].constr == None):
                             targets.append(coord)
                     elif (constrsToPlace[0].type == FOOD):
-                        coord = (random.randint(0,9), random.randint(6,9))
+                        coord = (self.random.randint(0,9), self.random.randint(6,9))
                         if (self.state.board[coord[0]][coord[1]].constr == None):
                             targets.append(coord)
 
-                #hide the 1st player's set anthill and grass placement from the 2nd player
-                if theState.whoseTurn == PLAYER_TWO and self.state.phase == SETUP_PHASE_1:
-                    theState.clearConstrs()
-                    
                 #get the placement from the player
-                targets += currentPlayer.getPlacement(theState)
+                try:
+                    startTime = self.profiler.start()
+                    targets += currentPlayer.getPlacement(theState)
+                    self.profiler.stop(startTime, currentPlayer.author, "getPlacement")
+                except AITimeoutError as e:
+                    self.error(TIMED_OUT, e)
+                    break
                 #only want to place as many targets as constructions to place
                 if len(targets) > len(constrsToPlace):
                     targets = targets[:len(constrsToPlace)]
 
                 validPlace = self.isValidPlacement(constrsToPlace, targets)
                 if validPlace:
+                    placed = []
                     for target in targets:
                         #translate coords to match player
                         target = self.state.coordLookup(target, self.state.whoseTurn)
+                        placed.append(target)
                         #get construction to place
                         constr = constrsToPlace.pop(0)
                         #give constr its coords
@@ -235,6 +276,9 @@ class Game(object):
                             self.state.inventories[self.state.whoseTurn].constrs.append(constr)
                         else:  #grass and food
                             self.state.inventories[NEUTRAL].constrs.append(constr)
+                    self.stateChanged()
+                    if self.recorder != None:
+                        self.recorder.recordPlacement(placed)
                     
                     #if AI mode, pause to observe move until next or continue is clicked
                     self.pauseForAIMode()
@@ -289,6 +333,7 @@ class Game(object):
                                 
                         #change player turn in state
                         self.state.whoseTurn = (self.state.whoseTurn + 1) % 2
+                    self.stateChanged()
                             
                 else:
                     if not type(currentPlayer) is HumanPlayer.HumanPlayer:
@@ -321,33 +366,45 @@ class Game(object):
                             
                 #get the move from the current player in a separate
                 #process so that we can time it out
-                move = currentPlayer.getMove(theState)
+                try:
+                    startTime = self.profiler.start()
+                    move = currentPlayer.getMove(theState)
+                    self.profiler.stop(startTime, currentPlayer.author, "getMove")
+                except AITimeoutError as e:
+                    self.error(TIMED_OUT, e)
+                    break
                 
-                if move != None and move.coordList != None:
-                    for i in xrange(0,len(move.coordList)):
-                        #translate coords of move to match player
-                        move.coordList[i] = self.state.coordLookup(move.coordList[i], self.state.whoseTurn)
+                #a move listed by listAllLegalMoves for the state the player
+                #was just given needs no checking (see RulesEngine.stampMoves)
+                trusted = RulesEngine.isStamped(move, theState.moveToken)
+
+                #the game itself only plays Moves
+                if type(move) is FrozenMove:
+                    move = move.toMove()
+
+                if type(move) is Move and type(move.coordList) is list and self.state.whoseTurn == PLAYER_TWO:
+                    #translate coords of move to match player, into a new Move
+                    #so that the player's own copy is left as it was
+                    move = Move(move.moveType, [self.state.coordLookup(coord, PLAYER_TWO) for coord in move.coordList], move.buildType)
                 
                 #make sure it's a valid move
-                validMove = self.isValidMove(move)
+                startTime = self.profiler.start()
+                if trusted:
+                    validMove = True
+                else:
+                    validMove = self.isValidMove(move)
+                self.profiler.stop(startTime, currentPlayer.author, "isValidMove")
                 
                 #complete the move if valid
                 if validMove:
+                    if self.recorder != None:
+                        self.recorder.recordMove(move)
+                    #the move has just been checked, so make it without checking again
+                    antToMove = RulesEngine.applyMove(self.state, move, True)
+                    self.stateChanged()
+
                     #check move type
                     if move.moveType == MOVE_ANT:
-                        startCoord = move.coordList[0]
-                        endCoord = move.coordList[-1]
-                        
-                        #take ant from start coord
-                        antToMove = self.state.board[startCoord[0]][startCoord[1]].ant
-                        #change ant's coords and hasMoved status
-                        antToMove.coords = (endCoord[0], endCoord[1])
-                        antToMove.hasMoved = True
-                        #remove ant from location
-                        self.state.board[startCoord[0]][startCoord[1]].ant = None
-                        #put ant at last loc in coordList
-                        self.state.board[endCoord[0]][endCoord[1]].ant = antToMove
-                        
                         #clear all highlights after move happens
                         self.ui.coordList = []
                         
@@ -364,29 +421,15 @@ class Game(object):
                         #if we are in menu phase at this point, a reset was requested so we need to break the game loop.
                         if self.state.phase == MENU_PHASE:
                             break
+                        #the attacker forfeited by timing out
+                        if self.gameOver:
+                            break
 
                         #clear all highlights after attack happens
                         self.ui.coordList = []
                         self.ui.attackList = []
                         
                     elif move.moveType == BUILD:
-                        coord = move.coordList[0]
-                        currentPlayerInv = self.state.inventories[self.state.whoseTurn]
-                                                 
-                        #subtract the cost of the item from the player's food count
-                        if move.buildType == TUNNEL:
-                            currentPlayerInv.foodCount -= CONSTR_STATS[move.buildType][BUILD_COST]
-                            
-                            tunnel = Building(coord, TUNNEL, self.state.whoseTurn)
-                            self.state.board[coord[0]][coord[1]].constr = tunnel
-                        else:
-                            currentPlayerInv.foodCount -= UNIT_STATS[move.buildType][COST]
-                            
-                            ant = Ant(coord, move.buildType, self.state.whoseTurn)
-                            ant.hasMoved = True
-                            self.state.board[coord[0]][coord[1]].ant = ant
-                            self.state.inventories[self.state.whoseTurn].ants.append(ant)
-                        
                         #if AI mode, pause to observe move until next or continue is clicked
                         self.pauseForAIMode()
                         if self.state.phase == MENU_PHASE:
@@ -397,33 +440,9 @@ class Game(object):
                         self.ui.coordList = []    
                         
                     elif move.moveType == END:
-                        #take care of end of turn business for ants and contructions
-                        for ant in self.state.inventories[self.state.whoseTurn].ants:
-                            constrUnderAnt = self.state.board[ant.coords[0]][ant.coords[1]].constr
-                            if constrUnderAnt != None:
-                                #if constr is enemy's and ant hasnt moved, affect capture health of buildings
-                                if type(constrUnderAnt) is Building and not ant.hasMoved and not constrUnderAnt.player == self.state.whoseTurn:
-                                    constrUnderAnt.captureHealth -= 1
-                                    if constrUnderAnt.captureHealth == 0 and constrUnderAnt.type != ANTHILL:
-                                        constrUnderAnt.player = self.state.whoseTurn
-                                        constrUnderAnt.captureHealth = CONSTR_STATS[constrUnderAnt.type][CAP_HEALTH]
-                                #have all worker ants on food sources gather food
-                                elif constrUnderAnt.type == FOOD and ant.type == WORKER:
-                                    ant.carrying = True
-                                #deposit carried food (only workers carry)
-                                elif (constrUnderAnt.type == ANTHILL or constrUnderAnt.type == TUNNEL) and ant.carrying == True:
-                                    self.state.inventories[self.state.whoseTurn].foodCount += 1
-                                    ant.carrying = False
-                            
-                            #reset hasMoved on all ants of player
-                            ant.hasMoved = False   
-                            
                         #clear any currently highlighted squares
                         self.ui.coordList = []
                         
-                        #switch whose turn it is
-                        self.state.whoseTurn = (self.state.whoseTurn + 1) % 2
-
                         #notify player which AI is acting
                         nextPlayerName = self.players[self.state.whoseTurn][0].author
                         self.ui.notify(nextPlayerName + "'s turn.")
@@ -451,9 +470,10 @@ class Game(object):
                 self.setWinner(PLAYER_TWO)
                 
             #redraw the board periodically and check for user input
-            self.ui.drawBoard(self.state, self.mode)
+            self.refreshBoard()
             
         #end game loop
+        self.finishRecord()
     
     def resolveEndGame(self):
         if self.state.phase != MENU_PHASE:
@@ -506,6 +526,9 @@ class Game(object):
                         break
                         
                 if len(self.gamesToPlay) == 0:
+                    #report where the tournament's time went
+                    self.printProfile()
+
                     #if no more games to play, reset tournament stuff
                     self.numGames = 0                               
                     self.playerScores = []
@@ -515,6 +538,7 @@ class Game(object):
                     #setup game to run again
                     self.mode = TOURNAMENT_MODE
                     self.state.phase = SETUP_PHASE_1
+                    self.stateChanged()
                 
                     #get players from next pairing
                     playerOneId = self.gamesToPlay[0][0][0]
@@ -537,8 +561,12 @@ class Game(object):
         self.loser = self.currentPlayers[(id + 1) % 2].playerId
          
         #tell the players if they won or lost
+        startTime = self.profiler.start()
         self.currentPlayers[id].registerWin(True)
+        self.profiler.stop(startTime, self.currentPlayers[id].author, "registerWin")
+        startTime = self.profiler.start()
         self.currentPlayers[(id + 1) % 2].registerWin(False)
+        self.profiler.stop(startTime, self.currentPlayers[(id + 1) % 2].author, "registerWin")
     
     ##
     #resolveAttack 
@@ -549,14 +577,9 @@ class Game(object):
     #   currentPlayer - The Player whose turn it currently is (Player)
     ##   
     def resolveAttack(self, attackingAnt, currentPlayer):
-        #check if player wants to attack
-        validAttackCoords = []
-        opponentId = (self.state.whoseTurn + 1) % 2
-        range = UNIT_STATS[attackingAnt.type][RANGE]
-        for ant in self.state.inventories[opponentId].ants:
-            if self.isValidAttack(attackingAnt, ant.coords):
-                #keep track of valid attack coords (flipped for player two)
-                validAttackCoords.append(self.state.coordLookup(ant.coords, currentPlayer.playerId))
+        #check if player wants to attack (coords flipped for player two)
+        validAttackCoords = [self.state.coordLookup(coord, currentPlayer.playerId)
+                             for coord in RulesEngine.listAttackTargets(self.state, attackingAnt)]
         if validAttackCoords != []:
             #give instruction to human player
             if type(currentPlayer) is HumanPlayer.HumanPlayer:
@@ -576,19 +599,23 @@ class Game(object):
             #keep requesting coords until valid attack is given
             while attackCoord == None or not validAttack:               
                 #Draw the board again (to recognize user input inside loop)
-                self.ui.drawBoard(self.state, self.mode)
+                self.refreshBoard()
                 
                 if self.state.phase == MENU_PHASE:
                     #if we are in menu phase at this point, a reset was requested so we need to break the game loop.
                     return
                 
-                #Create a clone of the state to give to the player
-                theState = self.state.clone()
-                if theState.whoseTurn == PLAYER_TWO:
-                    theState.flipBoard()
+                #get the copy of the state to give to the player
+                theState = self.getPlayerView()
                         
                 #get the attack from the player (flipped for player two)
-                attackCoord = self.state.coordLookup(currentPlayer.getAttack(theState, attackingAnt.clone(), validAttackCoords), currentPlayer.playerId)
+                try:
+                    startTime = self.profiler.start()
+                    attackCoord = self.state.coordLookup(currentPlayer.getAttack(theState, attackingAnt.clone(), validAttackCoords), currentPlayer.playerId)
+                    self.profiler.stop(startTime, currentPlayer.author, "getAttack")
+                except AITimeoutError as e:
+                    self.error(TIMED_OUT, e)
+                    return
                 
                 #check for the move's validity
                 validAttack = self.isValidAttack(attackingAnt, attackCoord)
@@ -607,20 +634,127 @@ class Game(object):
                 self.expectingAttack = False
                 currentPlayer.coordList = []
             
-            #decrement ants health
-            attackedAnt = self.state.board[attackCoord[0]][attackCoord[1]].ant
-            attackedAnt.health -= UNIT_STATS[attackingAnt.type][ATTACK]
-            
-            #check for dead ant
-            if attackedAnt.health <= 0:
-                #remove dead ant from board
-                self.state.board[attackCoord[0]][attackCoord[1]].ant = None
-                #remove dead ant from inventory
-                self.state.inventories[opponentId].ants.remove(attackedAnt)
+            if validAttack and self.recorder != None:
+                self.recorder.recordAttack(attackCoord)
+
+            #the attack has just been checked, so make it without checking again
+            RulesEngine.applyAttack(self.state, attackingAnt, attackCoord, True)
+            self.stateChanged()
                 
             #if AI mode, pause to observe attack until next or continue is clicked
             self.pauseForAIMode()
             
+    ##
+    #seedGame
+    #Description: picks the seed of the game about to be played and seeds the
+    #   game's and each player's random number generator from it.  With a
+    #   master seed the game seed only depends on it and on the game's number
+    #   in the tournament, so the game plays out the same in any process.
+    #
+    ##
+    def seedGame(self):
+        if self.masterSeed != None:
+            self.gameSeed = deriveSeed(self.masterSeed, self.gameNumber)
+        else:
+            self.gameSeed = newSeed()
+        self.gameNumber += 1
+        self.random.seed(deriveSeed(self.gameSeed, "game"))
+        for side in (PLAYER_ONE, PLAYER_TWO):
+            self.currentPlayers[side].seed(deriveSeed(self.gameSeed, side))
+
+    ##
+    #startRecord
+    #Description: starts recording the game about to be played if a record
+    #   directory was given.  Files are named after the players, the process
+    #   and a count of the games it recorded so that parallel games don't clash.
+    #
+    ##
+    def startRecord(self):
+        if self.recordDir == None:
+            return
+        authors = [player.author for player in self.currentPlayers]
+        names = [re.sub(r"\W+", "_", author) for author in authors]
+        fileName = "%s-vs-%s-%d-%d.antr" % (names[0], names[1], os.getpid(), self.gamesRecorded)
+        self.gamesRecorded += 1
+        self.recorder = GameRecordWriter(os.path.join(self.recordDir, fileName), authors, self.gameSeed)
+
+    ##
+    #finishRecord
+    #Description: writes the result of the game to its record and closes it
+    #
+    ##
+    def finishRecord(self):
+        if self.recorder == None:
+            return
+        if self.gameOver:
+            #record which side won, not the winner's playerId
+            winner = None
+            for side in (PLAYER_ONE, PLAYER_TWO):
+                if self.currentPlayers[side].playerId == self.winner:
+                    winner = side
+            self.recorder.recordResult(winner)
+        self.recorder.close()
+        self.recorder = None
+
+    ##
+    #refreshBoard
+    #Description: draws the board and checks for user input.  If the state
+    #   hasn't changed since it was last drawn, the ui waits for the next frame
+    #   and redraws only on input, so that loops waiting on the user don't
+    #   keep a core busy.
+    #
+    ##
+    def refreshBoard(self):
+        if self.drawnVersion != self.stateVersion:
+            self.drawnVersion = self.stateVersion
+            self.ui.drawBoard(self.state, self.mode)
+        else:
+            self.ui.drawBoardIdle(self.state, self.mode)
+
+    ##
+    #stateChanged
+    #Description: must be called whenever self.state is changed so that the
+    #   copies of it handed to the players are rebuilt (see getPlayerView)
+    #
+    ##
+    def stateChanged(self):
+        self.stateVersion += 1
+
+    ##
+    #getPlayerView
+    #Description: returns the copy of the state to give to the player whose
+    #   turn it is: flipped for player two, and without player one's setup
+    #   during player two's first setup phase.  The copy is only made again
+    #   after stateChanged, so the many loop iterations in which a human
+    #   hasn't acted yet share one copy.  With trustLegalMoves the copy
+    #   carries a move token unique to this game and version of the state.
+    #
+    #Return: the player's view of the state (GameState)
+    ##
+    def getPlayerView(self):
+        #drop the views of an older version (or of the last game's state)
+        if self.viewState is not self.state or self.viewVersion != self.stateVersion:
+            self.viewState = self.state
+            self.viewVersion = self.stateVersion
+            self.playerViews = {}
+
+        whoseTurn = self.state.whoseTurn
+        theState = self.playerViews.get(whoseTurn)
+        if theState == None:
+            startTime = self.profiler.start()
+            theState = self.state.clone()
+            self.profiler.stop(startTime, self.currentPlayers[whoseTurn].author, "clone")
+            #if the player is player two, flip the board
+            if whoseTurn == PLAYER_TWO:
+                theState.flipBoard()
+                #hide the 1st player's set anthill and grass placement from the 2nd player
+                if self.state.phase == SETUP_PHASE_1:
+                    theState.clearConstrs()
+            if self.trustLegalMoves:
+                theState.moveToken = (self.gameToken, self.stateVersion)
+            self.playerViews[whoseTurn] = theState
+        return theState
+
     ##
     #initGame
     #Description: resets the game's attributes to their starting state
@@ -632,6 +766,14 @@ class Game(object):
         p2Inventory = Inventory(PLAYER_TWO, [], [], 0)
         neutralInventory = Inventory(NEUTRAL, [], [], 0)
         self.state = GameState(board, [p1Inventory, p2Inventory, neutralInventory], MENU_PHASE, PLAYER_ONE)
+        #the copies of the state handed to the players (see getPlayerView)
+        self.stateVersion = 0
+        self.playerViews = {}
+        self.viewState = None
+        self.viewVersion = None
+        self.drawnVersion = None
+        #tells the move tokens of this game from those of the last one
+        self.gameToken = newSeed()
         self.currentPlayers = []
         self.mode = None
         self.errorNotify = False
@@ -731,7 +873,8 @@ class Game(object):
         
     ##
     #isValidMove(Move)
-    #Description: Checks to see if the move is valid for the current player.
+    #Description: Checks to see if the move is valid for the current player
+    #   (see RulesEngine.validateMove), reporting why if it isn't.
     # 
     #Parameters:
     #   move - The Move to check (Move)
@@ -743,179 +886,21 @@ class Game(object):
         if move == None:
             self.errorReport("ERROR: Invalid Move: " + str(move))
             return None
-        
-        #check that the move is well-formed typewise (tuples, ints, etc)
-        if type(move) != Move:
-            self.errorReport("ERROR: Invalid Move: " + str(move))
-            self.errorReport("ERROR:  player did not supply an object of type 'Move'")
-            return False
-        if type(move.moveType) != int:
-            self.errorReport("ERROR: Invalid Move: " + str(move))
-            self.errorReport("       Move type must be an integer.")
-            return False
-        #for END type moves, lots we don't need to check
-        if move.moveType == END:
-            return True
-        if move.coordList == None or type(move.coordList) != list or len(move.coordList) == 0:
+
+        try:
+            RulesEngine.validateMove(self.state, move)
+        except RulesEngine.IllegalMoveError as e:
             self.errorReport("ERROR: Invalid Move: " + str(move))
-            self.errorReport("       The coordinate list is empty!")
-            return False
-        index = 0
-        for coord in move.coordList:
-            if (type(coord) != tuple):
-                self.errorReport("ERROR: Invalid Move: " + str(move))
-                self.errorReport("       Coordinate at index " + str(index) + " is not a tuple.")
-                return False
-            if (len(coord) != 2):
-                self.errorReport("ERROR: Invalid Move: " + str(move))
-                self.errorReport("       Coordinate at index " + str(index) + " has " + str(len(coord)) + "entries instead of 2.")
-                return False
-            if (type(coord[0]) != int) or (type(coord[1]) != int):
-                self.errorReport("ERROR: Invalid Move: " + str(move))
-                self.errorReport("       Coordinate at index " + str(index) + " contains a value that is not an int.")
-                return False
-            index += 1
-        if type(move.buildType) != type(None) and type(move.buildType) != int:
+            for line in e.details:
+                self.errorReport(line)
+            if e.notice != None:
+                self.ui.notify(e.notice)
+                self.errorNotify = True
             return False
 
-        #for MOVE_ANT and BUILD type moves
-        if move.moveType == MOVE_ANT:
-            firstCoord = move.coordList[0]
-            #check valid start location (good coords and ant ownership)
-            if self.checkMoveStart(firstCoord):
-                #get ant to move
-                antToMove = self.state.board[firstCoord[0]][firstCoord[1]].ant
-                movePoints = UNIT_STATS[antToMove.type][MOVEMENT]             
-                previousCoord = None
-
-                index = 0
-                for coord in move.coordList:
-                    #if first runthough, need to set up previous coord
-                    if previousCoord == None:
-                        previousCoord = coord
-                        continue  
-                    #if any to-coords are invalid, return invalid move
-                    if not self.checkMovePath(previousCoord, coord):
-                        self.errorReport("ERROR: Invalid Move: " + str(move))
-                        self.errorReport("       Illegal movement path at index" + str(index))
-                        return False
-                        
-                    #subtract cost of loc from movement points
-                    constrAtLoc = self.state.board[coord[0]][coord[1]].constr
-                    if constrAtLoc == None or antToMove.type == DRONE:
-                        movePoints -= 1
-                    else:
-                        movePoints -= CONSTR_STATS[constrAtLoc.type][MOVE_COST]
-                        
-                    previousCoord = coord
-                    index += 1
-                    
-                #Check for Queen ant trying to leave her territory
-                if (antToMove.type == QUEEN):
-                    for coord in move.coordList:
-                        if (coord[1] == BOARD_LENGTH / 2 - 1) \
-                        or (coord[1] == BOARD_LENGTH / 2):
-                            self.errorReport("ERROR: Invalid Move: " + str(move))
-                            self.errorReport("       Queen ant may not leave her own territory")
-                            return False
-                            
-                #within movement range and hasn't moved yet?
-                if (movePoints < 0):
-                    self.errorReport("ERROR: Invalid Move: " + str(move))
-                    self.errorReport("       Ant has insufficient movement points for this move")
-                    return False
-                if antToMove.hasMoved:
-                    self.errorReport("ERROR: Invalid Move: " + str(move))
-                    self.errorReport("       Ant has already made a move this turn")
-                    return False
-                else:
-                    return True
-                        
-        elif move.moveType == BUILD:
-            #coord list must contain one point for build
-            if len(move.coordList) != 1:
-                self.errorReport("ERROR: Invalid Move: " + str(move))
-                self.errorReport("       for a BUILD move, the coordinate list should contain exactly 1 coordinate")
-                return False
-        
-            buildCoord = move.coordList[0]
-            #check valid start location
-            if self.checkBuildStart(buildCoord):
-                #we're building either an ant or constr for sure
-               
-                if self.state.board[buildCoord[0]][buildCoord[1]].ant == None:
-                #we know we're building an ant
-                    buildCost = None
-                    #check buildType for valid ant
-                    if move.buildType == WORKER:
-                        buildCost = UNIT_STATS[WORKER][COST]
-                    elif move.buildType == DRONE:
-                        buildCost = UNIT_STATS[DRONE][COST]
-                    elif move.buildType == SOLDIER:
-                        buildCost = UNIT_STATS[SOLDIER][COST]
-                    elif move.buildType == R_SOLDIER:
-                        buildCost = UNIT_STATS[R_SOLDIER][COST]
-                    else:
-                        self.errorReport("ERROR: Invalid Move: " + str(move))
-                        self.errorReport("       the buildType must be one of:  WORKER, DRONE, SOLDIER or R_SOLDIER.")
-                        return False
-                    
-                    #check the player has enough food
-                    currFood = self.state.inventories[self.state.whoseTurn].foodCount
-                    if currFood >= buildCost:
-                        self.ui.notify("")
-                        return True
-                    else:
-                        self.errorReport("ERROR: Invalid Move: " + str(move))
-                        self.errorReport("       Player has " + str(currFood) + " food but needs " + str(buildCost) + " to build this ant")
-                        self.ui.notify("Requires " + str(buildCost) + " food.")
-                        self.errorNotify = True
-                        return False
-                else:
-                #we know we're building a construction
-                    adjacentCoords = []
-                    adjacentCoords.append(addCoords(buildCoord, (0, -1)))
-                    adjacentCoords.append(addCoords(buildCoord, (0, 1)))
-                    adjacentCoords.append(addCoords(buildCoord, (-1, 0)))
-                    adjacentCoords.append(addCoords(buildCoord, (1, 0)))
-                
-                    #check that there's no food in adjacent locations
-                    for aCoord in adjacentCoords:
-                        if aCoord[0] >= 0 and aCoord[0] < 10 and aCoord[1] >= 0 and aCoord[1] < 10:
-                            if (self.state.board[aCoord[0]][aCoord[1]].constr != None and
-                                    self.state.board[aCoord[0]][aCoord[1]].constr.type == FOOD):
-                                self.errorReport("ERROR: Invalid Move: " + str(move))
-                                self.errorReport("       Cannot tunnel build next to food.")
-                                self.ui.notify("Cannot tunnel build next to food.")
-                                self.errorNotify = True
-                                return False
-                 
-                    buildCost = CONSTR_STATS[TUNNEL][BUILD_COST]
-                    if self.state.inventories[self.state.whoseTurn].foodCount >= buildCost:
-                        self.ui.notify("")
-                        return True
-                    else:
-                        self.ui.notify("Requires "+ str(buildCost) + " food.")
-                        self.errorNotify = True
-                        self.errorReport("ERROR: Invalid Move: " + str(move))
-                        self.errorReport("       Must have at least " + str(buildCost) + " food to build a tunnel.")
-                        return False
-            else:  #invalid build start
-                self.errorReport("ERROR: Invalid Move: " + str(move))
-                self.errorReport("       Build location invalid.  Possible cause:")
-                loc = self.state.board[buildCoord[0]][buildCoord[1]]
-                if loc.ant == None:  #building ant
-                    self.errorReport("         - Anthill does not belong to current player")
-                else:
-                    if (move.buildType != TUNNEL):
-                        self.errorReport("         - Anthill is already occupied")
-                    elif (loc.ant.hasMoved):
-                        self.errorReport("         - Worker ant has already moved this turn")
-                    else:
-                        self.errorReport("         - Worker ant does not belong to current player")
-        else:
-            #invalid numeric move type
-            return False
+        if move.moveType == BUILD:
+            self.ui.notify("")
+        return True
             
     ##
     #isValidPlacement
@@ -928,42 +913,7 @@ class Game(object):
     #Returns None if no target is given, true if it is a valid placement, or false if it is an invalid placement
     ##
     def isValidPlacement(self, items, targets):
-        #check for well-formed input of targets (from players)
-        if type(targets) == type(None) or type(targets) != list:
-            return False
-         #If no target, return None (human vs ai caught by caller)
-        if len(targets) == 0:
-            return None
-        for coord in targets:
-            if not self.isValidCoord(coord):
-                return False
-
-        for i in range(0, len(targets)):
-            #Nobody can place in the center two rows of the board or on their opponents side
-                 
-            #check item type
-            if items[i].type == ANTHILL or items[i].type == TUNNEL or items[i].type == GRASS:
-                #check targets[i] is within proper boundaries y-wise
-                #must be on own side
-                if not self.isInHomeTerritory(targets[i]):
-                    return False
-            #check item type
-            elif items[i].type == FOOD:
-                #check targets[i] is within proper boundaries y-wise
-                #must be on opponent's side
-                if not self.isInEnemyTerritory(targets[i]):
-                    return False
-            else:
-                #I don't know what this type is.
-                return False
-            
-            #change target to access appropriate players locations
-            aTarget = self.state.coordLookup(targets[i], self.state.whoseTurn)
-            #make sure nothing is there yet
-            if not self.state.board[aTarget[0]][aTarget[1]].constr == None:
-                return False
-                    
-        return True
+        return RulesEngine.isValidPlacement(self.state, items, targets)
       
     ##
     #isValidAttack
@@ -977,29 +927,7 @@ class Game(object):
     #Returns: None if there is no attackCoord, true if valid attack, or false if invalid attack
     ##  
     def isValidAttack(self, attackingAnt, attackCoord):
-        if attackCoord == None:
-            return None
-        
-        #check for well-formed input from players
-        if not self.isValidCoord(attackCoord):
-            return False
-    
-        attackLoc = self.state.board[attackCoord[0]][attackCoord[1]]
-        
-        if attackLoc.ant == None or attackLoc.ant.player == attackingAnt.player:
-            return False
-        
-        #we know we have an enemy ant
-        range = UNIT_STATS[attackingAnt.type][RANGE]
-        diffX = abs(attackingAnt.coords[0] - attackCoord[0])
-        diffY = abs(attackingAnt.coords[1] - attackCoord[1])
-        
-        #pythagoras would be proud
-        if range ** 2 >= diffX ** 2 + diffY ** 2:
-            #return True if within range
-            return True
-        else:
-            return False
+        return RulesEngine.isValidAttack(self.state, attackingAnt, attackCoord)
    
     ##
     #isValidCoord
@@ -1011,53 +939,7 @@ class Game(object):
     #Returns: True if the coordinate is between (0,0) and (9,9)
     ##
     def isValidCoord(self, coord):
-        #check for well-formed coord
-        if type(coord) != tuple or len(coord) != 2 or type(coord[0]) != int or type(coord[1]) != int:
-            return False
-        
-        #check boundaries
-        if coord[0] < 0 or coord[1] < 0 or coord[0] >= BOARD_LENGTH or coord[1] >= BOARD_LENGTH:
-            return False
-            
-        return True
-   
-    ##
-    # isInHomeTerritory
-    #
-    # Description: determines whether the position is in the player's
-    # home territory
-    #
-    # Parameters:
-    #   coord - The coord to be checked trying to be checked ((int, int))
-    #
-    # Returns: True if it is and False otherwise
-    #
-    ##
-    def isInHomeTerritory(self, coord):
-        if not self.isValidCoord(coord):
-            return False
-        if not (coord[1] >= 0 and coord[1] < BOARD_LENGTH / 2 - 1):
-            return False
-        return True
-
-    ##
-    # isInEnemyTerritory
-    #
-    # Description: determines whether the position is in the player's
-    # enemy's territory
-    #
-    # Parameters:
-    #   coord - The coord to be checked trying to be checked ((int, int))
-    #
-    # Returns: True if it is and False otherwise
-    #
-    ##
-    def isInEnemyTerritory(self, coord):
-        if not self.isValidCoord(coord):
-            return False
-        if not (coord[1] < BOARD_LENGTH and coord[1] >= BOARD_LENGTH / 2 + 1):
-            return False
-        return True
+        return RulesEngine.isValidCoord(coord)
 
     ##
     #checkMoveStart 
@@ -1070,16 +952,7 @@ class Game(object):
     #Returns: True if it is a valid starting point for a move and false if not
     ##
     def checkMoveStart(self, coord):
-        #check location is on board
-        if self.isValidCoord(coord):
-            antToMove = self.state.board[coord[0]][coord[1]].ant
-            #check that an ant exists at the loc
-            if antToMove != None:
-                #check that it's the player's ant and that it hasn't moved
-                if antToMove.player == self.state.whoseTurn and not antToMove.hasMoved:
-                    return True
-                                      
-        return False
+        return RulesEngine.checkMoveStart(self.state, coord)
 
     ##
     #checkMovePath
@@ -1096,17 +969,7 @@ class Game(object):
     #  (either in checkMoveStart or previous checkMovePath call)
     ##
     def checkMovePath(self, fromCoord, toCoord):
-        #check location is on board
-        if self.isValidCoord(toCoord):
-            #check that squares are adjacent (difference on only one axis is 1)
-            if ((abs(fromCoord[0] - toCoord[0]) == 1 and abs(fromCoord[1] - toCoord[1]) == 0) or
-                    (abs(fromCoord[0] - toCoord[0]) == 0 and abs(fromCoord[1] - toCoord[1]) == 1)):
-                antAtLoc = self.state.board[toCoord[0]][toCoord[1]].ant
-                #check if an ant exists at the loc
-                if antAtLoc ==  None:
-                    return True
-                    
-        return False
+        return RulesEngine.checkMovePath(self.state, fromCoord, toCoord)
 
     ##
     #checkBuildStart 
@@ -1119,21 +982,7 @@ class Game(object):
     #Returns: True if it is a valid build location and false otherwise
     ##    
     def checkBuildStart(self, coord):
-        #check location is on board
-        if self.isValidCoord(coord):
-            loc = self.state.board[coord[0]][coord[1]]
-            #check that an empty anthill exists at the loc
-            if loc.constr != None and loc.constr.type == ANTHILL and loc.ant == None:
-                #check that it's the player's anthill
-                if loc.constr.player == self.state.whoseTurn:
-                    return True
-            #check that an ant exists at an empty location
-            elif loc.ant != None and loc.ant.type == WORKER and loc.constr == None:       
-                #check that it's the player's ant and it hasn't moved
-                if loc.ant.player == self.state.whoseTurn and not loc.ant.hasMoved:
-                    return True
-                    
-        return False
+        return RulesEngine.checkBuildStart(self.state, coord)
     
     ##
     #highlightValidMoves
@@ -1186,17 +1035,7 @@ class Game(object):
     #Returns: True if the player with playerId has won the game.
     ##
     def hasWon(self, playerId):
-        opponentId = (playerId + 1) % 2
-        
-        if ((self.state.phase == PLAY_PHASE) and 
-        ((self.state.inventories[opponentId].getQueen() == None) or
-        (self.state.inventories[opponentId].getAnthill().captureHealth <= 0) or
-        (self.state.inventories[playerId].foodCount >= FOOD_GOAL) or
-        (self.state.inventories[opponentId].foodCount == 0 and 
-            len(self.state.inventories[opponentId].ants) == 1))):
-            return True
-        else:
-            return False
+        return RulesEngine.hasWon(self.state, playerId)
      
     ##
     #pauseForAIMode
@@ -1206,13 +1045,27 @@ class Game(object):
     def pauseForAIMode(self):
         if self.mode == AI_MODE:
             while not self.nextClicked and not self.continueClicked:
-                self.ui.drawBoard(self.state, self.mode)
+                self.refreshBoard()
                 if self.state.phase == MENU_PHASE:
                     #if we are in menu phase at this point, a reset was requested so we need to break the game loop.
                     return
             #reset nextClicked to catch next move
             self.nextClicked = False
 
+    ##
+    # printProfile
+    # Description: prints the timing of each AI's calls (if they were timed)
+    #   and exports it as JSON if a file was given
+    #
+    ##
+    def printProfile(self):
+        if len(self.profiler.samples) == 0:
+            return
+        self.profiler.printSummary()
+        if self.profileJSONPath != None:
+            self.profiler.exportJSON(self.profileJSONPath)
+        self.profiler.reset()
+
     ##
     # printTournament
     # Description: prints the status of the tournament
@@ -1261,6 +1114,10 @@ class Game(object):
             elif info.moveType == MOVE_ANT:
                 pass
 
+        elif errorCode == TIMED_OUT:
+            #info is an AITimeoutError
+            errorMsg += "timed out\n" + str(info)
+
         else: #INVALID_ATTACK
             #info is a coord          
             errorMsg += "invalid attack\n"
@@ -1309,6 +1166,8 @@ class Game(object):
             return
 
         if self.state.phase == MENU_PHASE:     
+            #number the games from the start
+            self.gameNumber = 0
             #set up stuff for tournament mode
             if self.mode == TOURNAMENT_MODE:
                 #reset tournament variables
@@ -1368,6 +1227,7 @@ class Game(object):
                  
             #change the phase to setup
             self.state.phase = SETUP_PHASE_1
+            self.stateChanged()
             
     ##
     #tourneyPathCallback
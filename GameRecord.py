@@ -0,0 +1,434 @@
+import struct
+from Constants import *
+from Ant import Ant
+from Building import Building
+from Construction import Construction
+from Inventory import Inventory
+from Location import Location
+from GameState import GameState
+from Move import Move
+from RulesEngine import applyMove, applyAttack
+
+##
+# GameRecord.py
+#
+# A compact binary record of a game: the authors, the seed (if any), and the
+# placements, moves and attack choices in the order the game accepted them.
+# A record holds everything needed to play the game back (see
+# RecordPlayback), so it only takes a few bytes per move.
+#
+# File layout (all integers big endian):
+#   header: "ANTR", version (byte), flags (byte; bit 0 set if a seed follows),
+#           [seed (8 bytes)], then each of the two authors as a 2 byte length
+#           followed by that many bytes of UTF-8
+#   events, each a tag byte followed by its payload:
+#     'P' placement:  count (byte), count cells
+#     'M' MOVE_ANT:   count (byte), count cells (the whole path)
+#     'B' BUILD:      cell, build type (signed byte)
+#     'E' END:        nothing
+#     'A' attack:     cell
+#     'R' result:     winner (byte; 255 if there is none)
+#   where a cell is one byte, x * BOARD_LENGTH + y, in board (player one)
+#   coordinates.
+##
+
+RECORD_MAGIC = "ANTR"
+RECORD_VERSION = 1
+
+#event tags
+PLACEMENT_TAG = 'P'
+MOVE_TAG = 'M'
+BUILD_TAG = 'B'
+END_TAG = 'E'
+ATTACK_TAG = 'A'
+RESULT_TAG = 'R'
+
+#the winner stored in the result event of a game nobody won
+NO_WINNER = 255
+
+#a GameRecordWriter writes its buffer out once it holds this many bytes
+RECORD_BUFFER_SIZE = 1 << 16
+
+##
+#GameRecordError
+#Description: Raised when a file is not a valid game record
+##
+class GameRecordError(Exception):
+    pass
+
+##
+# encodeCell
+#
+# Return: the byte that stores a board coordinate (int)
+##
+def encodeCell(coord):
+    return coord[0] * BOARD_LENGTH + coord[1]
+
+##
+# decodeCell
+#
+# Return: the board coordinate stored in a byte ((int, int))
+##
+def decodeCell(cell):
+    return (cell / BOARD_LENGTH, cell % BOARD_LENGTH)
+
+##
+#GameRecordWriter
+#Description: Writes a game record as the game is played.  The events are
+#   packed into a buffer that is written out in bulk (every
+#   RECORD_BUFFER_SIZE bytes and on close), so recording costs a few struct
+#   calls per move.
+#
+#Variables:
+#   path - the file being written (string)
+##
+class GameRecordWriter(object):
+
+    ##
+    #__init__
+    #Description: Creates the record file and writes its header
+    #
+    #Parameters:
+    #   path - the file to write (string)
+    #   authors - the authors of player one and player two (string[])
+    #   seed - the seed the game was played with, or None (int)
+    #   bufferSize - the number of bytes buffered before writing (int)
+    ##
+    def __init__(self, path, authors, seed = None, bufferSize = RECORD_BUFFER_SIZE):
+        self.path = path
+        self.file = open(path, "wb")
+        self.bufferSize = bufferSize
+        self.buffer = []
+        self.bufferedBytes = 0
+
+        header = [RECORD_MAGIC, struct.pack(">BB", RECORD_VERSION, int(seed != None))]
+        if seed != None:
+            header.append(struct.pack(">Q", seed & 0xFFFFFFFFFFFFFFFF))
+        for author in authors:
+            if isinstance(author, unicode):
+                author = author.encode("utf-8")
+            header.append(struct.pack(">H", len(author)) + author)
+        self.write("".join(header))
+
+    ##
+    #recordPlacement
+    #Description: records constructions placed during setup
+    #
+    #Parameters:
+    #   coords - where they were placed, in board coordinates ((int, int)[])
+    ##
+    def recordPlacement(self, coords):
+        self.write(PLACEMENT_TAG + chr(len(coords)) + "".join([chr(encodeCell(coord)) for coord in coords]))
+
+    ##
+    #recordMove
+    #Description: records a valid move
+    #
+    #Parameters:
+    #   move - the move, in board coordinates (Move)
+    ##
+    def recordMove(self, move):
+        if move.moveType == MOVE_ANT:
+            self.write(MOVE_TAG + chr(len(move.coordList)) + "".join([chr(encodeCell(coord)) for coord in move.coordList]))
+        elif move.moveType == BUILD:
+            self.write(BUILD_TAG + chr(encodeCell(move.coordList[0])) + struct.pack(">b", move.buildType))
+        else:
+            self.write(END_TAG)
+
+    ##
+    #recordAttack
+    #Description: records the ant chosen as the target of an attack
+    #
+    #Parameters:
+    #   coord - where the attacked ant is, in board coordinates ((int, int))
+    ##
+    def recordAttack(self, coord):
+        self.write(ATTACK_TAG + chr(encodeCell(coord)))
+
+    ##
+    #recordResult
+    #Description: records the winner of the game
+    #
+    #Parameters:
+    #   winner - the id of the winning player, or None (int)
+    ##
+    def recordResult(self, winner):
+        if winner == None:
+            winner = NO_WINNER
+        self.write(RESULT_TAG + chr(winner))
+
+    ##
+    #write
+    #Description: adds bytes to the buffer, writing it out once it is full
+    ##
+    def write(self, data):
+        self.buffer.append(data)
+        self.bufferedBytes += len(data)
+        if self.bufferedBytes >= self.bufferSize:
+            self.flush()
+
+    ##
+    #flush
+    #Description: writes the buffer to the file
+    ##
+    def flush(self):
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer = []
+            self.bufferedBytes = 0
+        self.file.flush()
+
+    ##
+    #close
+    #Description: writes out whatever is buffered and closes the file
+    ##
+    def close(self):
+        if self.file != None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+##
+#GameRecord
+#Description: A game record read back from a file.
+#
+#Variables:
+#   authors - the authors of player one and player two (string[])
+#   seed - the seed the game was played with, or None (int)
+#   events - the recorded events in order, each a tuple starting with its tag:
+#            (PLACEMENT_TAG, coords), (MOVE_TAG, Move), (BUILD_TAG, Move),
+#            (END_TAG, Move) or (ATTACK_TAG, coord)
+#   winner - the id of the winning player, or None if there is none or the
+#            game was not finished (int)
+#   finished - whether the record ends with the game's result (boolean)
+##
+class GameRecord(object):
+
+    def __init__(self, authors, seed, events, winner, finished):
+        self.authors = authors
+        self.seed = seed
+        self.events = events
+        self.winner = winner
+        self.finished = finished
+
+    ##
+    #replay
+    #Description: plays the record back
+    #
+    #Parameters:
+    #   plies - how many events to play, or None for all of them (int)
+    #
+    #Return: the GameState after those events (GameState)
+    ##
+    def replay(self, plies = None):
+        playback = RecordPlayback()
+        for event in self.events[:plies]:
+            playback.apply(event)
+        return playback.state
+
+
+##
+# readGameRecord
+#
+# Description: reads a game record file
+#
+# Parameters:
+#   path - the file to read (string)
+#
+# Return: the record (GameRecord)
+##
+def readGameRecord(path):
+    f = open(path, "rb")
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    return parseGameRecord(data)
+
+##
+# parseGameRecord
+#
+# Description: decodes the contents of a game record file
+#
+# Parameters:
+#   data - the bytes of the record (string)
+#
+# Return: the record (GameRecord)
+##
+def parseGameRecord(data):
+    if data[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+        raise GameRecordError("not a game record")
+    try:
+        offset = len(RECORD_MAGIC)
+        version, flags = struct.unpack_from(">BB", data, offset)
+        offset += 2
+        if version != RECORD_VERSION:
+            raise GameRecordError("unsupported game record version %d" % version)
+        seed = None
+        if flags & 1:
+            seed = struct.unpack_from(">Q", data, offset)[0]
+            offset += 8
+        authors = []
+        for i in xrange(0, 2):
+            length = struct.unpack_from(">H", data, offset)[0]
+            offset += 2
+            authors.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+
+        events = []
+        winner = None
+        finished = False
+        while offset < len(data):
+            tag = data[offset]
+            offset += 1
+            if tag == PLACEMENT_TAG or tag == MOVE_TAG:
+                count = ord(data[offset])
+                coords = [decodeCell(ord(cell)) for cell in data[offset + 1:offset + 1 + count]]
+                if len(coords) != count:
+                    raise GameRecordError("truncated game record")
+                offset += 1 + count
+                if tag == PLACEMENT_TAG:
+                    events.append((tag, coords))
+                else:
+                    events.append((tag, Move(MOVE_ANT, coords, None)))
+            elif tag == BUILD_TAG:
+                cell, buildType = struct.unpack_from(">Bb", data, offset)
+                offset += 2
+                events.append((tag, Move(BUILD, [decodeCell(cell)], buildType)))
+            elif tag == END_TAG:
+                events.append((tag, Move(END, None, None)))
+            elif tag == ATTACK_TAG:
+                events.append((tag, decodeCell(ord(data[offset]))))
+                offset += 1
+            elif tag == RESULT_TAG:
+                winner = ord(data[offset])
+                offset += 1
+                if winner == NO_WINNER:
+                    winner = None
+                finished = True
+            else:
+                raise GameRecordError("unknown event tag %r" % tag)
+    except (struct.error, IndexError):
+        raise GameRecordError("truncated game record")
+    return GameRecord(authors, seed, events, winner, finished)
+
+
+##
+# getConstrsToPlace
+#
+# Description: the constructions a player places in a setup phase, in the
+# order Game.runGame asks for them
+#
+# Parameters:
+#   phase - SETUP_PHASE_1 or SETUP_PHASE_2 (int)
+#   playerId - the player placing them (int)
+#
+# Return: the constructions to place (Construction[])
+##
+def getConstrsToPlace(phase, playerId):
+    if phase == SETUP_PHASE_1:
+        return [Building(None, ANTHILL, playerId), Building(None, TUNNEL, playerId)] + \
+               [Construction(None, GRASS) for i in xrange(0, 9)]
+    return [Construction(None, FOOD) for i in xrange(0, 2)]
+
+##
+#RecordPlayback
+#Description: Plays the events of a GameRecord onto a GameState, placing
+#   constructions the way Game.runGame does and applying moves and attacks
+#   with the RulesEngine.  The events are trusted to be valid, as they were
+#   when they were recorded.
+#
+#Variables:
+#   state - the state of the game so far (GameState)
+#   constrsToPlace - the constructions still to place in the current setup
+#                    step (Construction[])
+#   ply - the number of events played (int)
+#   lastMoveEnd - where the last MOVE_ANT ended ((int, int))
+##
+class RecordPlayback(object):
+
+    ##
+    #__init__
+    #Description: Starts from the empty board of a new game
+    ##
+    def __init__(self):
+        board = [[Location((col, row)) for row in xrange(0, BOARD_LENGTH)] for col in xrange(0, BOARD_LENGTH)]
+        inventories = [Inventory(PLAYER_ONE, [], [], 0), Inventory(PLAYER_TWO, [], [], 0), Inventory(NEUTRAL, [], [], 0)]
+        self.state = GameState(board, inventories, SETUP_PHASE_1, PLAYER_ONE)
+        self.constrsToPlace = getConstrsToPlace(SETUP_PHASE_1, PLAYER_ONE)
+        self.ply = 0
+        self.lastMoveEnd = None
+
+    ##
+    #apply
+    #Description: plays one event
+    #
+    #Parameters:
+    #   event - an event of a GameRecord (tuple)
+    ##
+    def apply(self, event):
+        tag = event[0]
+        if tag == PLACEMENT_TAG:
+            self.place(event[1])
+        elif tag == ATTACK_TAG:
+            self.attack(event[1])
+        else:
+            self.move(event[1])
+        self.state.invalidateCaches()
+        self.state.zobrist = None
+        self.ply += 1
+
+    ##
+    #place
+    #Description: places constructions during setup and moves on to the
+    #   next setup step (or the play phase) once they are all placed
+    ##
+    def place(self, coords):
+        state = self.state
+        for coord in coords:
+            constr = self.constrsToPlace.pop(0)
+            constr.coords = coord
+            state.board[coord[0]][coord[1]].constr = constr
+            if constr.type == ANTHILL or constr.type == TUNNEL:
+                state.inventories[state.whoseTurn].constrs.append(constr)
+            else:
+                state.inventories[NEUTRAL].constrs.append(constr)
+        if self.constrsToPlace:
+            return
+
+        if state.phase == SETUP_PHASE_1 and state.whoseTurn == PLAYER_TWO:
+            state.phase = SETUP_PHASE_2
+        elif state.phase == SETUP_PHASE_2 and state.whoseTurn == PLAYER_TWO:
+            #add in the queens and workers and move to play phase
+            for inv in state.inventories[:2]:
+                queen = Ant(inv.constrs[0].coords, QUEEN, inv.player)
+                worker = Ant(inv.constrs[1].coords, WORKER, inv.player)
+                state.board[queen.coords[0]][queen.coords[1]].ant = queen
+                state.board[worker.coords[0]][worker.coords[1]].ant = worker
+                inv.ants.append(queen)
+                inv.ants.append(worker)
+                inv.foodCount = 1
+            state.phase = PLAY_PHASE
+        state.whoseTurn = (state.whoseTurn + 1) % 2
+        if state.phase != PLAY_PHASE:
+            self.constrsToPlace = getConstrsToPlace(state.phase, state.whoseTurn)
+
+    ##
+    #move
+    #Description: makes a MOVE_ANT, BUILD or END move
+    ##
+    def move(self, move):
+        ant = applyMove(self.state, move, True)
+        if move.moveType == MOVE_ANT:
+            self.lastMoveEnd = ant.coords
+
+    ##
+    #attack
+    #Description: applies an attack.  Attacks are only recorded right after
+    #   the attacker's MOVE_ANT, so the attacker is the ant that moved last.
+    ##
+    def attack(self, coord):
+        state = self.state
+        attackingAnt = state.board[self.lastMoveEnd[0]][self.lastMoveEnd[1]].ant
+        applyAttack(state, attackingAnt, coord, True)
@@ -26,6 +26,18 @@ def subtractCoords(tuple1, tuple2):
 #   inventories - A tuple containing the Inventory for each player.
 #   phase - The current phase of the game.
 #    whoseTurn - The ID of the Player who's turn it currently is.
+#   coordIndex - Lookup tables from coords to ants/constructs, built on demand
+#    by AIPlayerUtils.getCoordIndex (None until then).  Code that adds,
+#    removes or moves ants or constructs must call invalidateCaches.
+#   terrain - The move costs and distances of the construction layout, looked
+#    up on demand by Terrain.getTerrain (None until then).
+#   bitboards - Sets of cells holding ants and each type of construct, built
+#    on demand by Bitboard.getBitboards (None until then).
+#   zobrist - The state's Zobrist hash, computed on demand by
+#    Zobrist.getStateHash and kept up to date by AIPlayerUtils.applyNextState.
+#    Any other change to the state must set it back to None.
+#   moveToken - Set by Game on the copies it hands to the players when it trusts
+#    the moves of listAllLegalMoves (see RulesEngine.stampMoves), else None.
 ##
 class GameState(object):
 
@@ -45,6 +57,21 @@ class GameState(object):
         self.inventories = inputInventories
         self.phase = inputPhase
         self.whoseTurn = inputTurn
+        self.coordIndex = None
+        self.terrain = None
+        self.bitboards = None
+        self.zobrist = None
+        self.moveToken = None
+
+    ##
+    #invalidateCaches
+    #Description: Discards the lookup tables derived from the inventories.
+    #   Must be called after ants or constructions are added, removed or moved.
+    ##
+    def invalidateCaches(self):
+        self.coordIndex = None
+        self.terrain = None
+        self.bitboards = None
 
     ##
     #coordLookup
@@ -78,6 +105,8 @@ class GameState(object):
                 ant.coords = self.coordLookup(ant.coords, PLAYER_TWO)
             for constr in inv.constrs:
                 constr.coords = self.coordLookup(constr.coords, PLAYER_TWO)
+        self.invalidateCaches()
+        self.zobrist = None
       
     ##
     #clearConstrs
@@ -175,3 +204,46 @@ class GameState(object):
                            Inventory(NEUTRAL, [], cons3, 0) ]
         
         return GameState(newBoard, newInventories, self.phase, self.whoseTurn)
+
+    ##
+    #__getstate__
+    #Description: Pickles the board as (ant, constr) pairs instead of Location
+    #   objects, which more than halves the cost of sending a state to another
+    #   process (see RemotePlayer.py).  The lookup caches are not pickled.
+    ##
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['coordIndex'] = None
+        state['terrain'] = None
+        state['bitboards'] = None
+        if self.board != None:
+            empty = (None, None)
+            board = []
+            for col in self.board:
+                cells = []
+                for loc in col:
+                    if loc.ant == None and loc.constr == None:
+                        cells.append(empty)
+                    else:
+                        cells.append((loc.ant, loc.constr))
+                board.append(cells)
+            state['board'] = board
+        return state
+
+    ##
+    #__setstate__
+    #Description: Rebuilds the Locations of a board pickled by __getstate__
+    ##
+    def __setstate__(self, state):
+        board = state.get('board')
+        if board != None and len(board) > 0 and type(board[0][0]) is tuple:
+            newBoard = []
+            for col in xrange(0, len(board)):
+                newCol = []
+                for row in xrange(0, len(board[col])):
+                    loc = Location((col, row))
+                    loc.ant, loc.constr = board[col][row]
+                    newCol.append(loc)
+                newBoard.append(newCol)
+            state['board'] = newBoard
+        self.__dict__.update(state)
@@ -0,0 +1,395 @@
+import os, sys, time, multiprocessing
+from Game import *
+from NullUserInterface import NullUserInterface
+from RemotePlayer import RemotePlayer
+from Instrumentation import Profiler
+import AIPlayerUtils
+
+#the HeadlessGame owned by each worker process of a parallel tournament
+workerGame = None
+
+##
+#HeadlessGame
+#Description: Runs tournaments through the same Game.runGame/resolveEndGame
+#   code as "python Game.py -t", but with a NullUserInterface so that no time
+#   is spent rendering or polling for events (and pygame need not be installed).
+#
+#   Usage:  python HeadlessGame.py -t <AIName1> <AIName2> [<AIName3> ...] [-n <number of games>] [-p <processes>] [-isolate] [-json <file>] [-record <dir>] [-seed <n>] [-trusted]
+##
+class HeadlessGame(Game):
+
+    ##
+    #__init__
+    #Description: Creates a game driven by a NullUserInterface
+    #
+    #Parameters:
+    #   verbose - if True, the score table is printed after every game instead
+    #             of only once the tournament has finished (boolean)
+    #   isolate - if True, each AI runs in a worker process of its own and
+    #             forfeits any game in which a call exceeds AI_MOVE_TIMEOUT
+    #             (see RemotePlayer.py) (boolean)
+    ##
+    def __init__(self, verbose = False, isolate = False):
+        self.isolate = isolate
+        super(HeadlessGame, self).__init__(NullUserInterface())
+        self.verbose = verbose
+
+    ##
+    #loadAIs
+    #Description: loads the AIs as Game.loadAIs does, wrapping each one in a
+    #   RemotePlayer when isolating them.
+    ##
+    def loadAIs(self, humanMode):
+        super(HeadlessGame, self).loadAIs(humanMode)
+        if self.isolate:
+            for entry in self.players:
+                entry[0] = RemotePlayer(entry[0])
+
+    ##
+    #selectAIs
+    #Description: loads the AIs and activates the ones named, the same way the
+    #   "-t" command line option does.
+    #
+    #Parameters:
+    #   aiNames - the authors of the AIs to play (string[])
+    #
+    #Returns: True if every AI was found, False otherwise
+    ##
+    def selectAIs(self, aiNames):
+        #press the "Tournament Mode" button
+        self.tourneyPathCallback()
+
+        aiNameIndices = []
+        for ainame in aiNames:
+            index = -1
+            for player in self.players:
+                if ainame == player[0].author:
+                    index = self.players.index(player)
+                    break
+            if index < 0:
+                print "ERROR:  AI '" + ainame + "' not found."
+                print "Please specify one of the following:"
+                for player in self.players:
+                    print '    "' + player[0].author + '"'
+                return False
+            if index not in aiNameIndices:
+                aiNameIndices.append(index)
+
+        #check the check boxes
+        for index in aiNameIndices:
+            self.checkBoxClickedCallback(index)
+        return True
+
+    ##
+    #playTournament
+    #Description: plays a round robin between the named AIs.
+    #
+    #Parameters:
+    #   aiNames - the authors of the AIs to play (string[])
+    #   numGames - the number of games to play for each pairing (int)
+    #
+    #Returns: the final score table ([[author, wins, losses], ...]) or None if
+    #   the tournament could not be started
+    ##
+    def playTournament(self, aiNames, numGames):
+        if not self.selectAIs(aiNames):
+            return None
+
+        self.ui.textBoxContent = str(numGames)
+        self.submitClickedCallback()
+        if self.ui.choosingAIs:
+            print "ERROR: " + self.ui.lastNotification
+            return None
+        self.startGameCallback()
+
+        #same loop as Game.start, minus the drawing
+        while self.state.phase != MENU_PHASE:
+            self.runGame()
+            self.resolveEndGame()
+
+        #resolveEndGame hands the final table to the UI before resetting its own
+        return self.ui.tournamentScores
+
+    ##
+    #playGame
+    #Description: plays a single game between two AIs that have already been
+    #   given their tournament playerIds.
+    #
+    #Parameters:
+    #   playerOne - the AI that places and moves first (Player)
+    #   playerTwo - its opponent (Player)
+    #
+    #Returns: a (winner playerId, loser playerId) tuple
+    ##
+    def playGame(self, playerOne, playerTwo):
+        self.initGame()
+        self.mode = TOURNAMENT_MODE
+        self.currentPlayers = [playerOne, playerTwo]
+        self.state.phase = SETUP_PHASE_1
+        self.stateChanged()
+        self.runGame()
+        return (self.winner, self.loser)
+
+    ##
+    #playParallelTournament
+    #Description: plays the same round robin as playTournament, but fans the
+    #   games out to a pool of worker processes.  Each worker loads its own
+    #   instances of the AIs, and the win/loss rows are merged into
+    #   playerScores as results arrive.
+    #
+    #Parameters:
+    #   aiNames - the authors of the AIs to play (string[])
+    #   numGames - the number of games to play for each pairing (int)
+    #   processes - the number of worker processes, or None for one per core (int)
+    #
+    #Returns: the final score table ([[author, wins, losses], ...]) or None if
+    #   the tournament could not be started
+    ##
+    def playParallelTournament(self, aiNames, numGames, processes = None):
+        if not self.selectAIs(aiNames):
+            return None
+
+        self.ui.textBoxContent = str(numGames)
+        self.submitClickedCallback()
+        if self.ui.choosingAIs:
+            print "ERROR: " + self.ui.lastNotification
+            return None
+        #let startGameCallback build playerScores and gamesToPlay exactly as
+        #it does for a sequential tournament
+        self.startGameCallback()
+        self.state.phase = MENU_PHASE
+
+        #one task per game, in pairing order, numbered as a sequential
+        #tournament would number them (see Game.seedGame)
+        tasks = []
+        for pairing in self.gamesToPlay:
+            tasks += [pairing[0]] * pairing[1]
+        tasks = list(enumerate(tasks))
+        self.gamesToPlay = []
+
+        if processes == None or processes <= 0:
+            processes = multiprocessing.cpu_count()
+        #batch several games per message so that IPC stays small next to play time
+        chunkSize = max(1, len(tasks) / (processes * 8))
+
+        #the workers time their games if this game is being timed
+        profile = isinstance(self.profiler, Profiler)
+        pool = multiprocessing.Pool(processes, initWorker, (aiNames, profile, self.recordDir, self.masterSeed,
+                                                           self.trustLegalMoves))
+        try:
+            for winner, loser, samples, hits, misses in pool.imap_unordered(playWorkerGame, tasks, chunkSize):
+                self.playerScores[winner][1] += 1
+                self.playerScores[loser][2] += 1
+                self.profiler.merge(samples)
+                #count the workers' legal move cache lookups as if made here
+                AIPlayerUtils.legalMoveCache.hits += hits
+                AIPlayerUtils.legalMoveCache.misses += misses
+                self.printTournament()
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+        scores = self.playerScores
+        self.ui.tournamentScores = scores
+        self.ui.tournamentInProgress = False
+        self.playerScores = []
+        self.initGame()
+        return scores
+
+    ##
+    #printTournament
+    #Description: only prints the running table in verbose mode, printing it
+    #   after every game can cost more than the game itself.
+    ##
+    def printTournament(self):
+        if self.verbose:
+            super(HeadlessGame, self).printTournament()
+
+    ##
+    #printProfile
+    #Description: the call timings are left for the caller to report (see
+    #   main) rather than printed when the last game ends.
+    ##
+    def printProfile(self):
+        pass
+
+    ##
+    #printScores
+    #Description: prints a score table in the same format as printTournament
+    #
+    #Parameters:
+    #   scores - the table to print ([[author, wins, losses], ...])
+    ##
+    def printScores(self, scores):
+        columns = ['AI', 'Wins', 'Losses']
+        row_format ="{:>15}" * (len(columns))
+        print row_format.format(*columns)
+        for row in scores:
+            print row_format.format(*row)
+
+
+##
+# initWorker
+#
+# Description: process pool initializer.  Gives each worker its own
+# HeadlessGame with freshly loaded instances of the tournament AIs, numbered
+# the same way as in the parent process.
+#
+# Parameters:
+#   aiNames - the authors of the AIs to play (string[])
+#   profile - whether to time the calls made for each AI (boolean)
+#   recordDir - the directory to record the games in, or None (string)
+#   masterSeed - the tournament's master seed, or None (int)
+#   trustLegalMoves - make moves from listAllLegalMoves unchecked (boolean)
+##
+def initWorker(aiNames, profile = False, recordDir = None, masterSeed = None, trustLegalMoves = False):
+    global workerGame
+    workerGame = HeadlessGame()
+    if profile:
+        workerGame.profiler = Profiler()
+    workerGame.recordDir = recordDir
+    workerGame.masterSeed = masterSeed
+    workerGame.trustLegalMoves = trustLegalMoves
+    workerGame.selectAIs(aiNames)
+    workerGame.submitClickedCallback()
+
+##
+# playWorkerGame
+#
+# Description: plays one game of a parallel tournament in a worker process.
+#
+# Parameters:
+#   task - the game's number in the tournament and the (player one id,
+#          player two id) tuple to play (tuple)
+#
+# Returns: a (winner playerId, loser playerId, call timings, legal move cache
+#   hits, misses) tuple, where the timings are the samples of the worker's
+#   Profiler and the hits and misses those of AIPlayerUtils.legalMoveCache,
+#   both for this game
+##
+def playWorkerGame(task):
+    gameNumber, pairing = task
+    workerGame.gameNumber = gameNumber
+    players = workerGame.players
+    cache = AIPlayerUtils.legalMoveCache
+    hits = cache.hits
+    misses = cache.misses
+    winner, loser = workerGame.playGame(players[pairing[0]][0], players[pairing[1]][0])
+    samples = workerGame.profiler.samples
+    workerGame.profiler.reset()
+    return (winner, loser, samples, cache.hits - hits, cache.misses - misses)
+
+##
+# main
+#
+# parses the command line and runs a headless tournament.  The arguments match
+# the "-t" option of Game.py except that more than two AIs may be given.
+##
+def main(argv):
+    if len(argv) < 4 or argv[1].lower() != "-t":
+        print "Usage: python HeadlessGame.py -t <AIName1> <AIName2> [<AIName3> ...] [-n <number of games>] [-p <processes>] [-isolate] [-json <file>] [-record <dir>] [-seed <n>] [-trusted] [-v]"
+        return 1
+
+    numGames = 10
+    processes = None
+    parallel = False
+    verbose = False
+    isolate = False
+    jsonPath = None
+    recordDir = None
+    masterSeed = None
+    trustLegalMoves = False
+    aiNames = []
+    index = 2
+    while index < len(argv):
+        arg = argv[index]
+        if arg.lower() == "-n" and index + 1 < len(argv):
+            try:
+                numGames = int(argv[index + 1])
+            except ValueError:
+                print "ERROR: Please enter a number after -n "
+                return 1
+            index += 2
+        elif arg.lower() == "-p":
+            #"-p" alone uses one worker per core
+            parallel = True
+            index += 1
+            if index < len(argv) and argv[index].isdigit():
+                processes = int(argv[index])
+                index += 1
+        elif arg.lower() == "-v":
+            verbose = True
+            index += 1
+        elif arg.lower() == "-isolate":
+            isolate = True
+            index += 1
+        elif arg.lower() == "-trusted":
+            trustLegalMoves = True
+            index += 1
+        elif arg.lower() == "-json" and index + 1 < len(argv):
+            jsonPath = argv[index + 1]
+            index += 2
+        elif arg.lower() == "-record" and index + 1 < len(argv):
+            recordDir = argv[index + 1]
+            index += 2
+        elif arg.lower() == "-seed" and index + 1 < len(argv):
+            try:
+                masterSeed = long(argv[index + 1])
+            except ValueError:
+                print "ERROR: Please enter a number after -seed "
+                return 1
+            index += 2
+        else:
+            aiNames.append(arg)
+            index += 1
+
+    if len(aiNames) < 2:
+        print "ERROR: Please specify at least two AIs."
+        return 1
+
+    if parallel and isolate:
+        #pool workers are daemons, which may not start processes of their own
+        print "ERROR: -isolate can not be combined with -p"
+        return 1
+
+    game = HeadlessGame(verbose, isolate)
+    game.profiler = Profiler()
+    if recordDir != None:
+        if not os.path.isdir(recordDir):
+            os.makedirs(recordDir)
+        game.recordDir = recordDir
+    #a tournament is always seeded, so that any run can be played again
+    if masterSeed == None:
+        masterSeed = newSeed()
+    game.masterSeed = masterSeed
+    game.trustLegalMoves = trustLegalMoves
+    print "seed: " + str(masterSeed)
+    startTime = time.time()
+    if parallel:
+        scores = game.playParallelTournament(aiNames, numGames, processes)
+    else:
+        scores = game.playTournament(aiNames, numGames)
+    elapsed = time.time() - startTime
+    if scores == None:
+        return 1
+
+    game.printScores(scores)
+    totalGames = sum([row[1] for row in scores])
+    print "%d games in %.2fs (%.1f games/s)" % (totalGames, elapsed, totalGames / max(elapsed, 1e-9))
+    print
+    game.profiler.printSummary()
+    #AIs in worker processes of their own (-isolate) keep their counts there
+    cache = AIPlayerUtils.legalMoveCache
+    lookups = cache.hits + cache.misses
+    if lookups > 0:
+        print
+        print "legal move cache: %d hits, %d misses (%.1f%% hits)" % (cache.hits, cache.misses, 100.0 * cache.hits / lookups)
+    if jsonPath != None:
+        game.profiler.exportJSON(jsonPath)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
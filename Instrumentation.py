@@ -0,0 +1,170 @@
+import time, json, math
+
+##
+# Instrumentation.py
+#
+# Latency bookkeeping for the calls the game loop makes on behalf of each AI
+# (getPlacement, getMove, getAttack, registerWin, and the engine's own
+# isValidMove and state clone).  Game holds a NullProfiler unless profiling
+# was asked for, so an unprofiled game only pays for two empty method calls.
+#
+# Usage:
+#   startTime = profiler.start()
+#   move = player.getMove(state)
+#   profiler.stop(startTime, player.author, "getMove")
+##
+
+##
+#Profiler
+#Description: Records how long each call took, grouped by AI and call name.
+#
+#Variables:
+#   samples - the durations (in seconds) recorded for each (author, call name)
+##
+class Profiler(object):
+
+    ##
+    #__init__
+    #Description: Creates an empty Profiler
+    ##
+    def __init__(self):
+        self.samples = {}
+
+    ##
+    #start
+    #Description: marks the beginning of a call
+    #
+    #Return: the start time to pass to stop
+    ##
+    def start(self):
+        return time.time()
+
+    ##
+    #stop
+    #Description: records a call that began at startTime
+    #
+    #Parameters:
+    #   startTime - what start returned
+    #   author - the AI the call was made for (string)
+    #   name - the name of the call (string)
+    ##
+    def stop(self, startTime, author, name):
+        elapsed = time.time() - startTime
+        key = (author, name)
+        samples = self.samples.get(key)
+        if samples == None:
+            samples = self.samples[key] = []
+        samples.append(elapsed)
+
+    ##
+    #merge
+    #Description: adds samples recorded elsewhere, e.g. by the Profiler of a
+    #   worker process
+    #
+    #Parameters:
+    #   samples - a Profiler's samples dict
+    ##
+    def merge(self, samples):
+        for key, durations in samples.iteritems():
+            self.samples.setdefault(key, []).extend(durations)
+
+    ##
+    #reset
+    #Description: discards everything recorded so far
+    ##
+    def reset(self):
+        self.samples = {}
+
+    ##
+    #summary
+    #Description: the statistics of every (author, call name) recorded
+    #
+    #Return: a list of dicts with keys author, call, count, total, p50, p95
+    #   and p99 (times in seconds), sorted by author then call
+    ##
+    def summary(self):
+        rows = []
+        for key in sorted(self.samples.keys()):
+            durations = sorted(self.samples[key])
+            rows.append({
+                'author': key[0],
+                'call': key[1],
+                'count': len(durations),
+                'total': sum(durations),
+                'p50': percentile(durations, 50),
+                'p95': percentile(durations, 95),
+                'p99': percentile(durations, 99)})
+        return rows
+
+    ##
+    #printSummary
+    #Description: prints the summary as a table in the style of
+    #   Game.printTournament (latencies in milliseconds)
+    ##
+    def printSummary(self):
+        columns = ['AI', 'Call', 'Count', 'Total (s)', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)']
+        row_format = "{:>15}" * (len(columns))
+        print row_format.format(*columns)
+        for row in self.summary():
+            print row_format.format(row['author'], row['call'], row['count'],
+                                    "%.3f" % row['total'], "%.3f" % (row['p50'] * 1000),
+                                    "%.3f" % (row['p95'] * 1000), "%.3f" % (row['p99'] * 1000))
+
+    ##
+    #exportJSON
+    #Description: writes the summary to a file as JSON
+    #
+    #Parameters:
+    #   path - the file to write (string)
+    ##
+    def exportJSON(self, path):
+        f = open(path, "w")
+        try:
+            json.dump(self.summary(), f, indent = 2)
+        finally:
+            f.close()
+
+##
+#NullProfiler
+#Description: A Profiler that records nothing
+##
+class NullProfiler(object):
+    samples = {}
+
+    def start(self):
+        return None
+
+    def stop(self, startTime, author, name):
+        pass
+
+    def merge(self, samples):
+        pass
+
+    def reset(self):
+        pass
+
+    def summary(self):
+        return []
+
+    def printSummary(self):
+        pass
+
+    def exportJSON(self, path):
+        pass
+
+##
+# percentile
+#
+# Description: nearest-rank percentile of sorted values
+#
+# Parameters:
+#   values - the values, in ascending order (list)
+#   percent - the percentile to find, 0 to 100 (number)
+#
+# Return: the value at that percentile, or 0 if there are no values
+##
+def percentile(values, percent):
+    if len(values) == 0:
+        return 0
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(0, min(len(values) - 1, rank))]
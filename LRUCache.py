@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+##
+#LRUCache
+#Description: A dictionary that holds at most maxSize entries.  When it is
+#   full, adding an entry evicts the one that was used least recently.
+#
+#Variables:
+#   maxSize - the most entries kept at once (int)
+#   entries - the entries, least recently used first (OrderedDict)
+#   hits, misses - lookup counts (int)
+##
+class LRUCache(object):
+
+    ##
+    #__init__
+    #Description: Creates an empty cache
+    #
+    #Parameters:
+    #   maxSize - the most entries kept at once (int)
+    ##
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    ##
+    #get
+    #Description: looks up an entry and marks it as the most recently used
+    #
+    #Parameters:
+    #   key - the key of the entry (hashable)
+    #
+    #Return: the value, or None if there is no entry for the key
+    ##
+    def get(self, key):
+        value = self.entries.pop(key, None)
+        if value == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[key] = value
+        return value
+
+    ##
+    #put
+    #Description: adds (or replaces) an entry, evicting the least recently
+    #   used entry if the cache is full
+    #
+    #Parameters:
+    #   key - the key of the entry (hashable)
+    #   value - the value to store, which must not be None
+    ##
+    def put(self, key, value):
+        if self.entries.pop(key, None) == None and len(self.entries) >= self.maxSize:
+            self.entries.popitem(False)
+        self.entries[key] = value
+
+    ##
+    #clear
+    #Description: empties the cache
+    ##
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
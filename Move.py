@@ -8,6 +8,8 @@ from Constants import *
 #   moveType - This represents the type of move the player has made(moveAnt,build and endTurn)
 #   coordList - The list of coordinates representing the path to take, does not include fromCoord
 #   buildType - This identifies the type of a unit(only relevant to Moves of type build)
+#   stamp - Marks a move listed by listAllLegalMoves for a state the game handed out,
+#       so that the game can skip checking it (see RulesEngine.stampMoves)
 ##
 class Move(object):
 
@@ -24,6 +26,7 @@ class Move(object):
         self.moveType = inputMoveType
         self.coordList = inputCoordList
         self.buildType = inputBuildType
+        self.stamp = None
     
 
     ##
@@ -0,0 +1,101 @@
+##
+#NullUserInterface
+#Description: A stand-in for UserInterface that draws nothing and polls no
+#   events.  It carries the same attributes that Game reads and writes on its
+#   ui so that the game loop can run on machines without pygame or a display.
+#
+##
+import time
+
+##
+#NullUserInterface
+#Description: class that accepts every call Game makes on a UserInterface and
+#   does nothing with it.
+#
+#Variables:
+#   lastNotification - the most recent message Game tried to show the user.(string)
+##
+class NullUserInterface(object):
+    ##
+    #__init__
+    #Description: Creates a new NullUserInterface
+    ##
+    def __init__(self):
+        self.initAssets()
+
+    ##
+    #notify
+    #Description: remembers the message that would have been displayed.
+    #
+    #Parameters:
+    #   message - The message to be relayed to the user.(string)
+    ##
+    def notify(self, message):
+        self.lastNotification = message
+
+    ##
+    #drawBoard
+    #Description: Nothing to draw and no events to handle.
+    #
+    #Parameters:
+    #   currentState - The state of the board to draw as a GameState.(GameState)
+    #   mode - The current game mode.(int)
+    ##
+    def drawBoard(self, currentState, mode):
+        pass
+
+    ##
+    #drawBoardIdle
+    #Description: Nothing to draw and no input to wait for.
+    #
+    #Parameters:
+    #   currentState - The state of the board to draw as a GameState.(GameState)
+    #   mode - The current game mode.(int)
+    ##
+    def drawBoardIdle(self, currentState, mode):
+        pass
+
+    ##
+    #initAssets
+    #Description: initializes the same game-facing attributes as
+    #   UserInterface.initAssets, minus all of the textures and fonts.
+    ##
+    def initAssets(self):
+        #Button tables in the same [position, state, callback] layout Game expects.
+        self.buttons = {
+        'Start':[None, 1, None],
+        'Tournament':[None, 1, None],
+        'Human vs AI':[None, 1, None],
+        'AI vs AI':[None, 1, None]
+        }
+        self.humanButtons = {
+        'Build':[None, 1, None],
+        'End':[None, 1, None]
+        }
+        self.aiButtons = {
+        'Next':[None, 1, None],
+        'Continue':[None, 1, None]
+        }
+        self.antButtons = {
+        'Worker':[None, 1, None],
+        'Drone':[None, 1, None],
+        'Soldier':[None, 1, None],
+        'Ranged Soldier':[None, 1, None],
+        'None':[None, 1, None]
+        }
+        self.submitSelected = {
+        'Submit AIs':[None, 1, None]
+        }
+        self.locationClicked = None
+        self.checkBoxClicked = None
+        self.textBoxContent = ''
+        self.buildAntMenu = False
+        self.lastNotification = ''
+        self.coordList = []
+        self.validCoordList = []
+        self.attackList = []
+        self.tournamentScores = []
+        self.tournamentStartTime = time.clock()
+        self.tournamentInProgress = False
+        self.choosingAIs = False
+        self.allAIs = []
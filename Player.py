@@ -1,3 +1,5 @@
+import random
+
 ##
 #Player
 #Description: The responsbility of this class is to interact with the game by
@@ -6,6 +8,8 @@
 #
 #Variables:
 #   playerId - The id of the player.
+#   random - The player's own random number generator (random.Random).  Use it
+#       instead of the random module so that seeded games can be repeated.
 ##
 class Player(object):
 
@@ -19,6 +23,7 @@ class Player(object):
     def __init__(self, inputPlayerId, inputAuthor):
         self.playerId = inputPlayerId
         self.author = inputAuthor
+        self.random = random.Random()
     
     ##
     #getPlacement
@@ -70,3 +75,14 @@ class Player(object):
     def registerWin(self, hasWon):
         #method templaste, not implemented
         pass
+
+    ##
+    #seed
+    #Description: Seeds the player's random number generator. The game calls this
+    #   before each game with a seed derived from the tournament's master seed.
+    #
+    #Parameters:
+    #   seed - the seed to use (int)
+    ##
+    def seed(self, seed):
+        self.random.seed(seed)
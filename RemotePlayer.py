@@ -0,0 +1,192 @@
+import multiprocessing, traceback
+from Player import Player
+from Constants import *
+
+##
+#AITimeoutError
+#Description: Raised when an AI running in a RemotePlayer's worker process
+#   doesn't answer a call within its deadline.
+#
+#Variables:
+#   author - the author of the AI that timed out (string)
+#   methodName - the call that timed out, e.g. "getMove" (string)
+#   timeout - the deadline that was missed, in seconds (float)
+##
+class AITimeoutError(Exception):
+    def __init__(self, author, methodName, timeout):
+        super(AITimeoutError, self).__init__("%s did not return from %s within %s seconds" % (author, methodName, timeout))
+        self.author = author
+        self.methodName = methodName
+        self.timeout = timeout
+
+##
+#RemoteAIError
+#Description: Raised when an AI running in a RemotePlayer's worker process
+#   raises an exception.  The message holds the worker's traceback.
+##
+class RemoteAIError(Exception):
+    pass
+
+##
+#RemotePlayer
+#Description: Runs an AI player in a worker process of its own and forwards
+#   the Player calls to it over a pipe, so that a slow AI can be timed out
+#   instead of stalling the game.  Each call must return within timeout
+#   seconds or AITimeoutError is raised; the stuck worker is then killed and a
+#   fresh one (with a fresh copy of the AI) is started on the next call.
+#
+#   The worker is forked from the current process and so starts with the AI
+#   exactly as it is when the first call is made.  Only the arguments and the
+#   result cross the pipe.
+#
+#Variables:
+#   player - the AI as it was before the worker started (Player)
+#   timeout - seconds allowed per call (float)
+##
+class RemotePlayer(Player):
+
+    ##
+    #__init__
+    #Description: Wraps an AI player
+    #
+    #Parameters:
+    #   player - the AI to run out of process (Player)
+    #   timeout - seconds allowed per call (float)
+    ##
+    def __init__(self, player, timeout = AI_MOVE_TIMEOUT):
+        super(RemotePlayer, self).__init__(player.playerId, player.author)
+        self.player = player
+        self.timeout = timeout
+        self.process = None
+        self.connection = None
+
+    def getPlacement(self, currentState):
+        return self.call("getPlacement", (currentState,))
+
+    def getMove(self, currentState):
+        return self.call("getMove", (currentState,))
+
+    def getAttack(self, currentState, attackingAnt, enemyLocations):
+        return self.call("getAttack", (currentState, attackingAnt, enemyLocations))
+
+    ##
+    #seed
+    #Description: seeds the AI's random number generator, both here (for a
+    #   worker started later) and in the running worker
+    ##
+    def seed(self, seed):
+        self.player.seed(seed)
+        if self.process != None and self.process.is_alive():
+            return self.call("seed", (seed,))
+
+    ##
+    #registerWin
+    #Description: forwards the result of the game.  The game is already over,
+    #   so an AI that fails to answer in time is only restarted.
+    ##
+    def registerWin(self, hasWon):
+        try:
+            return self.call("registerWin", (hasWon,))
+        except AITimeoutError as e:
+            print "AI ERROR: " + str(e)
+
+    ##
+    #call
+    #Description: calls a method of the AI in the worker process
+    #
+    #Parameters:
+    #   methodName - the Player method to call (string)
+    #   args - its arguments (tuple)
+    #
+    #Return: what the method returned
+    ##
+    def call(self, methodName, args):
+        if self.process == None or not self.process.is_alive():
+            self.start()
+
+        #the game hands out player ids after the worker may have started
+        self.connection.send((methodName, args, self.playerId))
+        if not self.connection.poll(self.timeout):
+            self.stop(False)
+            raise AITimeoutError(self.author, methodName, self.timeout)
+
+        try:
+            ok, result = self.connection.recv()
+        except EOFError:
+            #the worker died without answering
+            self.stop(False)
+            raise RemoteAIError(self.author + " exited during " + methodName)
+        if not ok:
+            raise RemoteAIError(result)
+        return result
+
+    ##
+    #start
+    #Description: starts the worker process
+    ##
+    def start(self):
+        self.connection, workerConnection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target = serveAI, args = (workerConnection, self.player))
+        self.process.daemon = True
+        self.process.start()
+        workerConnection.close()
+
+    ##
+    #stop
+    #Description: shuts the worker process down
+    #
+    #Parameters:
+    #   graceful - ask the worker to exit rather than killing it (boolean)
+    ##
+    def stop(self, graceful = True):
+        if self.process == None:
+            return
+        if graceful and self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except IOError:
+                pass
+            self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    ##
+    #__getstate__
+    #Description: a RemotePlayer is pickled as just its AI (the worker and
+    #   pipe can't be), so that a copy starts its own worker when first used.
+    ##
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['process'] = None
+        state['connection'] = None
+        return state
+
+
+##
+# serveAI
+#
+# Description: the worker process loop.  Answers calls until it receives None.
+#
+# Parameters:
+#   connection - the worker's end of the pipe (Connection)
+#   player - the AI to call (Player)
+##
+def serveAI(connection, player):
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request == None:
+            return
+        methodName, args, playerId = request
+        player.playerId = playerId
+        try:
+            response = (True, getattr(player, methodName)(*args))
+        except Exception:
+            response = (False, traceback.format_exc())
+        connection.send(response)
@@ -0,0 +1,151 @@
+import sys, cPickle
+from GameRecord import readGameRecord, RecordPlayback
+from AIPlayerUtils import asciiPrintState
+
+##
+# Replay.py
+#
+# Random access to the states of a recorded game (see GameRecord.py), for
+# debugging a game after the fact without running the AIs again.  The record
+# is played through once, without AIs or UI, taking a snapshot (keyframe)
+# every so many plies; the state at any ply is then rebuilt from the nearest
+# keyframe before it.  A ply here is one recorded event: a setup placement,
+# a move or an attack.
+#
+# Usage:  python Replay.py <record file> [<ply>]
+#   prints the board at the given ply (by default the end of the game)
+##
+
+#plies between keyframes
+KEYFRAME_INTERVAL = 64
+
+##
+#Replay
+#Description: Rebuilds the state of a recorded game at any ply.
+#
+#Variables:
+#   record - the game being replayed (GameRecord)
+#   keyframeInterval - plies between keyframes (int)
+#   keyframes - pickled RecordPlaybacks at plies 0, keyframeInterval,
+#               2 * keyframeInterval, ... (string[])
+#   length - the number of plies in the game (int)
+##
+class Replay(object):
+
+    ##
+    #__init__
+    #Description: Plays the whole record once to take the keyframes
+    #
+    #Parameters:
+    #   record - the game to replay (GameRecord)
+    #   keyframeInterval - plies between keyframes (int)
+    ##
+    def __init__(self, record, keyframeInterval = KEYFRAME_INTERVAL):
+        self.record = record
+        self.keyframeInterval = keyframeInterval
+        self.length = len(record.events)
+        self.keyframes = []
+        playback = RecordPlayback()
+        for event in record.events:
+            if playback.ply % keyframeInterval == 0:
+                self.keyframes.append(cPickle.dumps(playback, 2))
+            playback.apply(event)
+        if playback.ply % keyframeInterval == 0:
+            self.keyframes.append(cPickle.dumps(playback, 2))
+        self.finalState = playback.state
+
+    ##
+    #getPlayback
+    #Description: restores the keyframe at or before a ply and plays on to it
+    #
+    #Parameters:
+    #   ply - the ply to stop at, from 0 (before the first placement) to length (int)
+    #
+    #Return: a RecordPlayback standing at that ply (RecordPlayback)
+    ##
+    def getPlayback(self, ply):
+        if ply < 0 or ply > self.length:
+            raise IndexError("ply %d is outside the game (0 to %d)" % (ply, self.length))
+        playback = cPickle.loads(self.keyframes[ply / self.keyframeInterval])
+        events = self.record.events
+        while playback.ply < ply:
+            playback.apply(events[playback.ply])
+        return playback
+
+    ##
+    #stateAt
+    #Description: the state of the game after a number of plies.  Each call
+    #   returns a new GameState that the caller may change freely.
+    #
+    #Parameters:
+    #   ply - the number of plies played, from 0 to length (int)
+    #
+    #Return: the state (GameState)
+    ##
+    def stateAt(self, ply):
+        return self.getPlayback(ply).state
+
+    ##
+    #states
+    #Description: steps through the game one ply at a time
+    #
+    #Parameters:
+    #   start - the first ply to yield (int)
+    #   stop - the ply to stop before, or None to go to the end (int)
+    #
+    #Return: a generator of (ply, GameState) tuples.  The same GameState is
+    #   updated in place between steps, so it must be cloned to be kept.
+    ##
+    def states(self, start = 0, stop = None):
+        if stop == None or stop > self.length + 1:
+            stop = self.length + 1
+        if start >= stop:
+            return
+        playback = self.getPlayback(start)
+        events = self.record.events
+        while True:
+            yield (playback.ply, playback.state)
+            if playback.ply + 1 >= stop:
+                return
+            playback.apply(events[playback.ply])
+
+
+##
+# main
+#
+# Description: prints a recorded game's board at a given ply
+#
+# Parameters:
+#   argv - the command line (string[])
+#
+# Return: the exit status (int)
+##
+def main(argv):
+    if len(argv) < 2:
+        print "Usage: python Replay.py <record file> [<ply>]"
+        return 1
+
+    replay = Replay(readGameRecord(argv[1]))
+    ply = replay.length
+    if len(argv) > 2:
+        try:
+            ply = int(argv[2])
+        except ValueError:
+            print "ERROR: Please enter a number for the ply"
+            return 1
+        if ply < 0 or ply > replay.length:
+            print "ERROR: The game has plies 0 to " + str(replay.length)
+            return 1
+
+    record = replay.record
+    print record.authors[0] + " vs. " + record.authors[1]
+    if record.seed != None:
+        print "seed: " + str(record.seed)
+    if record.finished and record.winner != None:
+        print "winner: " + record.authors[record.winner]
+    print "ply " + str(ply) + " of " + str(replay.length)
+    asciiPrintState(replay.stateAt(ply))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
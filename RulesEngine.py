@@ -0,0 +1,579 @@
+from Constants import *
+from Ant import Ant, UNIT_STATS
+from Construction import CONSTR_STATS
+from Building import Building
+from Move import Move
+
+##
+# RulesEngine.py
+#
+# The rules of the play phase, free of any UI: whether a move, attack or
+# setup placement is legal, what it does to the state and who has won.  Game
+# runs every move of a real game through here, and an AI can use the same
+# functions (e.g. nextState) to look ahead with exactly the game's rules.
+#
+# The functions work on full GameStates (with a board), in whichever
+# orientation the state is in: the rules are the same from both sides.
+# A move that is already known to be legal (because it came out of
+# listAllLegalMoves, or Game has just checked it) can be applied with
+# trusted = True to skip checking it again.
+##
+
+##
+#IllegalMoveError
+#Description: Raised for a move or attack that breaks the rules.
+#
+#Variables:
+#   details - lines explaining what is wrong (string[])
+#   notice - a short message for a human player, or None (string)
+##
+class IllegalMoveError(Exception):
+    def __init__(self, details, notice = None):
+        super(IllegalMoveError, self).__init__("\n".join(details))
+        self.details = details
+        self.notice = notice
+
+##
+# isValidCoord
+#
+# Description: whether a coord is a well-formed board location
+#
+# Parameters:
+#   coord - the coord to check ((int, int))
+#
+# Return: True if the coordinate is between (0,0) and (9,9)
+##
+def isValidCoord(coord):
+    #check for well-formed coord
+    if type(coord) != tuple or len(coord) != 2 or type(coord[0]) != int or type(coord[1]) != int:
+        return False
+
+    #check boundaries
+    if coord[0] < 0 or coord[1] < 0 or coord[0] >= BOARD_LENGTH or coord[1] >= BOARD_LENGTH:
+        return False
+
+    return True
+
+##
+# isInHomeTerritory
+#
+# Description: whether a coord (as the player sees the board) is in the
+# player's own territory
+#
+# Return: True if it is and False otherwise
+##
+def isInHomeTerritory(coord):
+    if not isValidCoord(coord):
+        return False
+    return coord[1] >= 0 and coord[1] < BOARD_LENGTH / 2 - 1
+
+##
+# isInEnemyTerritory
+#
+# Description: whether a coord (as the player sees the board) is in the
+# player's enemy's territory
+#
+# Return: True if it is and False otherwise
+##
+def isInEnemyTerritory(coord):
+    if not isValidCoord(coord):
+        return False
+    return coord[1] < BOARD_LENGTH and coord[1] >= BOARD_LENGTH / 2 + 1
+
+##
+# isValidPlacement
+#
+# Description: whether constructions may be placed at the given coords
+# during setup
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   items - the items to place (Construction[])
+#   targets - where to place them, as the player sees the board ((int,int)[])
+#
+# Return: None if no target is given, True if the placement is valid and
+#   False if it isn't
+##
+def isValidPlacement(state, items, targets):
+    #check for well-formed input of targets (from players)
+    if type(targets) != list:
+        return False
+    if len(targets) == 0:
+        return None
+    for coord in targets:
+        if not isValidCoord(coord):
+            return False
+
+    for i in range(0, len(targets)):
+        #nobody can place in the center two rows of the board, and only
+        #food goes on the opponent's side
+        if items[i].type == ANTHILL or items[i].type == TUNNEL or items[i].type == GRASS:
+            if not isInHomeTerritory(targets[i]):
+                return False
+        elif items[i].type == FOOD:
+            if not isInEnemyTerritory(targets[i]):
+                return False
+        else:
+            #I don't know what this type is.
+            return False
+
+        #make sure nothing is there yet
+        aTarget = state.coordLookup(targets[i], state.whoseTurn)
+        if not state.board[aTarget[0]][aTarget[1]].constr == None:
+            return False
+
+    return True
+
+##
+# checkMoveStart
+#
+# Description: whether the player to move has an ant at coord that may move
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   coord - the starting point for the move ((int, int))
+#
+# Return: True if it is a valid starting point for a move and False if not
+##
+def checkMoveStart(state, coord):
+    if isValidCoord(coord):
+        antToMove = state.board[coord[0]][coord[1]].ant
+        #check that it's the player's ant and that it hasn't moved
+        if antToMove != None and antToMove.player == state.whoseTurn and not antToMove.hasMoved:
+            return True
+    return False
+
+##
+# checkMovePath
+#
+# Description: whether an ant may step from one location to the next
+# (adjacent and unoccupied)
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   fromCoord - where the ant is ((int, int)), already checked
+#   toCoord - where it steps to ((int, int))
+#
+# Return: True if it is a valid step and False otherwise
+##
+def checkMovePath(state, fromCoord, toCoord):
+    if isValidCoord(toCoord):
+        #check that squares are adjacent (difference on only one axis is 1)
+        if ((abs(fromCoord[0] - toCoord[0]) == 1 and abs(fromCoord[1] - toCoord[1]) == 0) or
+                (abs(fromCoord[0] - toCoord[0]) == 0 and abs(fromCoord[1] - toCoord[1]) == 1)):
+            if state.board[toCoord[0]][toCoord[1]].ant == None:
+                return True
+    return False
+
+##
+# checkBuildStart
+#
+# Description: whether the player to move can build at coord: an empty
+# anthill of theirs (for an ant) or an unmoved worker of theirs on open
+# ground (for a tunnel)
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   coord - the coordinate to build at ((int, int))
+#
+# Return: True if it is a valid build location and False otherwise
+##
+def checkBuildStart(state, coord):
+    if isValidCoord(coord):
+        loc = state.board[coord[0]][coord[1]]
+        if loc.constr != None and loc.constr.type == ANTHILL and loc.ant == None:
+            return loc.constr.player == state.whoseTurn
+        elif loc.ant != None and loc.ant.type == WORKER and loc.constr == None:
+            return loc.ant.player == state.whoseTurn and not loc.ant.hasMoved
+    return False
+
+##
+# validateMove
+#
+# Description: checks that a move is legal for the player whose turn it is
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   move - the move to check (Move)
+#
+# Raises: IllegalMoveError if it isn't
+##
+def validateMove(state, move):
+    #check that the move is well-formed typewise (tuples, ints, etc)
+    if type(move) != Move:
+        raise IllegalMoveError(["ERROR:  player did not supply an object of type 'Move'"])
+    if type(move.moveType) != int:
+        raise IllegalMoveError(["       Move type must be an integer."])
+    #for END type moves, lots we don't need to check
+    if move.moveType == END:
+        return
+    if type(move.coordList) != list or len(move.coordList) == 0:
+        raise IllegalMoveError(["       The coordinate list is empty!"])
+    for index, coord in enumerate(move.coordList):
+        if type(coord) != tuple:
+            raise IllegalMoveError(["       Coordinate at index " + str(index) + " is not a tuple."])
+        if len(coord) != 2:
+            raise IllegalMoveError(["       Coordinate at index " + str(index) + " has " + str(len(coord)) + "entries instead of 2."])
+        if type(coord[0]) != int or type(coord[1]) != int:
+            raise IllegalMoveError(["       Coordinate at index " + str(index) + " contains a value that is not an int."])
+    if move.buildType != None and type(move.buildType) != int:
+        raise IllegalMoveError(["       The buildType must be an integer."])
+
+    if move.moveType == MOVE_ANT:
+        validateAntMove(state, move)
+    elif move.moveType == BUILD:
+        validateBuild(state, move)
+    else:
+        raise IllegalMoveError(["       Move type not a recognized value: " + str(move.moveType)])
+
+##
+# validateAntMove
+#
+# Description: the MOVE_ANT part of validateMove
+##
+def validateAntMove(state, move):
+    firstCoord = move.coordList[0]
+    #check valid start location (good coords and ant ownership)
+    if not checkMoveStart(state, firstCoord):
+        raise IllegalMoveError(["       No ant of the current player's that can move at " + str(firstCoord)])
+
+    antToMove = state.board[firstCoord[0]][firstCoord[1]].ant
+    movePoints = UNIT_STATS[antToMove.type][MOVEMENT]
+    previousCoord = firstCoord
+    for index in xrange(1, len(move.coordList)):
+        coord = move.coordList[index]
+        #if any to-coords are invalid, return invalid move
+        if not checkMovePath(state, previousCoord, coord):
+            raise IllegalMoveError(["       Illegal movement path at index" + str(index - 1)])
+
+        #subtract cost of loc from movement points
+        constrAtLoc = state.board[coord[0]][coord[1]].constr
+        if constrAtLoc == None or antToMove.type == DRONE:
+            movePoints -= 1
+        else:
+            movePoints -= CONSTR_STATS[constrAtLoc.type][MOVE_COST]
+        previousCoord = coord
+
+    #the queen may not leave her territory
+    if antToMove.type == QUEEN:
+        for coord in move.coordList:
+            if coord[1] == BOARD_LENGTH / 2 - 1 or coord[1] == BOARD_LENGTH / 2:
+                raise IllegalMoveError(["       Queen ant may not leave her own territory"])
+
+    #within movement range?
+    if movePoints < 0:
+        raise IllegalMoveError(["       Ant has insufficient movement points for this move"])
+
+##
+# validateBuild
+#
+# Description: the BUILD part of validateMove
+##
+def validateBuild(state, move):
+    #coord list must contain one point for build
+    if len(move.coordList) != 1:
+        raise IllegalMoveError(["       for a BUILD move, the coordinate list should contain exactly 1 coordinate"])
+
+    buildCoord = move.coordList[0]
+    if not checkBuildStart(state, buildCoord):
+        details = ["       Build location invalid.  Possible cause:"]
+        if not isValidCoord(buildCoord):
+            details.append("         - Build location is off the board")
+        else:
+            loc = state.board[buildCoord[0]][buildCoord[1]]
+            if loc.ant == None:
+                details.append("         - Anthill does not belong to current player")
+            elif move.buildType != TUNNEL:
+                details.append("         - Anthill is already occupied")
+            elif loc.ant.hasMoved:
+                details.append("         - Worker ant has already moved this turn")
+            else:
+                details.append("         - Worker ant does not belong to current player")
+        raise IllegalMoveError(details)
+
+    currFood = state.inventories[state.whoseTurn].foodCount
+    if state.board[buildCoord[0]][buildCoord[1]].ant == None:
+        #we know we're building an ant
+        if move.buildType not in (WORKER, DRONE, SOLDIER, R_SOLDIER):
+            raise IllegalMoveError(["       the buildType must be one of:  WORKER, DRONE, SOLDIER or R_SOLDIER."])
+        buildCost = UNIT_STATS[move.buildType][COST]
+        if currFood < buildCost:
+            raise IllegalMoveError(["       Player has " + str(currFood) + " food but needs " + str(buildCost) + " to build this ant"],
+                                   "Requires " + str(buildCost) + " food.")
+    else:
+        #we know we're building a tunnel, which may not be next to food
+        for offset in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            aCoord = (buildCoord[0] + offset[0], buildCoord[1] + offset[1])
+            if isValidCoord(aCoord):
+                constr = state.board[aCoord[0]][aCoord[1]].constr
+                if constr != None and constr.type == FOOD:
+                    raise IllegalMoveError(["       Cannot tunnel build next to food."],
+                                           "Cannot tunnel build next to food.")
+
+        buildCost = CONSTR_STATS[TUNNEL][BUILD_COST]
+        if currFood < buildCost:
+            raise IllegalMoveError(["       Must have at least " + str(buildCost) + " food to build a tunnel."],
+                                   "Requires " + str(buildCost) + " food.")
+
+##
+# applyMove
+#
+# Description: makes a move for the player whose turn it is, changing the
+# state in place.  A MOVE_ANT is not followed by its attack; see
+# listAttackTargets and applyAttack.
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   move - the move to make (Move)
+#   trusted - skip checking that the move is legal (boolean)
+#
+# Return: the ant that moved or was built, or None (Ant)
+#
+# Raises: IllegalMoveError if the move isn't trusted and breaks the rules
+##
+def applyMove(state, move, trusted = False):
+    if not trusted:
+        validateMove(state, move)
+
+    board = state.board
+    whoseTurn = state.whoseTurn
+    currentPlayerInv = state.inventories[whoseTurn]
+    ant = None
+    if move.moveType == MOVE_ANT:
+        startCoord = move.coordList[0]
+        endCoord = move.coordList[-1]
+        #take the ant from the start of the path to its end
+        ant = board[startCoord[0]][startCoord[1]].ant
+        ant.coords = (endCoord[0], endCoord[1])
+        ant.hasMoved = True
+        board[startCoord[0]][startCoord[1]].ant = None
+        board[endCoord[0]][endCoord[1]].ant = ant
+
+    elif move.moveType == BUILD:
+        coord = move.coordList[0]
+        #subtract the cost of the item from the player's food count
+        if move.buildType == TUNNEL:
+            currentPlayerInv.foodCount -= CONSTR_STATS[TUNNEL][BUILD_COST]
+            tunnel = Building(coord, TUNNEL, whoseTurn)
+            board[coord[0]][coord[1]].constr = tunnel
+            currentPlayerInv.constrs.append(tunnel)
+        else:
+            currentPlayerInv.foodCount -= UNIT_STATS[move.buildType][COST]
+            ant = Ant(coord, move.buildType, whoseTurn)
+            ant.hasMoved = True
+            board[coord[0]][coord[1]].ant = ant
+            currentPlayerInv.ants.append(ant)
+
+    else:
+        #end of turn business for ants and constructions
+        for myAnt in currentPlayerInv.ants:
+            constrUnderAnt = board[myAnt.coords[0]][myAnt.coords[1]].constr
+            if constrUnderAnt != None:
+                #an ant that stays on an enemy building wears it down
+                if type(constrUnderAnt) is Building and not myAnt.hasMoved and not constrUnderAnt.player == whoseTurn:
+                    constrUnderAnt.captureHealth -= 1
+                    if constrUnderAnt.captureHealth == 0 and constrUnderAnt.type != ANTHILL:
+                        constrUnderAnt.player = whoseTurn
+                        constrUnderAnt.captureHealth = CONSTR_STATS[constrUnderAnt.type][CAP_HEALTH]
+                #workers on food pick it up
+                elif constrUnderAnt.type == FOOD and myAnt.type == WORKER:
+                    myAnt.carrying = True
+                #and drop it off at the anthill or a tunnel
+                elif (constrUnderAnt.type == ANTHILL or constrUnderAnt.type == TUNNEL) and myAnt.carrying == True:
+                    currentPlayerInv.foodCount += 1
+                    myAnt.carrying = False
+            myAnt.hasMoved = False
+        state.whoseTurn = (whoseTurn + 1) % 2
+
+    state.invalidateCaches()
+    state.zobrist = None
+    return ant
+
+##
+# isValidAttack
+#
+# Description: whether an ant may attack the given location
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   attackingAnt - the ant that is attacking (Ant)
+#   attackCoord - the coordinates of the ant being attacked ((int,int))
+#
+# Return: None if there is no attackCoord, True if the attack is valid and
+#   False if it isn't
+##
+def isValidAttack(state, attackingAnt, attackCoord):
+    if attackCoord == None:
+        return None
+    if not isValidCoord(attackCoord):
+        return False
+
+    attackedAnt = state.board[attackCoord[0]][attackCoord[1]].ant
+    if attackedAnt == None or attackedAnt.player == attackingAnt.player:
+        return False
+
+    #within range?
+    attackRange = UNIT_STATS[attackingAnt.type][RANGE]
+    diffX = attackingAnt.coords[0] - attackCoord[0]
+    diffY = attackingAnt.coords[1] - attackCoord[1]
+    return attackRange ** 2 >= diffX ** 2 + diffY ** 2
+
+##
+# listAttackTargets
+#
+# Description: where an ant that has just moved may attack.  Every ant but
+# a worker must attack one of these if there are any.
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   attackingAnt - the ant that moved (Ant)
+#
+# Return: the coords of the enemy ants in range, in inventory order ((int,int)[])
+##
+def listAttackTargets(state, attackingAnt):
+    if attackingAnt.type == WORKER:
+        return []
+    return [ant.coords for ant in state.inventories[1 - attackingAnt.player].ants
+            if isValidAttack(state, attackingAnt, ant.coords)]
+
+##
+# applyAttack
+#
+# Description: makes an attack, removing the attacked ant if it dies
+#
+# Parameters:
+#   state - the state of the game (GameState)
+#   attackingAnt - the ant that is attacking (Ant)
+#   attackCoord - the coordinates of the ant being attacked ((int,int))
+#   trusted - skip checking that the attack is legal (boolean)
+#
+# Return: True if the attacked ant died
+#
+# Raises: IllegalMoveError if the attack isn't trusted and breaks the rules
+##
+def applyAttack(state, attackingAnt, attackCoord, trusted = False):
+    if not trusted and not isValidAttack(state, attackingAnt, attackCoord):
+        raise IllegalMoveError(["       Illegal attack on " + str(attackCoord)])
+
+    attackedAnt = state.board[attackCoord[0]][attackCoord[1]].ant
+    attackedAnt.health -= UNIT_STATS[attackingAnt.type][ATTACK]
+    killed = attackedAnt.health <= 0
+    if killed:
+        state.board[attackCoord[0]][attackCoord[1]].ant = None
+        state.inventories[attackedAnt.player].ants.remove(attackedAnt)
+        state.invalidateCaches()
+    state.zobrist = None
+    return killed
+
+##
+# hasWon
+#
+# Description: whether the game has ended in victory for a player.  Only the
+# phase and the inventories are looked at, so this works on fastclone'd
+# states and CompactStates too.
+#
+# Parameters:
+#   state - the state of the game
+#   playerId - the player to check (int)
+#
+# Return: True if the player has won
+##
+def hasWon(state, playerId):
+    if state.phase != PLAY_PHASE:
+        return False
+    opponentInv = state.inventories[1 - playerId]
+    return ((opponentInv.getQueen() == None) or
+            (opponentInv.getAnthill().captureHealth <= 0) or
+            (state.inventories[playerId].foodCount >= FOOD_GOAL) or
+            (opponentInv.foodCount == 0 and len(opponentInv.ants) == 1))
+
+##
+# getWinner
+#
+# Return: the id of the player who has won, or None if no one has
+##
+def getWinner(state):
+    for playerId in (PLAYER_ONE, PLAYER_TWO):
+        if hasWon(state, playerId):
+            return playerId
+    return None
+
+##
+# firstTarget
+#
+# Description: the attack choice nextState makes when none is given
+##
+def firstTarget(state, attackingAnt, targets):
+    return targets[0]
+
+##
+# stampMoves
+#
+# Description: stamps moves listed for a state that carries a move token (see
+# Game.getPlayerView) with the token and what the moves were.  Game then
+# makes a stamped move that still matches its stamp without checking it
+# again.  Stamps guard against mistakes, such as a move kept from an earlier
+# turn or changed after it was listed, not against an AI out to cheat: the
+# AI runs in the game's process (or one forked from it) and could forge one.
+#
+# Parameters:
+#   state - the state the moves were listed for (GameState)
+#   moves - the legal moves of that state (Move[])
+##
+def stampMoves(state, moves):
+    token = getattr(state, 'moveToken', None)
+    if token == None:
+        return
+    for move in moves:
+        if move.coordList is None:
+            move.stamp = (token, move.moveType, None, move.buildType)
+        else:
+            move.stamp = (token, move.moveType, tuple(move.coordList), move.buildType)
+
+##
+# isStamped
+#
+# Description: whether a move was stamped for the given token and is
+# unchanged since
+#
+# Parameters:
+#   move - the move a player gave (Move, or anything else)
+#   token - the move token of the state the player was given
+#
+# Return: True if the move can be made without checking it
+##
+def isStamped(move, token):
+    if token == None or type(move) is not Move:
+        return False
+    stamp = getattr(move, 'stamp', None)
+    if stamp == None or stamp[0] != token:
+        return False
+    coordList = move.coordList
+    if type(coordList) is list:
+        coordList = tuple(coordList)
+    elif coordList != None:
+        return False
+    return stamp[1] == move.moveType and stamp[2] == coordList and stamp[3] == move.buildType
+
+##
+# nextState
+#
+# Description: the state after a move, by the game's own rules, including
+# the attack that follows a MOVE_ANT.  The given state is not changed.
+#
+# Parameters:
+#   state - the state of the game, with a board (GameState)
+#   move - a legal move for the player whose turn it is (Move)
+#   chooseAttack - function(state, attackingAnt, targets) returning the coord
+#                  to attack, as a Player's getAttack would (function)
+#
+# Return: the new state (GameState)
+##
+def nextState(state, move, chooseAttack = firstTarget):
+    newState = state.clone()
+    ant = applyMove(newState, move, True)
+    if move.moveType == MOVE_ANT:
+        targets = listAttackTargets(newState, ant)
+        if len(targets) > 0:
+            applyAttack(newState, ant, chooseAttack(newState, ant, targets), True)
+    return newState
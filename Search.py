@@ -0,0 +1,354 @@
+import time
+from Constants import *
+from Ant import UNIT_STATS
+from AIPlayerUtils import *
+from Zobrist import getStateHash, TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from RulesEngine import getWinner, nextState
+from FrozenMove import freezeMove
+
+##
+# Search.py
+#
+# A reusable game tree search for AI players.  It plays out moves with
+# listAllFrozenMoves and getNextStateAdversarial (or, with exactRules, the
+# RulesEngine's nextState), so every ply is a single move (a turn is a series
+# of MOVE_ANT/BUILD moves ending with END).  An AIPlayer
+# supplies an evaluation function and calls Search.getMove from its getMove:
+#
+#   def __init__(self, inputPlayerId):
+#       super(AIPlayer, self).__init__(inputPlayerId, "Searcher")
+#       self.search = Search(myEvaluate, timeLimit = 1.0)
+#
+#   def getMove(self, currentState):
+#       return self.search.getMove(currentState)
+#
+# The search is an iterative deepening alpha-beta.  Each iteration tries the
+# best move of the previous one first, remembers results in a transposition
+# table (keyed by Zobrist hash) and orders the remaining moves by how often
+# they caused cutoffs before (the history heuristic).  Below the root, moves
+# are FrozenMoves, so they serve as history and table keys as they are.
+# There are no chance events in the game, so no expectimax layer is needed.
+#
+# The search plays for whichever player is to move in the state getMove is
+# given.  The game only sets a player's id after creating it (every AI is
+# made as AIPlayer(-1)), so the id can't be fixed when the Search is made.
+##
+
+#value of a won position, from the winner's point of view
+WIN_SCORE = 1000000.0
+
+#fraction of the time budget that may be spent before giving up on a depth,
+#leaving the rest for unwinding the search and for the game's own overhead
+TIME_SAFETY = 0.9
+
+##
+# defaultEvaluate
+#
+# Description: a simple evaluation for players that don't provide their own:
+# food is worth the most, then the health of ants (queen excluded) and of the
+# anthill.
+#
+# Parameters:
+#   state - the state to evaluate
+#   playerId - the player whose point of view is taken (int)
+#
+# Return: the score (float); higher is better for playerId
+##
+def defaultEvaluate(state, playerId):
+    score = 0.0
+    for inv in state.inventories[:2]:
+        sign = 1
+        if inv.player != playerId:
+            sign = -1
+        value = inv.foodCount * 100.0
+        for ant in inv.ants:
+            if ant.type != QUEEN:
+                value += UNIT_STATS[ant.type][COST] * 20.0 + ant.health
+            if ant.carrying:
+                value += 50.0
+        anthill = inv.getAnthill()
+        if anthill != None:
+            value += anthill.captureHealth * 30.0
+        score += sign * value
+    return score
+
+##
+# moveKey
+#
+# Return: a hashable key identifying a move (for move ordering), which is
+#   the move's FrozenMove
+##
+def moveKey(move):
+    return freezeMove(move)
+
+#the bound a value has from the other player's point of view
+FLIPPED_BOUND = { EXACT : EXACT, LOWER_BOUND : UPPER_BOUND, UPPER_BOUND : LOWER_BOUND }
+
+##
+# fromTableValue
+#
+# Description: converts a value and bound between the searching player's
+# point of view and that of the player to move, which is how they are kept
+# in the transposition table (negamax style).  Searches for opposite players
+# can then share a table.  The conversion is its own inverse, so it is used
+# both for storing and for looking up.
+#
+# Parameters:
+#   value - the value (float)
+#   bound - EXACT, LOWER_BOUND or UPPER_BOUND (int)
+#   maximizing - whether the searching player is the one to move (boolean)
+#
+# Return: the converted (value, bound) tuple
+##
+def fromTableValue(value, bound, maximizing):
+    if maximizing:
+        return (value, bound)
+    return (-value, FLIPPED_BOUND[bound])
+
+##
+#SearchTimeout
+#Description: Raised inside the search when the time budget runs out
+##
+class SearchTimeout(Exception):
+    pass
+
+##
+#Search
+#Description: Iterative deepening alpha-beta search for one player.
+#
+#Variables:
+#   playerId - the id of the player searching, taken from the state of
+#              the last getMove (int)
+#   evaluate - function(state, playerId) that scores a state (function)
+#   timeLimit - seconds allowed per move, never more than AI_MOVE_TIMEOUT (float)
+#   maxDepth - the deepest iteration to run, or None for no limit (int)
+#   table - the transposition table (TranspositionTable)
+#   canonical - only search one move per destination of each ant (boolean)
+#   exactRules - play moves out with the game's own rules (boolean)
+#   history - cutoff counts of each move (by FrozenMove), used for move ordering
+#   nodes - the number of states visited by the last getMove (int)
+#   depthReached - the deepest iteration completed by the last getMove (int)
+##
+class Search(object):
+
+    ##
+    #__init__
+    #Description: Creates a new Search
+    #
+    #Parameters:
+    #   evaluate - function(state, playerId) that scores a state (function)
+    #   timeLimit - seconds allowed per move (float)
+    #   maxDepth - the deepest iteration to run, or None for no limit (int)
+    #   table - a transposition table to use, e.g. Zobrist.getSharedTable(),
+    #           or None for a private one.  Values are kept from the point of
+    #           view of the player to move, so Searches that share a table
+    #           must use evaluation functions that agree, with
+    #           evaluate(state, 0) == -evaluate(state, 1) as defaultEvaluate
+    #           has (TranspositionTable)
+    #   canonical - only search one path to each destination of each ant; the
+    #               other paths reach the same positions (boolean)
+    #   exactRules - play moves out with RulesEngine.nextState, which follows
+    #                the game exactly (attacks included) but copies the whole
+    #                board at every node, instead of getNextStateAdversarial's
+    #                faster approximation (boolean)
+    ##
+    def __init__(self, evaluate = defaultEvaluate, timeLimit = AI_MOVE_TIMEOUT,
+                 maxDepth = None, table = None, canonical = True, exactRules = False):
+        self.playerId = None
+        self.evaluate = evaluate
+        self.timeLimit = timeLimit
+        self.maxDepth = maxDepth
+        if table == None:
+            table = TranspositionTable()
+        self.table = table
+        self.canonical = canonical
+        self.exactRules = exactRules
+        self.history = {}
+        self.nodes = 0
+        self.depthReached = 0
+        self.deadline = None
+
+    ##
+    #getMove
+    #Description: searches for the best move within the time budget
+    #
+    #Parameters:
+    #   currentState - the state to move from (GameState)
+    #
+    #Return: the best Move found
+    ##
+    def getMove(self, currentState):
+        budget = min(self.timeLimit, AI_MOVE_TIMEOUT) * TIME_SAFETY
+        self.deadline = time.time() + budget
+        #search for the player to move, whatever id the AI was made with
+        self.playerId = currentState.whoseTurn
+        self.nodes = 0
+        self.depthReached = 0
+        self.table.newSearch()
+        #let older cutoffs count for less than those of this search
+        for moveId in self.history.keys():
+            self.history[moveId] /= 2
+
+        #hash the root so that every state below it is hashed incrementally
+        if self.exactRules:
+            root = currentState.clone()
+        else:
+            root = currentState.fastclone()
+        getStateHash(root)
+
+        #list the root moves from the state the game handed out, so that the
+        #game can trust the one returned (see RulesEngine.stampMoves)
+        legalMoves = listAllLegalMoves(currentState, self.canonical)
+        moves = [freezeMove(move, False) for move in legalMoves]
+        found = dict(zip(moves, legalMoves))
+        moves = self.orderMoves(root, moves, None)
+        bestMove = moves[0]
+        depth = 1
+        while self.maxDepth == None or depth <= self.maxDepth:
+            try:
+                value, move = self.searchRoot(root, moves, depth)
+            except SearchTimeout:
+                break
+            bestMove = move
+            self.depthReached = depth
+            #search the best move first next time
+            moves.remove(move)
+            moves.insert(0, move)
+            #nothing deeper can change a decided game
+            if abs(value) >= WIN_SCORE / 2:
+                break
+            depth += 1
+        return found[bestMove]
+
+    ##
+    #searchRoot
+    #Description: one alpha-beta iteration over the root moves
+    #
+    #Return: a (value, best FrozenMove) tuple
+    ##
+    def searchRoot(self, root, moves, depth):
+        maximizing = root.whoseTurn == self.playerId
+        alpha = -WIN_SCORE * 2
+        beta = WIN_SCORE * 2
+        bestMove = None
+        for move in moves:
+            child = self.makeChild(root, move)
+            value = self.alphaBeta(child, depth - 1, alpha, beta)
+            if bestMove == None or (maximizing and value > alpha) or (not maximizing and value < beta):
+                bestMove = move
+                if maximizing:
+                    alpha = value
+                else:
+                    beta = value
+        if maximizing:
+            return (alpha, bestMove)
+        return (beta, bestMove)
+
+    ##
+    #alphaBeta
+    #Description: the value of a state searched to a given depth.  The
+    #   searching player maximizes and the opponent minimizes.
+    #
+    #Parameters:
+    #   state - the state to search (GameState)
+    #   depth - plies left to search (int)
+    #   alpha - the value the maximizing player is already assured of (float)
+    #   beta - the value the minimizing player is already assured of (float)
+    #
+    #Return: the value of the state (float)
+    ##
+    def alphaBeta(self, state, depth, alpha, beta):
+        self.nodes += 1
+        if time.time() > self.deadline:
+            raise SearchTimeout()
+
+        winner = getWinner(state)
+        if winner != None:
+            #prefer quicker wins and slower losses
+            if winner == self.playerId:
+                return WIN_SCORE + depth
+            return -WIN_SCORE - depth
+        if depth <= 0:
+            return self.evaluate(state, self.playerId)
+
+        maximizing = state.whoseTurn == self.playerId
+
+        #see whether this state was already searched deeply enough
+        key = getStateHash(state)
+        entry = self.table.lookup(key)
+        tableMove = None
+        if entry != None:
+            tableMove = entry.move
+            if entry.depth >= depth:
+                value, bound = fromTableValue(entry.value, entry.bound, maximizing)
+                if bound == EXACT:
+                    return value
+                elif bound == LOWER_BOUND and value >= beta:
+                    return value
+                elif bound == UPPER_BOUND and value <= alpha:
+                    return value
+
+        originalAlpha = alpha
+        originalBeta = beta
+        bestValue = None
+        bestMove = None
+        for move in self.orderMoves(state, list(listAllFrozenMoves(state, self.canonical)), tableMove):
+            child = self.makeChild(state, move)
+            value = self.alphaBeta(child, depth - 1, alpha, beta)
+            if maximizing:
+                if bestValue == None or value > bestValue:
+                    bestValue = value
+                    bestMove = move
+                alpha = max(alpha, value)
+            else:
+                if bestValue == None or value < bestValue:
+                    bestValue = value
+                    bestMove = move
+                beta = min(beta, value)
+            if alpha >= beta:
+                #remember moves that cause cutoffs to try them early elsewhere
+                self.history[move] = self.history.get(move, 0) + depth * depth
+                break
+
+        if bestValue <= originalAlpha:
+            bound = UPPER_BOUND
+        elif bestValue >= originalBeta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        value, bound = fromTableValue(bestValue, bound, maximizing)
+        self.table.store(key, depth, value, bound, bestMove)
+        return bestValue
+
+    ##
+    #makeChild
+    #Description: the state after a move
+    ##
+    def makeChild(self, state, move):
+        if self.exactRules:
+            return nextState(state, move)
+        return getNextStateAdversarial(state, move)
+
+    ##
+    #orderMoves
+    #Description: sorts moves so that the most promising are searched first:
+    #   the transposition table's best move, then by history score.
+    #
+    #Parameters:
+    #   state - the state the moves are made from (GameState)
+    #   moves - the legal moves (FrozenMove[])
+    #   tableMove - the best move stored for this state, or None (FrozenMove)
+    #
+    #Return: the ordered moves (FrozenMove[])
+    ##
+    def orderMoves(self, state, moves, tableMove):
+        history = self.history
+        moves.sort(key = lambda move: -history.get(move, 0))
+        if tableMove != None:
+            #the table may be shared with searches that stored Moves
+            tableMove = moveKey(tableMove)
+            for index in xrange(0, len(moves)):
+                if moves[index] is tableMove:
+                    moves.insert(0, moves.pop(index))
+                    break
+        return moves
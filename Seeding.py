@@ -0,0 +1,38 @@
+import hashlib, random
+
+##
+# Seeding.py
+#
+# Seeds for reproducible games.  A tournament has one master seed; each game
+# gets a seed derived from the master seed and the game's number, and the game
+# and each of its players get their own random streams derived from the game
+# seed.  Derived seeds only depend on their inputs, so a game plays out the
+# same whichever process (or machine) it is played in.
+##
+
+##
+# deriveSeed
+#
+# Description: derives a seed for a sub-stream from a parent seed
+#
+# Parameters:
+#   seed - the parent seed (int)
+#   label - names the sub-stream, e.g. a game number or a player side (any
+#           value with a stable str)
+#
+# Return: a 64 bit seed (long)
+##
+def deriveSeed(seed, label):
+    digest = hashlib.sha256("%d/%s" % (seed, label)).digest()
+    return long(digest[:8].encode("hex"), 16)
+
+##
+# newSeed
+#
+# Description: picks a fresh seed from the operating system, for when no
+# master seed was given (the seed is still recorded so the run can be repeated)
+#
+# Return: a 64 bit seed (long)
+##
+def newSeed():
+    return random.SystemRandom().getrandbits(64)
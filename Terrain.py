@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from Constants import *
+from Construction import CONSTR_STATS
+
+#the most terrain layouts kept in the module cache at once
+MAX_CACHED_TERRAINS = 64
+
+#every terrain built so far, keyed by its move cost grid (most recent last)
+terrainCache = OrderedDict()
+
+##
+#Terrain
+#Description: The movement cost of every cell on the board along with a lazily
+#   filled table of the distances between cells.  Ants are ignored, so the
+#   table only depends on where the grass and other constructions are.  Those
+#   hardly ever move after setup, so one Terrain is shared by every state that
+#   has the same layout (see getTerrain).
+#
+#   Distances are exactly those stepsToReach has always returned: a row of the
+#   table is filled by running the same search from the source to completion
+#   and recording the cost of each cell as it is reached.
+#
+#Variables:
+#   costs - the move cost of each cell, indexed by x * BOARD_LENGTH + y (int[])
+#   distances - the distance rows computed so far, keyed by source cell index
+##
+class Terrain(object):
+
+    ##
+    #__init__
+    #Description: Creates a new Terrain
+    #
+    #Parameters:
+    #   costs - the move cost of each cell, indexed by x * BOARD_LENGTH + y (int[])
+    ##
+    def __init__(self, costs):
+        self.costs = costs
+        self.distances = {}
+
+    ##
+    #getMoveCost
+    #Description: the movement points it costs to step onto a cell
+    #
+    #Parameters:
+    #   coords - a legal coordinate ((int, int))
+    #
+    #Return: the move cost (int)
+    ##
+    def getMoveCost(self, coords):
+        return self.costs[coords[0] * BOARD_LENGTH + coords[1]]
+
+    ##
+    #stepsToReach
+    #Description: the cost of getting from one cell to another, as computed by
+    #   AIPlayerUtils.stepsToReach.
+    #
+    #Parameters:
+    #   src - starting position (a legal x,y coord)
+    #   dst - destination position (a legal x,y coord)
+    #
+    #Return: the cost in steps (int)
+    ##
+    def stepsToReach(self, src, dst):
+        source = src[0] * BOARD_LENGTH + src[1]
+        row = self.distances.get(source)
+        if row == None:
+            row = self.fillDistances(source)
+        return row[dst[0] * BOARD_LENGTH + dst[1]]
+
+    ##
+    #fillDistances
+    #Description: computes and stores the distances from one cell to every
+    #   other cell.  This mirrors the queue order and update rule of the
+    #   original stepsToReach search so that the results are identical.
+    #
+    #Parameters:
+    #   source - the index of the source cell (int)
+    #
+    #Return: the distance to each cell, indexed like costs (int[])
+    ##
+    def fillDistances(self, source):
+        costs = self.costs
+        visited = [None] * len(costs)
+        row = [None] * len(costs)
+        visited[source] = 0
+        queue = [source]
+        head = 0
+
+        while head < len(queue):
+            cell = queue[head]
+            head += 1
+            #the cost when the cell leaves the queue is what stepsToReach reports
+            row[cell] = visited[cell]
+
+            x = cell / BOARD_LENGTH
+            y = cell % BOARD_LENGTH
+            #same neighbour order as AIPlayerUtils.listAdjacent
+            if x > 0:
+                self.relax(visited, queue, cell, cell - BOARD_LENGTH)
+            if x < BOARD_LENGTH - 1:
+                self.relax(visited, queue, cell, cell + BOARD_LENGTH)
+            if y > 0:
+                self.relax(visited, queue, cell, cell - 1)
+            if y < BOARD_LENGTH - 1:
+                self.relax(visited, queue, cell, cell + 1)
+
+        self.distances[source] = row
+        return row
+
+    ##
+    #relax
+    #Description: one neighbour update of fillDistances.  An improved cost is
+    #   recorded but, as in stepsToReach, the cell is only queued once.
+    ##
+    def relax(self, visited, queue, cell, newCell):
+        dist = visited[cell] + self.costs[newCell]
+        if visited[newCell] == None:
+            visited[newCell] = dist
+            queue.append(newCell)
+        elif dist < visited[newCell]:
+            visited[newCell] = dist
+
+
+##
+# getTerrain
+#
+# Description: returns the Terrain for a state's construction layout.  The
+# result is cached on the state (GameState.invalidateCaches drops it) and in
+# a module cache keyed by the cost grid, so a game builds each layout once and
+# a newly built tunnel or captured building simply maps to the right entry.
+#
+# Parameters:
+#   state - a GameState, a fastclone'd GameState or a CompactState
+#
+# Return: the Terrain (Terrain)
+##
+def getTerrain(state):
+    terrain = getattr(state, 'terrain', None)
+    if terrain != None:
+        return terrain
+
+    #build the cost grid; if two constructions share a cell the first one
+    #in inventory order counts, as with AIPlayerUtils.getConstrAt
+    costs = [1] * (BOARD_LENGTH * BOARD_LENGTH)
+    for inv in reversed(state.inventories):
+        for constr in reversed(inv.constrs):
+            costs[constr.coords[0] * BOARD_LENGTH + constr.coords[1]] = CONSTR_STATS[constr.type][MOVE_COST]
+    key = tuple(costs)
+
+    terrain = terrainCache.pop(key, None)
+    if terrain == None:
+        terrain = Terrain(key)
+        if len(terrainCache) >= MAX_CACHED_TERRAINS:
+            terrainCache.popitem(False)
+    terrainCache[key] = terrain
+
+    #cache the terrain on the state if it will take it
+    try:
+        state.terrain = terrain
+    except AttributeError:
+        pass
+    return terrain
@@ -10,6 +10,7 @@ from Building import Building
 from Ant import UNIT_STATS
 from Constants import *
 from GameState import addCoords, subtractCoords
+from LRUCache import LRUCache
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -27,6 +28,14 @@ CELL_SIZE = Rect(0,0,10,10)
 BOARD_SIZE = Rect(0,0,10,10)
 CELL_SPACING = 5
 FIELD_SPACING = 10
+#How many times a second drawBoardIdle checks for input.
+IDLE_FRAME_RATE = 30
+#Shade colors for cells in coordList (all but the last), the last cell in
+#coordList, validCoordList and attackList.
+SHADE_COLORS = [DARK_GREEN, LIGHT_GREEN, GOLDENROD, LIGHT_RED]
+#How many composited cells and rendered text labels are kept for reuse.
+CELL_CACHE_SIZE = 256
+TEXT_CACHE_SIZE = 512
 
 ##
 #UserInterface
@@ -189,6 +198,8 @@ class UserInterface(object):
     #   message - The message to be relayed to the user.(string)
     ##
     def notify(self, message):
+        if message != self.lastNotification:
+            self.redrawNeeded = True
         self.lastNotification = message
     
     ##
@@ -262,25 +273,49 @@ class UserInterface(object):
                indexOfNewline -= 1
             if indexOfNewline == breakupIndex:
                 indexOfNewline = int(float(len(self.lastNotification)) * pctToNewline) - 1
-            messageSurface = self.notifyFont.render(self.lastNotification[breakupIndex:breakupIndex+indexOfNewline].lstrip(), True, DARK_RED)
+            messageSurface = self.renderText(self.notifyFont, self.lastNotification[breakupIndex:breakupIndex+indexOfNewline].lstrip(), True, DARK_RED)
             self.screen.blit(messageSurface, (self.messageLocation[0], self.messageLocation[1] + lineNum * self.notifyFont.get_height()))
             breakupIndex += indexOfNewline
             lineNum += 1
         
-        messageSurface = self.notifyFont.render(self.lastNotification[breakupIndex:].lstrip(), True, DARK_RED)
+        messageSurface = self.renderText(self.notifyFont, self.lastNotification[breakupIndex:].lstrip(), True, DARK_RED)
         self.screen.blit(messageSurface, (self.messageLocation[0], self.messageLocation[1] + lineNum * self.notifyFont.get_height()))
     
+    ##
+    #renderText
+    #Description: renders text like Font.render does, but keeps recently used
+    #   labels so that text that is drawn every frame is only rendered once.
+    #   The labels are shared, so callers must not draw on them.
+    #
+    #Parameters:
+    #   font - the font to render with.(Font)
+    #   text - the text to render.(string)
+    #   antialias - whether to smooth the edges of the text.(boolean)
+    #   color - the color of the text.((int,int,int))
+    #   background - the color behind the text, or None for transparent.((int,int,int))
+    #
+    #Returns: the rendered text.(Surface)
+    ##
+    def renderText(self, font, text, antialias, color, background = None):
+        key = (font, text, antialias, color, background)
+        label = self.textCache.get(key)
+        if label == None:
+            if background == None:
+                label = font.render(text, antialias, color)
+            else:
+                label = font.render(text, antialias, color, background)
+            self.textCache.put(key, label)
+        return label
+    
     ##
     #drawConstruction
-    #Description: Draws a non-moving structure of the specified type to the specified location on the game board.
+    #Description: Draws a non-moving structure of the specified type onto a cell.
     #
     #Parameters:
     #   item - an object subclassed from Construction.(Construction or Building)
-    #   position - a tuple that indicates a cell on the board. This will be converted to a pixel location.((int,int))
+    #   cellTex - the cell sized surface to draw on.(Surface)
     ##
-    def drawConstruction(self, item, position):
-        Xpixel = CELL_SPACING * (position[0] + 1) + CELL_SIZE.width * position[0]
-        Ypixel = CELL_SPACING * (position[1] + 1) + CELL_SIZE.height * position[1]
+    def drawConstruction(self, item, cellTex):
         constrTex = self.constructionTexs[item.type].copy()
         background = pygame.Surface(CELL_SIZE.size)
         if type(item) is Building:
@@ -290,19 +325,17 @@ class UserInterface(object):
             background.fill(WHITE)
         background.blit(constrTex, (0, 0))
         background.set_colorkey(WHITE)
-        self.screen.blit(background, (Xpixel, Ypixel))
+        cellTex.blit(background, (0, 0))
     
     ##
     #drawAnt
-    #Description: Draws an Ant of the specified type to the specified location on the game board.
+    #Description: Draws an Ant of the specified type onto a cell.
     #
     #Parameters:
     #   ant - an Ant object.(Ant)
-    #   position - a tuple that indicates a cell on the board. This will be converted to a pixel location.((int,int))
+    #   cellTex - the cell sized surface to draw on.(Surface)
     ##
-    def drawAnt(self, ant, position):
-        Xpixel = CELL_SPACING * (position[0] + 1) + CELL_SIZE.width * position[0]
-        Ypixel = CELL_SPACING * (position[1] + 1) + CELL_SIZE.height * position[1]
+    def drawAnt(self, ant, cellTex):
         #Start by drawing the ant itself onto a solid player color background.
         #The player color should only show in areas of the playerAlpha color.
         background = pygame.Surface(CELL_SIZE.size)
@@ -310,27 +343,27 @@ class UserInterface(object):
         background.blit(self.antTexs[ant.type], (0, 0))
         background.set_colorkey(WHITE)
         #Then draw the ant itself.
-        self.screen.blit(background, (Xpixel, Ypixel))
+        cellTex.blit(background, (0, 0))
         #Draw current health across the top from the left as a series of boxes
         boxWidth = 7;
         boxHeight = 6;
         healthBox = Rect(0,0,boxWidth-2,boxHeight-2)
         healthPerimiter = Rect(0,0,boxWidth,boxHeight)
         for x in xrange(0, UNIT_STATS[ant.type][HEALTH]):
-            pygame.draw.rect(self.screen, DARK_GREEN, healthPerimiter.move(Xpixel + CELL_SIZE.width - boxWidth * (x + 1) - 1, Ypixel + 1))
+            pygame.draw.rect(cellTex, DARK_GREEN, healthPerimiter.move(CELL_SIZE.width - boxWidth * (x + 1) - 1, 1))
         for x in xrange(0, ant.health):
-            pygame.draw.rect(self.screen, LIGHT_GREEN, healthBox.move(Xpixel + CELL_SIZE.width - boxWidth * (x + 1), Ypixel + 2))
+            pygame.draw.rect(cellTex, LIGHT_GREEN, healthBox.move(CELL_SIZE.width - boxWidth * (x + 1), 2))
         for x in xrange(ant.health, UNIT_STATS[ant.type][HEALTH]):
-            pygame.draw.rect(self.screen, DARK_RED, healthBox.move(Xpixel + CELL_SIZE.width - boxWidth * (x + 1), Ypixel + 2))
+            pygame.draw.rect(cellTex, DARK_RED, healthBox.move(CELL_SIZE.width - boxWidth * (x + 1), 2))
         #Draw isCarrying marker in lower right
         if ant.carrying:
             XoffsetCarry = CELL_SIZE.width - self.isCarryingTex.get_width()
             YoffsetCarry = CELL_SIZE.height - self.isCarryingTex.get_height()
-            self.screen.blit(self.isCarryingTex, (Xpixel + XoffsetCarry, Ypixel + YoffsetCarry))
+            cellTex.blit(self.isCarryingTex, (XoffsetCarry, YoffsetCarry))
         #Draw hasMoved marker as a shade across the image
         if ant.hasMoved:
             self.shaderTex.fill(BLACK)
-            self.screen.blit(self.shaderTex, (Xpixel, Ypixel))
+            cellTex.blit(self.shaderTex, (0, 0))
     
     ##
     #drawCaptureHealths
@@ -340,8 +373,8 @@ class UserInterface(object):
     #   health - the amount of health to draw.(int, int)
     ##
     def drawCaptureHealths(self, health):
-        label1 = self.monsterFont.render(str(health[0]), True, DARK_BLUE, WHITE)
-        label2 = self.monsterFont.render(str(health[1]), True, DARK_RED, WHITE)
+        label1 = self.renderText(self.monsterFont, str(health[0]), True, DARK_BLUE, WHITE)
+        label2 = self.renderText(self.monsterFont, str(health[1]), True, DARK_RED, WHITE)
         #Find out where to put the text onscreen.
         label1Size = label1.get_size()
         label2Size = label2.get_size()
@@ -388,7 +421,7 @@ class UserInterface(object):
     ##
     def drawCaptureHealth(self, health, coords, player):
         #Create and add settings to the text we want to draw. Background needs to be set so we don't have per pixel alpha.
-        label = self.captureFont.render(str(health), True, LIGHT_RED if player == PLAYER_ONE else LIGHT_BLUE, WHITE)
+        label = self.renderText(self.captureFont, str(health), True, LIGHT_RED if player == PLAYER_ONE else LIGHT_BLUE, WHITE)
         label.set_colorkey(WHITE)
         label.set_alpha(100)
         #Find where to place the text.
@@ -405,7 +438,7 @@ class UserInterface(object):
     #   key - a key in the self.buttons hash table, known in Python as a Dictionary.(string)
     ##
     def drawButton(self, key, buttons):
-        label = self.gameFont.render(key, True, BLACK)
+        label = self.renderText(self.gameFont, key, True, BLACK)
         offset = subtractCoords(self.buttonRect.center, label.get_rect().center)
         self.screen.blit(self.buttonTextures[buttons[key][1]], buttons[key][0])
         self.screen.blit(label, addCoords(buttons[key][0], offset))
@@ -419,8 +452,8 @@ class UserInterface(object):
     #   player2Score - the integer value of player 2's food stock.(int)
     ##
     def drawScoreBoard(self, player1Score, player2Score):
-        label1 = self.gameFont.render("Player 1: " + str(player1Score) + " food", True, BLACK)
-        label2 = self.gameFont.render("Player 2: " + str(player2Score) + " food", True, BLACK)
+        label1 = self.renderText(self.gameFont, "Player 1: " + str(player1Score) + " food", True, BLACK)
+        label2 = self.renderText(self.gameFont, "Player 2: " + str(player2Score) + " food", True, BLACK)
         self.screen.blit(label1, self.scoreLocation)
         self.screen.blit(label2, addCoords(self.scoreLocation, (0, label2.get_rect().height)))
     
@@ -432,11 +465,11 @@ class UserInterface(object):
         #Start by drawing the text box in the appropriate color.
         pygame.draw.rect(self.screen, DARK_RED if self.textBoxContent == '' else LIGHT_GREEN, self.buttonRect.move(self.textPosition))
         #Then draw the number in the text box.
-        label = self.gameFont.render(self.textBoxContent + ('|' if self.boxSelected else ''), True, BLACK)
+        label = self.renderText(self.gameFont, self.textBoxContent + ('|' if self.boxSelected else ''), True, BLACK)
         offset = subtractCoords(self.buttonRect.center, label.get_rect().center)
         self.screen.blit(label, addCoords(self.textPosition, offset))
         #Finally, draw the text box title.
-        boxLabel = self.gameFont.render("Games to play:", True, BLACK)
+        boxLabel = self.renderText(self.gameFont, "Games to play:", True, BLACK)
         boxLabelOffset = (0, - boxLabel.get_height() - FIELD_SPACING)
         self.screen.blit(boxLabel, addCoords(self.textPosition, boxLabelOffset))
     
@@ -466,7 +499,7 @@ class UserInterface(object):
                 Xoffset = 0 if innerDex == 0 else reduce(lambda x,y: x+y, lengths[:innerDex+1])
                 tempX = XStartPixel + Xoffset + FIELD_SPACING * innerDex
                 tempY = YStartPixel + index * (self.tournFont.get_height() + FIELD_SPACING)
-                label = self.tournFont.render(str(scores[index][innerDex]), True, BLACK)
+                label = self.renderText(self.tournFont, str(scores[index][innerDex]), True, BLACK)
                 self.screen.blit(label, (tempX, tempY))
 
         #Add some underlines under the table headers
@@ -489,7 +522,7 @@ class UserInterface(object):
             elapsedColor = DARK_GREEN
         elapsedMessage += str(int(self.tournamentElapsed) / 60) + "m "
         elapsedMessage += str(int(self.tournamentElapsed) % 60) + "s"
-        label = self.tournFont.render(elapsedMessage, True, elapsedColor)
+        label = self.renderText(self.tournFont, elapsedMessage, True, elapsedColor)
         self.screen.blit(label, (XStartPixel, Yoffset))
         
     
@@ -518,7 +551,7 @@ class UserInterface(object):
             tempX = XStartPixel + (secondColumnOffset if index >= maxRows else 0)
             tempY = YStartPixel + index % maxRows * (self.checkBoxRect.height + FIELD_SPACING)
             self.screen.blit(self.checkBoxTextures[safeList[index][1]], (tempX, tempY))
-            label = self.notifyFont.render(str(safeList[index][0].author), True, BLACK)
+            label = self.renderText(self.notifyFont, str(safeList[index][0].author), True, BLACK)
             self.screen.blit(label, (tempX + self.checkBoxRect.width + FIELD_SPACING, tempY + (self.checkBoxRect.height - self.notifyFont.get_height()) / 2))
         #Find out where the button should go.
         buttonIndex = maxRows if maxRows < len(safeList) else len(safeList)
@@ -537,54 +570,213 @@ class UserInterface(object):
     #   currentLoc - The Location to be drawn in this cell. Locations can have
     #       ants and buildings attached, so those will be drawn if present.(Location)
     ##
-    def drawCell(self, currentLoc):
+    def drawCell(self, currentLoc, signature = None):
+        if signature == None:
+            signature = self.getCellSignature(currentLoc)
         col = currentLoc.coords[0]
         row = currentLoc.coords[1]
         #Find the x y coordinates that this column and row map to.
         Xpixel = CELL_SPACING * (col + 1) + CELL_SIZE.width * col
         Ypixel = CELL_SPACING * (row + 1) + CELL_SIZE.height * row
-        #Create a Rect that shows up if the square is selected.
-        shadeWidth = CELL_SPACING / 2 * 2 + CELL_SIZE.width
-        shadeHeight = CELL_SPACING  / 2 * 2 + CELL_SIZE.height
-        shadeRect = Rect(0, 0, shadeWidth, shadeHeight)
-        #Find the X and Y coordinates to draw the shade at.
-        shadeXpixel = Xpixel - CELL_SPACING / 2
-        shadeYpixel = Ypixel - CELL_SPACING / 2
-        #Create a True/False list indicating which shaders should be drawn
-        drawList = []
-        colorList = [DARK_GREEN, LIGHT_GREEN, GOLDENROD, LIGHT_RED]
-        if self.coordList != []:
-            #Draw the shadeRect if currentLoc is in coordList
-            drawList.append(True if currentLoc.coords in self.coordList[:-1] else False)
-            #Draw brighter if the currentLoc is the last move selected
-            drawList.append(True if currentLoc.coords == self.coordList[-1] else False)
-        else:
-            drawList += [False, False]
-        #Also shade potential moves.
-        drawList.append(True if currentLoc.coords in self.validCoordList else False)
-        #Draw the shade for a cell highlighted for attacks if currentLoc is in attackList
-        drawList.append(True if currentLoc.coords in self.attackList else False)
-        #Draw the background shades
-        for index in xrange(0, len(drawList)):
-            if drawList[index]:
-                pygame.draw.rect(self.screen, colorList[index], shadeRect.move(shadeXpixel, shadeYpixel))
-        #Draw the cell itself.
-        self.screen.blit(self.terrainTex, CELL_SIZE.move(Xpixel, Ypixel))
+        #Draw the background shades around the cell.
+        highlights = signature[2]
+        for index in xrange(0, len(highlights)):
+            if highlights[index]:
+                pygame.draw.rect(self.screen, SHADE_COLORS[index], self.getCellRect(currentLoc.coords))
+        #Draw the cell itself, along with what's in it. Cells that look the same
+        #are only put together once.
+        cellKey = signature[:3]
+        cellTex = self.cellCache.get(cellKey)
+        if cellTex == None:
+            cellTex = self.composeCell(currentLoc, highlights)
+            self.cellCache.put(cellKey, cellTex)
+        self.screen.blit(cellTex, (Xpixel, Ypixel))
+        #Draw the captureHealth of any ant tunnel being captured.
+        captureVal = signature[3]
+        if captureVal != -1:
+            self.drawCaptureHealth(captureVal, (Xpixel, Ypixel), currentLoc.constr.player)
+
+    ##
+    #composeCell
+    #Description: puts together the picture of a cell: the terrain, what's in
+    #   the cell and the translucent foreground shades.
+    #
+    #Parameters:
+    #   currentLoc - The Location to be drawn in this cell.(Location)
+    #   highlights - which of SHADE_COLORS to shade the cell with.(bool[])
+    #
+    #Returns: the cell sized picture.(Surface)
+    ##
+    def composeCell(self, currentLoc, highlights):
+        cellTex = pygame.Surface(CELL_SIZE.size)
+        cellTex.blit(self.terrainTex, (0, 0))
         #Draw what's in this cell
         if currentLoc.constr != None:
-            self.drawConstruction(currentLoc.constr, (col, row))
+            self.drawConstruction(currentLoc.constr, cellTex)
         if currentLoc.ant != None:
-            self.drawAnt(currentLoc.ant, (col, row))
+            self.drawAnt(currentLoc.ant, cellTex)
         #Draw the translucent foreground shades.
-        for index in xrange(0, len(drawList)):
-            if drawList[index]:
-                self.shaderTex.fill(colorList[index])
-                self.screen.blit(self.shaderTex, CELL_SIZE.move(Xpixel, Ypixel))
-        #Draw the captureHealth of any ant tunnel being captured.
-        captureVal = self.getCaptureValue(currentLoc)
-        if captureVal != -1:
-            self.drawCaptureHealth(captureVal, (Xpixel, Ypixel), currentLoc.constr.player)
+        for index in xrange(0, len(highlights)):
+            if highlights[index]:
+                self.shaderTex.fill(SHADE_COLORS[index])
+                cellTex.blit(self.shaderTex, (0, 0))
+        return cellTex
 
+    ##
+    #getCellRect
+    #Description: finds the area of the screen a cell covers, including the
+    #   border its highlight shades are drawn in.
+    #
+    #Parameters:
+    #   coords - the board coordinates of the cell.((int,int))
+    #
+    #Returns: the area of the cell.(Rect)
+    ##
+    def getCellRect(self, coords):
+        Xpixel = CELL_SPACING * (coords[0] + 1) + CELL_SIZE.width * coords[0] - CELL_SPACING / 2
+        Ypixel = CELL_SPACING * (coords[1] + 1) + CELL_SIZE.height * coords[1] - CELL_SPACING / 2
+        return Rect(Xpixel, Ypixel, CELL_SPACING / 2 * 2 + CELL_SIZE.width, CELL_SPACING / 2 * 2 + CELL_SIZE.height)
+    
+    ##
+    #getCellSignature
+    #Description: sums up everything drawCell draws for a Location, so that the
+    #   cell only needs drawing again when its signature changes.
+    #
+    #Parameters:
+    #   currentLoc - The Location the cell shows.(Location)
+    #
+    #Returns: a tuple of the construction, the ant, the highlights and the
+    #   capture health drawn in the cell.
+    ##
+    def getCellSignature(self, currentLoc):
+        coords = currentLoc.coords
+        constr = currentLoc.constr
+        ant = currentLoc.ant
+        constrSig = None
+        if constr != None:
+            constrSig = (constr.type, constr.player if type(constr) is Building else None)
+        antSig = None
+        if ant != None:
+            antSig = (ant.type, ant.player, ant.health, ant.carrying, ant.hasMoved)
+        highlights = (coords in self.coordList[:-1], self.coordList != [] and coords == self.coordList[-1],
+                      coords in self.validCoordList, coords in self.attackList)
+        return (constrSig, antSig, highlights, self.getCaptureValue(currentLoc))
+    
+    ##
+    #drawBackground
+    #Description: draws the parts of the game screen that never change (the
+    #   menu area and the player color indicator boxes) onto a surface that is
+    #   copied to the screen to erase whatever was drawn over them.
+    #
+    #Returns: the background.(Surface)
+    ##
+    def drawBackground(self):
+        background = pygame.Surface(self.screen.get_size())
+        background.fill(BLACK)
+        #Draw the menu area.
+        pygame.draw.rect(background, WHITE, self.buttonArea)
+        #Draw the player color indicator boxes.
+        pygame.draw.rect(background, LIGHT_RED, self.outerRect)
+        pygame.draw.rect(background, BLACK, self.innerRect.move((CELL_SPACING, CELL_SPACING)))
+        pygame.draw.rect(background, LIGHT_BLUE, self.outerRect.move((0, self.p2RectYOffset)))
+        pygame.draw.rect(background, BLACK, self.innerRect.move((CELL_SPACING, CELL_SPACING + self.p2RectYOffset)))
+        return background
+    
+    ##
+    #clearRect
+    #Description: erases an area of the screen back to the background.
+    #
+    #Parameters:
+    #   rect - the area to erase.(Rect)
+    ##
+    def clearRect(self, rect):
+        self.screen.blit(self.background, rect, rect)
+    
+    ##
+    #drawGameScreen
+    #Description: draws the board, scores, notification and buttons of a game.
+    #   Only the cells and other areas that changed since the last frame are
+    #   drawn again, and only those areas are sent to the monitor.  Capture
+    #   health numbers are drawn across several cells, so while any are shown
+    #   (and on the frame after) everything is drawn, as is the case after
+    #   another screen was shown or the context buttons were swapped.
+    #
+    #Parameters:
+    #   currentState - The state of the board to draw as a GameState.(GameState)
+    #   mode - The current game mode.(int)
+    ##
+    def drawGameScreen(self, currentState, mode):
+        #Make sure we draw the right buttons
+        relButtons = {} if mode == None else self.humanButtons if mode == HUMAN_MODE else self.aiButtons
+        if self.buildAntMenu == True:
+            relButtons = self.antButtons
+        #Find what each cell shows now, and whether anything is being captured.
+        signatures = []
+        capturing = False
+        for col in xrange(0, len(currentState.board)):
+            for row in xrange(0, len(currentState.board[col])):
+                loc = currentState.board[col][row]
+                signature = self.getCellSignature(loc)
+                capturing = capturing or signature[-1] != -1
+                signatures.append((loc, signature))
+        captureVals = self.getCaptureValues(currentState)
+        capturing = capturing or captureVals[0] != -1 or captureVals[1] != -1
+        
+        dirtyRects = []
+        layout = (mode, self.buildAntMenu)
+        if self.fullRedraw or capturing or self.drawnCapturing or layout != self.drawnLayout:
+            #Start over from the background.
+            self.screen.blit(self.background, (0, 0))
+            self.drawnCells = {}
+            self.drawnButtons = {}
+            self.drawnScore = None
+            self.drawnNotification = None
+            dirtyRects.append(self.screen.get_rect())
+            self.fullRedraw = False
+        self.drawnCapturing = capturing
+        self.drawnLayout = layout
+        
+        #Draw the cells that changed.
+        for loc, signature in signatures:
+            if self.drawnCells.get(loc.coords) != signature:
+                cellRect = self.getCellRect(loc.coords)
+                self.clearRect(cellRect)
+                self.drawCell(loc, signature)
+                dirtyRects.append(cellRect)
+                self.drawnCells[loc.coords] = signature
+        #Draw the captureHealth of any anthill being captured.
+        if captureVals[0] != -1 or captureVals[1] != -1:
+            self.drawCaptureHealths(captureVals)
+        #I can't put this draw method outside of drawBoard, but it shouldn't work this way.
+        score = (currentState.inventories[0].foodCount, currentState.inventories[1].foodCount)
+        if score != self.drawnScore:
+            scoreRect = Rect(self.scoreLocation, (self.screen.get_width() - self.scoreLocation[0], 2 * self.gameFont.get_height()))
+            self.clearRect(scoreRect)
+            self.drawScoreBoard(score[0], score[1])
+            dirtyRects.append(scoreRect)
+            self.drawnScore = score
+        #Draw notifications just above menu buttons. Long ones can run past
+        #their box, so everything below it is erased (basic buttons included).
+        if self.lastNotification != self.drawnNotification:
+            noteTop = self.messageLocation[1] - CELL_SPACING
+            noteRect = Rect(self.buttonArea.left, noteTop, self.buttonArea.width, self.screen.get_height() - noteTop)
+            self.clearRect(noteRect)
+            self.drawNotification()
+            dirtyRects.append(noteRect)
+            self.drawnNotification = self.lastNotification
+            for key in self.buttons:
+                self.drawnButtons.pop(('basic', key), None)
+        #Draw the context and basic buttons that were pressed or released.
+        for group, buttons in (('context', relButtons), ('basic', self.buttons)):
+            for key in buttons:
+                if self.drawnButtons.get((group, key)) != buttons[key][1]:
+                    self.drawButton(key, buttons)
+                    dirtyRects.append(self.buttonRect.move(buttons[key][0]))
+                    self.drawnButtons[(group, key)] = buttons[key][1]
+        #Show only what changed.
+        if dirtyRects:
+            pygame.display.update(dirtyRects)
+    
     ##
     #drawBoard
     #Description: This is the bread and butter of the UserInterface class. Everything
@@ -595,51 +787,47 @@ class UserInterface(object):
     #   mode - The current game mode.(int)
     ##
     def drawBoard(self, currentState, mode):
-        self.handleEvents(mode)
-        if self.choosingAIs:
-            self.screen.fill(WHITE)
-            self.drawAIChecklist(mode)
-            self.drawNotification()
-        elif mode == TOURNAMENT_MODE:
+        hadEvents = self.handleEvents(mode)
+        if self.choosingAIs or mode == TOURNAMENT_MODE:
             self.screen.fill(WHITE)
-            #Draw the box into which the user can enter the number of games they want to play.
-            self.drawTextBox()
-            #Draw the table with columns author/win/loss/tie
-            self.drawTable()
+            if self.choosingAIs:
+                self.drawAIChecklist(mode)
+                self.drawNotification()
+            else:
+                #Draw the box into which the user can enter the number of games they want to play.
+                self.drawTextBox()
+                #Draw the table with columns author/win/loss/tie
+                self.drawTable()
+            #Draw the basic buttons
+            for key in self.buttons:
+                self.drawButton(key, self.buttons)
+            #Show everything I've drawn by posting self.screen to the monitor.
+##            if not self.tournamentInProgress:
+            pygame.display.flip()
+            #The game screen has to be drawn from scratch after another screen.
+            self.fullRedraw = True
         else:
-            self.screen.fill(BLACK)
-            #Draw the menu area.
-            pygame.draw.rect(self.screen, WHITE, self.buttonArea)
-            #Draw the player color indicator boxes.
-            pygame.draw.rect(self.screen, LIGHT_RED, self.outerRect)
-            pygame.draw.rect(self.screen, BLACK, self.innerRect.move((CELL_SPACING, CELL_SPACING)))
-            pygame.draw.rect(self.screen, LIGHT_BLUE, self.outerRect.move((0, self.p2RectYOffset)))
-            pygame.draw.rect(self.screen, BLACK, self.innerRect.move((CELL_SPACING, CELL_SPACING + self.p2RectYOffset)))
-            #Draw the cells themselves.
-            for col in xrange(0, len(currentState.board)):
-                for row in xrange(0, len(currentState.board[col])):
-                    self.drawCell(currentState.board[col][row])
-            #Draw the captureHealth of any anthill being captured.
-            captureVals = self.getCaptureValues(currentState)
-            if captureVals[0] != -1 or captureVals[1] != -1:
-                self.drawCaptureHealths(captureVals)
-            #Make sure we draw the right buttons
-            relButtons = {} if mode == None else self.humanButtons if mode == HUMAN_MODE else self.aiButtons
-            if self.buildAntMenu == True:
-                relButtons = self.antButtons
-            #Draw the context buttons
-            for key in relButtons:
-                self.drawButton(key, relButtons)
-            #I can't put this draw method outside of drawBoard, but it shouldn't work this way.
-            self.drawScoreBoard(currentState.inventories[0].foodCount, currentState.inventories[1].foodCount)
-            #Draw notifications just above menu buttons.
-            self.drawNotification()
-        #Draw the basic buttons
-        for key in self.buttons:
-            self.drawButton(key, self.buttons)
-        #Show everything I've drawn by posting self.screen to the monitor.
-##        if not self.tournamentInProgress:
-        pygame.display.flip()
+            #The game screen only redraws what changed.
+            self.drawGameScreen(currentState, mode)
+        #Input usually leads Game to change what is shown (highlights and so on)
+        #right after this call, so draw once more on the next idle frame.
+        self.redrawNeeded = hadEvents
+    
+    ##
+    #drawBoardIdle
+    #Description: Used in place of drawBoard while waiting for the user. Sleeps
+    #   until the next frame (at most IDLE_FRAME_RATE a second) and only redraws
+    #   the board if input arrived or a notification changed in the meantime,
+    #   instead of redrawing as fast as the CPU allows.
+    #
+    #Parameters:
+    #   currentState - The state of the board to draw as a GameState.(GameState)
+    #   mode - The current game mode.(int)
+    ##
+    def drawBoardIdle(self, currentState, mode):
+        self.clock.tick(IDLE_FRAME_RATE)
+        if self.redrawNeeded or pygame.event.peek():
+            self.drawBoard(currentState, mode)
     
     ##
     #handleButton
@@ -742,6 +930,8 @@ class UserInterface(object):
     #
     #Pararmeters:
     #   mode - The current game mode.(int)
+    #
+    #Returns: True if there were any events to handle.(boolean)
     ##
     def handleEvents(self, mode):
         #Make sure we check the right buttons
@@ -750,7 +940,8 @@ class UserInterface(object):
         if mode == HUMAN_MODE and self.buildAntMenu:
             relButtons = self.antButtons
         #Check what to do for each event
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN and time.clock() - self.lastClicked > self.clickCooldown:
@@ -820,6 +1011,9 @@ class UserInterface(object):
                         self.submitSelected[AIKey][1] = 0
                     else:
                         self.submitSelected[AIKey][1] = 1
+            elif event.type == VIDEOEXPOSE:
+                #The window was uncovered, so everything has to be shown again.
+                self.fullRedraw = True
             elif self.boxSelected and event.type == KEYDOWN:
                 if str(event.unicode) in [str(i) for i in range(0, 10)]:
                     self.textBoxContent += str(event.unicode)
@@ -827,6 +1021,7 @@ class UserInterface(object):
                     self.textBoxContent = self.textBoxContent[:-1]
             elif event.type == KEYDOWN:
                 self.handleHotkey(mode, str(event.unicode))
+        return len(events) > 0
     
     ##
     #findButtonCoords
@@ -953,6 +1148,18 @@ class UserInterface(object):
         self.outerRect = Rect(0, 0, bw * (cw + cs) + cs, (bh / 2 - 1) * (ch + cs) + cs)
         self.innerRect = Rect(0, 0, bw * (cw + cs) - cs, (bh / 2 - 1) * (ch + cs) - cs)
         self.p2RectYOffset = (bh / 2 + 1) * (cw + cs)
+        #Pictures of cells and text kept for reuse (see drawCell and renderText).
+        self.cellCache = LRUCache(CELL_CACHE_SIZE)
+        self.textCache = LRUCache(TEXT_CACHE_SIZE)
+        #What's behind the board, and what was drawn on the last frame (see drawGameScreen).
+        self.background = self.drawBackground()
+        self.fullRedraw = True
+        self.drawnCapturing = False
+        self.drawnLayout = None
+        self.drawnCells = {}
+        self.drawnButtons = {}
+        self.drawnScore = None
+        self.drawnNotification = None
         #Properties of our single text box
         self.textPosition = self.findButtonCoords(2, True)
         self.textBoxContent = ''
@@ -982,3 +1189,6 @@ class UserInterface(object):
         #Set a minimmum time between accepted clicks.
         self.clickCooldown = 0.15
         self.lastClicked = time.clock()
+        #Used by drawBoardIdle to limit the frame rate while waiting for input.
+        self.clock = pygame.time.Clock()
+        self.redrawNeeded = True
@@ -0,0 +1,302 @@
+import random
+from Constants import *
+
+##
+# Zobrist.py
+#
+# Zobrist hashing of game states plus a transposition table that search based
+# AI players can share.
+#
+# A state's hash is the XOR of one random key per feature of the state, so
+# changing one feature only takes two XORs: one to remove the old key and one
+# to add the new one.  AIPlayerUtils.applyNextState does exactly that when the
+# state it is given already carries a hash, which makes the hashes of
+# getNextState/getNextStateAdversarial/makeMove results almost free.
+##
+
+#seed for the key tables.  A fixed seed gives every process the same keys so
+#hashes (and transposition tables) agree between runs and processes.
+ZOBRIST_SEED = 0x5eed
+
+#feature values outside these ranges are clamped to the nearest end
+MAX_HEALTH = 15
+MAX_CAPTURE_HEALTH = 7
+MAX_FOOD = 31
+
+NUM_CELLS = BOARD_LENGTH * BOARD_LENGTH
+NUM_ANT_TYPES = R_SOLDIER + 1
+#construction types run from ANTHILL (-4) to FOOD (-1)
+NUM_CONSTR_TYPES = FOOD - ANTHILL + 1
+
+##
+# makeKeys
+#
+# Description: builds a (nested) table of random 64 bit keys
+#
+# Parameters:
+#   rand - the random number generator to draw from (random.Random)
+#   sizes - the size of each dimension of the table (int[])
+#
+# Return: nested lists of keys (long)
+##
+def makeKeys(rand, sizes):
+    if len(sizes) == 1:
+        return [rand.getrandbits(64) for i in xrange(0, sizes[0])]
+    return [makeKeys(rand, sizes[1:]) for i in xrange(0, sizes[0])]
+
+rand = random.Random(ZOBRIST_SEED)
+#ants: [owner][type][cell] and the extra per-ant features at that spot
+ANT_KEYS = makeKeys(rand, (2, NUM_ANT_TYPES, NUM_CELLS))
+HEALTH_KEYS = makeKeys(rand, (2, NUM_ANT_TYPES, NUM_CELLS, MAX_HEALTH + 1))
+CARRYING_KEYS = makeKeys(rand, (2, NUM_ANT_TYPES, NUM_CELLS))
+HAS_MOVED_KEYS = makeKeys(rand, (2, NUM_ANT_TYPES, NUM_CELLS))
+#constructions: [inventory][type][cell] and [inventory][type][cell][capture
+#health + 1] (slot 0 is for plain Constructions, which have no capture health)
+CONSTR_KEYS = makeKeys(rand, (3, NUM_CONSTR_TYPES, NUM_CELLS))
+CAPTURE_KEYS = makeKeys(rand, (3, NUM_CONSTR_TYPES, NUM_CELLS, MAX_CAPTURE_HEALTH + 2))
+#food counts: [player][food]
+FOOD_KEYS = makeKeys(rand, (2, MAX_FOOD + 1))
+#XORed in when it is PLAYER_TWO's turn
+TURN_KEY = rand.getrandbits(64)
+del rand
+
+##
+# clamp
+#
+# Return: value limited to the range [low, high]
+##
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+##
+# antKey
+#
+# Description: the hash contribution of one ant
+#
+# Parameters:
+#   ant - the ant (Ant)
+#
+# Return: the key (long)
+##
+def antKey(ant):
+    owner = ant.player
+    cell = ant.coords[0] * BOARD_LENGTH + ant.coords[1]
+    key = ANT_KEYS[owner][ant.type][cell] ^ HEALTH_KEYS[owner][ant.type][cell][clamp(ant.health, 0, MAX_HEALTH)]
+    if ant.carrying:
+        key ^= CARRYING_KEYS[owner][ant.type][cell]
+    if ant.hasMoved:
+        key ^= HAS_MOVED_KEYS[owner][ant.type][cell]
+    return key
+
+##
+# constrKey
+#
+# Description: the hash contribution of one construction
+#
+# Parameters:
+#   constr - the construction (Construction)
+#   owner - the player whose inventory holds it (int)
+#
+# Return: the key (long)
+##
+def constrKey(constr, owner):
+    cell = constr.coords[0] * BOARD_LENGTH + constr.coords[1]
+    constrType = constr.type - ANTHILL
+    captureHealth = getattr(constr, 'captureHealth', None)
+    if captureHealth == None:
+        captureSlot = 0
+    else:
+        captureSlot = clamp(captureHealth, 0, MAX_CAPTURE_HEALTH) + 1
+    return CONSTR_KEYS[owner][constrType][cell] ^ CAPTURE_KEYS[owner][constrType][cell][captureSlot]
+
+##
+# foodKey
+#
+# Return: the hash contribution of a player's food count (long)
+##
+def foodKey(owner, foodCount):
+    return FOOD_KEYS[owner][clamp(foodCount, 0, MAX_FOOD)]
+
+##
+# turnKey
+#
+# Return: the hash contribution of whose turn it is (long)
+##
+def turnKey(whoseTurn):
+    if whoseTurn == PLAYER_TWO:
+        return TURN_KEY
+    return 0
+
+##
+# computeHash
+#
+# Description: hashes a state from scratch
+#
+# Parameters:
+#   state - a GameState, fastclone'd GameState or CompactState
+#
+# Return: the hash (long)
+##
+def computeHash(state):
+    key = turnKey(state.whoseTurn)
+    for inv in state.inventories:
+        for ant in inv.ants:
+            key ^= antKey(ant)
+        for constr in inv.constrs:
+            key ^= constrKey(constr, inv.player)
+        if inv.player != NEUTRAL:
+            key ^= foodKey(inv.player, inv.foodCount)
+    return key
+
+##
+# getStateHash
+#
+# Description: returns the Zobrist hash of a state.  The hash is cached on the
+# state (as state.zobrist) and kept up to date by AIPlayerUtils.applyNextState,
+# so states derived from a hashed state through getNextState,
+# getNextStateAdversarial or makeMove are hashed incrementally.  Code that
+# changes a state any other way must set state.zobrist back to None.
+#
+# Parameters:
+#   state - a GameState, fastclone'd GameState or CompactState
+#
+# Return: the hash (long)
+##
+def getStateHash(state):
+    key = getattr(state, 'zobrist', None)
+    if key == None:
+        key = computeHash(state)
+        try:
+            state.zobrist = key
+        except AttributeError:
+            pass
+    return key
+
+
+#Kinds of bound a TranspositionTable entry holds
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+##
+#TableEntry
+#Description: One slot of a TranspositionTable
+#
+#Variables:
+#   key - the full hash of the state (long)
+#   depth - how many plies deep the value was searched (int)
+#   value - the search value (number)
+#   bound - EXACT, LOWER_BOUND or UPPER_BOUND (int)
+#   move - the best move found, or None (Move)
+#   generation - the search that stored the entry (int)
+##
+class TableEntry(object):
+    __slots__ = ('key', 'depth', 'value', 'bound', 'move', 'generation')
+
+    def __init__(self, key, depth, value, bound, move, generation):
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.bound = bound
+        self.move = move
+        self.generation = generation
+
+##
+#TranspositionTable
+#Description: A fixed size table of search results keyed by Zobrist hash.
+#   Each hash maps to one slot.  On a collision the new result replaces the
+#   old one if the old one is left over from an earlier search (see
+#   newSearch) or was searched no deeper than the new one; otherwise the
+#   deeper result is kept.
+#
+#Variables:
+#   size - the number of slots (int)
+#   generation - incremented by newSearch (int)
+#   hits, misses - lookup counts (int)
+##
+class TranspositionTable(object):
+
+    ##
+    #__init__
+    #Description: Creates an empty table
+    #
+    #Parameters:
+    #   size - the number of slots (int)
+    ##
+    def __init__(self, size = 1 << 16):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    ##
+    #lookup
+    #Description: finds the entry stored for a state
+    #
+    #Parameters:
+    #   key - the state's hash (long)
+    #
+    #Return: the TableEntry, or None if there is none
+    ##
+    def lookup(self, key):
+        entry = self.slots[key % self.size]
+        if entry != None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    ##
+    #store
+    #Description: records a search result, subject to the replacement policy
+    #
+    #Parameters:
+    #   key - the state's hash (long)
+    #   depth - how many plies deep the value was searched (int)
+    #   value - the search value (number)
+    #   bound - EXACT, LOWER_BOUND or UPPER_BOUND (int)
+    #   move - the best move found, or None (Move)
+    ##
+    def store(self, key, depth, value, bound, move):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry == None or entry.key == key or entry.generation != self.generation \
+           or entry.depth <= depth:
+            self.slots[index] = TableEntry(key, depth, value, bound, move, self.generation)
+
+    ##
+    #newSearch
+    #Description: marks every stored entry as being from an earlier search so
+    #   that it is replaced first.  Entries stay usable until then.
+    ##
+    def newSearch(self):
+        self.generation += 1
+
+    ##
+    #clear
+    #Description: empties the table
+    ##
+    def clear(self):
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+
+#the table handed out by getSharedTable
+sharedTable = None
+
+##
+# getSharedTable
+#
+# Description: returns a TranspositionTable shared by every AI player in this
+# process, creating it the first time it is asked for.
+#
+# Return: the shared table (TranspositionTable)
+##
+def getSharedTable():
+    global sharedTable
+    if sharedTable == None:
+        sharedTable = TranspositionTable()
+    return sharedTable
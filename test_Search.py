@@ -0,0 +1,63 @@
+import os, sys, unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "AI"))
+import AIPlayer as RandomAI
+import Booger
+from Constants import ACTIVE
+from HeadlessGame import HeadlessGame
+from Search import Search
+
+##
+#Searcher
+#Description: The Random AI's placements with Search.getMove for its moves
+##
+class Searcher(RandomAI.AIPlayer):
+
+    def __init__(self, inputPlayerId):
+        super(Searcher, self).__init__(inputPlayerId)
+        self.author = "Searcher"
+        self.search = Search(maxDepth = 2)
+
+    def getMove(self, currentState):
+        return self.search.getMove(currentState)
+
+##
+#SearchTest
+#Description: Plays a Search based AI against the simple AIs, on both sides
+#   of the board
+##
+class SearchTest(unittest.TestCase):
+
+    ##
+    #playGames
+    #Description: plays the searcher against an opponent, once as each player
+    #
+    #Return: the number of games the searcher won (int)
+    ##
+    def playGames(self, opponentClass):
+        game = HeadlessGame()
+        game.masterSeed = 421
+        wins = 0
+        for searcherId in (0, 1):
+            #the game makes every AI with id -1 and sets the real id later
+            searcher = Searcher(-1)
+            opponent = opponentClass(-1)
+            searcher.playerId = searcherId
+            opponent.playerId = 1 - searcherId
+            players = [searcher, opponent]
+            if searcherId == 1:
+                players.reverse()
+            game.players = [[player, ACTIVE] for player in players]
+            game.gameNumber = searcherId
+            winner, loser = game.playGame(players[0], players[1])
+            if winner == searcherId:
+                wins += 1
+        return wins
+
+    def testBeatsBooger(self):
+        self.assertEqual(self.playGames(Booger.AIPlayer), 2)
+
+    def testBeatsRandom(self):
+        self.assertEqual(self.playGames(RandomAI.AIPlayer), 2)
+
+if __name__ == "__main__":
+    unittest.main()